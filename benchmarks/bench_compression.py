@@ -0,0 +1,88 @@
+'''CPU cost against bytes saved when compressing user payloads
+
+Run with: python -m benchmarks.bench_compression [users] [repeat]
+
+Payloads are the JSON bodies of GET /api/users/{uid} and of the full
+GET /api/users stream, compressed with each encoding and level. Times
+include encoding the JSON, the identity row is the cost without
+compression.
+'''
+import sys
+from time import perf_counter
+
+from usersvc.entities import Role, User
+from usersvc.http.adapters import user_asjson
+from utils.http import (
+    Compression,
+    Request,
+    json_response,
+    json_stream_response
+)
+
+ROLES = [
+    Role(id=0, name='users.admin', permissions=['users:edit', 'users:view']),
+    Role(id=1, name='shopping.admin', permissions=['shopping:edit']),
+]
+
+
+def users(count):
+    return [
+        User(
+            id=uid,
+            username='user{:05d}'.format(uid),
+            fullname='User Number {}'.format(uid),
+            email='user{:05d}@company.com'.format(uid),
+            password='',
+            roles=ROLES[:uid % 3],
+        )
+        for uid in range(count)
+    ]
+
+
+def measure(name, build, repeat):
+    plain = b''.join(body(build()))
+    start = perf_counter()
+    for _ in range(repeat):
+        b''.join(body(build()))
+    elapsed = (perf_counter() - start) / repeat * 1e6
+    print('{} ({} bytes)'.format(name, len(plain)))
+    print('  {:<17} {:8.1f} us'.format('identity', elapsed))
+    for encoding in ['gzip', 'deflate']:
+        req = Request('/', 'GET', headers={'Accept-Encoding': encoding})
+        for level in [1, 6, 9]:
+            compression = Compression(min_size=0, level=level)
+            start = perf_counter()
+            for _ in range(repeat):
+                size = len(b''.join(body(compression.compress(req, build()))))
+            elapsed = (perf_counter() - start) / repeat * 1e6
+            print('  {:<8} level {}  {:8.1f} us  {:6.1%} of size'.format(
+                encoding,
+                level,
+                elapsed,
+                size / len(plain),
+            ))
+
+
+def body(resp):
+    if resp.stream is None:
+        return [resp.body]
+
+    return resp.stream
+
+
+def main(count=1000, repeat=20):
+    all_users = [user_asjson(user) for user in users(count)]
+    measure(
+        'GET /api/users/{uid}',
+        lambda: json_response(all_users[1]),
+        repeat * 100,
+    )
+    measure(
+        'GET /api/users',
+        lambda: json_stream_response('users', iter(all_users)),
+        repeat,
+    )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
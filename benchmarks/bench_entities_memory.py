@@ -0,0 +1,83 @@
+'''Memory footprint of 100k users, dict-based dataclass vs slotted Struct
+
+Run with: python -m benchmarks.bench_entities_memory [users]
+'''
+import sys
+import tracemalloc
+from typing import List
+
+from dataclasses import dataclass
+
+from usersvc.entities import Role, User
+
+
+@dataclass
+class DictRole:
+    name: str
+    permissions: List[str]
+    id: int = -1
+
+
+@dataclass
+class DictUser:
+    username: str
+    fullname: str
+    email: str
+    password: str
+    roles: List[DictRole]
+    id: int = -1
+
+
+def measure(name, factory, count):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    items = [factory(i) for i in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_item = (after - before) / count
+    print('{:<10} {:>10.1f} MiB {:>8.1f} B/user'.format(
+        name,
+        (after - before) / 2 ** 20,
+        per_item,
+    ))
+    del items
+    return per_item
+
+
+def main(count=100000):
+    roles = [Role(id=0, name='users.admin', permissions=['users:edit'])]
+    dict_roles = [
+        DictRole(id=0, name='users.admin', permissions=['users:edit']),
+    ]
+    fields = (
+        'user{:06}',
+        'User {:06}',
+        'user{:06}@company.com',
+        'pass{:06}',
+    )
+
+    def dict_user(i):
+        return DictUser(*[field.format(i) for field in fields],
+                        roles=dict_roles, id=i)
+
+    def struct_user(i):
+        return User(*[field.format(i) for field in fields],
+                    roles=roles, id=i)
+
+    print('{} users, including field values'.format(count))
+    before = measure('dataclass', dict_user, count)
+    after = measure('struct', struct_user, count)
+    print('saved      {:>10.1f}%'.format(100 * (before - after) / before))
+
+    values = [[field.format(i) for field in fields] for i in range(count)]
+    print('{} users, objects only'.format(count))
+    before = measure('dataclass', lambda i: DictUser(
+        *values[i], roles=dict_roles, id=i), count)
+    after = measure('struct', lambda i: User(
+        *values[i], roles=roles, id=i), count)
+    print('saved      {:>10.1f}%'.format(100 * (before - after) / before))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
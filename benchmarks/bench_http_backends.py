@@ -0,0 +1,98 @@
+'''Per-request overhead of the Falcon and native WSGI backends
+
+Run with: python -m benchmarks.bench_http_backends [requests]
+
+Requests are built as WSGI environs and passed straight to the apps, so
+only routing, request/response adaptation and the handler are measured.
+'''
+import sys
+import warnings
+from io import BytesIO
+from time import perf_counter
+
+from utils.http import Api, Request, json_response
+from utils.http.backends.falcon import FalconApp
+from utils.http.backends.wsgi import WsgiApp
+
+BODY = b'{"username": "admin01", "password": "admin123"}'
+
+
+class ItemsApi:
+    api = Api('/api/items')
+
+    @api.post
+    def create_item(self, req: Request):
+        return json_response(req.json, status=201)
+
+
+class ItemApi:
+    api = Api('/api/items/{uid}')
+
+    @api.get
+    def get_item(self, req: Request, uid: str):
+        return json_response({'id': uid})
+
+
+def environ(method, path, body=b''):
+    return {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '3000',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_HOST': 'localhost:3000',
+        'HTTP_ACCEPT': 'application/json',
+        'HTTP_USER_AGENT': 'bench',
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def start_response(status, headers):
+    pass
+
+
+def measure(app, method, path, body, requests):
+    start = perf_counter()
+    for _ in range(requests):
+        env = environ(method, path, body)
+        b''.join(app(env, start_response))
+    return (perf_counter() - start) / requests * 1e6
+
+
+def main(requests=50000):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        falcon_app = FalconApp()
+
+    apps = [
+        ('falcon', falcon_app),
+        ('wsgi', WsgiApp()),
+    ]
+    cases = [
+        ('GET /api/items/{uid}', 'GET', '/api/items/10', b''),
+        ('POST /api/items', 'POST', '/api/items', BODY),
+    ]
+    for _, app in apps:
+        app.add_api(ItemsApi()).add_api(ItemApi()).configure()
+
+    for case, method, path, body in cases:
+        print(case)
+        for name, app in apps:
+            print('  {:<8} {:6.1f} us/request'.format(
+                name,
+                measure(app, method, path, body, requests),
+            ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,113 @@
+'''Requests/sec of the production server against the worker count
+
+Run with: python -m benchmarks.bench_http_server [seconds] [max_workers]
+
+The server answers a small JSON document through FalconApp. Load comes
+from one client process per CPU, each holding keep-alive connections.
+workers=0 is the wsgiref development server, for reference.
+'''
+import os
+import socket
+import sys
+import time
+from http.client import HTTPConnection
+from multiprocessing import Pool, Process
+from threading import Thread
+
+from utils.http import Api, json_response
+from utils.http.backends.falcon import FalconApp
+
+CONNECTIONS_PER_CLIENT = 8
+
+
+class PingApi:
+    api = Api('/ping')
+
+    @api.get
+    def ping(self, _):
+        return json_response({'pong': True})
+
+
+def run_server(port, workers):
+    app = FalconApp().add_api(PingApi()).configure()
+    sys.stdout = sys.stderr = open(os.devnull, 'w')
+    app.run('127.0.0.1', port, production=workers > 0, workers=workers)
+
+
+def wait_server(port):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+
+    raise RuntimeError('server did not start')
+
+
+def client_loop(port, deadline, counts, pos):
+    conn = HTTPConnection('127.0.0.1', port)
+    while time.monotonic() < deadline:
+        conn.request('GET', '/ping')
+        conn.getresponse().read()
+        counts[pos] += 1
+    conn.close()
+
+
+def run_client(args):
+    port, seconds = args
+    deadline = time.monotonic() + seconds
+    counts = [0] * CONNECTIONS_PER_CLIENT
+    threads = [
+        Thread(target=client_loop, args=(port, deadline, counts, pos))
+        for pos in range(CONNECTIONS_PER_CLIENT)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sum(counts)
+
+
+def measure(seconds, workers, clients):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    server = Process(target=run_server, args=(port, workers))
+    server.start()
+    try:
+        wait_server(port)
+        with Pool(clients) as pool:
+            total = sum(pool.map(run_client, [(port, seconds)] * clients))
+    finally:
+        server.terminate()
+        server.join()
+
+    return total / seconds
+
+
+def main(seconds=5, max_workers=None):
+    cpus = os.cpu_count()
+    max_workers = max_workers or cpus
+    print('{} cpus, {} client processes'.format(cpus, cpus))
+
+    print('wsgiref     {:>8.0f} req/s'.format(measure(seconds, 0, cpus)))
+
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        rps = measure(seconds, workers, cpus)
+        baseline = baseline or rps
+        print('workers={:<3} {:>8.0f} req/s  x{:.2f}'.format(
+            workers,
+            rps,
+            rps / baseline,
+        ))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
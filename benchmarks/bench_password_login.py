@@ -0,0 +1,73 @@
+'''Login throughput with scrypt verification on the process pool
+
+Run with: python -m benchmarks.bench_password_login [logins] [max_workers]
+
+Each worker count is measured with the same number of concurrent logins,
+submitted from a thread pool the size of the request workers of a server.
+'''
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from usersvc.entities import Role, User
+from usersvc.use_cases.auth import AuthUseCases, UserLoginRequest
+from usersvc.use_cases.password import PasswordHasher
+
+REQUEST_THREADS = 32
+
+
+class UsersRepoStub:
+    def __init__(self, user: User):
+        self.user = user
+
+    def get_user_by_name(self, name: str) -> User:
+        return self.user
+
+
+def measure(logins, workers):
+    hasher = PasswordHasher(workers=workers, max_pending=logins)
+    user = User(
+        id=1,
+        username='admin01',
+        fullname='Admin 01',
+        email='admin@company.com',
+        password=hasher.hash('admin123'),
+        roles=[Role(name='users.admin', permissions=['users:view'])],
+    )
+    auth_ucs = AuthUseCases(UsersRepoStub(user), hasher=hasher)
+    req = UserLoginRequest(username='admin01', password='admin123')
+
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as pool:
+        start = perf_counter()
+        tokens = list(pool.map(
+            lambda _: auth_ucs.user_login(req),
+            range(logins),
+        ))
+        elapsed = perf_counter() - start
+
+    hasher.shutdown()
+    assert all(tokens)
+    return elapsed
+
+
+def main(logins=200, max_workers=None):
+    max_workers = max_workers or os.cpu_count()
+    print('{} logins, {} cpus'.format(logins, os.cpu_count()))
+
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        elapsed = measure(logins, workers)
+        baseline = baseline or elapsed
+        print('workers={:<3} {:.2f}s  {:.0f} logins/s  x{:.2f}'.format(
+            workers,
+            elapsed,
+            logins / elapsed,
+            baseline / elapsed,
+        ))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
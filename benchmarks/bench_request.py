@@ -0,0 +1,81 @@
+'''Cost of building a Request from a WSGI environ, eager vs lazy
+
+Run with: python -m benchmarks.bench_request [requests]
+
+The eager variant is the previous Request, which copied every header
+and parsed the query, body and derived fields up front. Handlers that
+only need the path parameters, like most GETs, pay for none of that now.
+'''
+import sys
+from time import perf_counter
+from urllib.parse import parse_qsl
+
+from benchmarks.bench_http_backends import BODY, environ
+from utils.http.backends.wsgi import environ_request
+
+
+class EagerRequest:
+    def __init__(self, path, method, body, headers, query, remote_addr):
+        self.path = path
+        self.method = method
+        self.body = body
+        self.headers = headers
+        self.query = query
+        self.content_type = headers.get('Content-Type', 'text/plain')
+        self.authorization = headers.get('Authorization', '')
+        self.host = headers.get('Host', '')
+        port = self.host.split(':')
+        self.port = int(port[1]) if len(port) >= 2 else 80
+        self.remote_addr = remote_addr if remote_addr else ''
+        for header in ['Forwarded', 'X-Forwarded-For', 'X-Real-IP']:
+            self.remote_addr = headers.get(header, self.remote_addr)
+
+
+def eager_request(env: dict) -> EagerRequest:
+    headers = {
+        key[5:].replace('_', '-').title(): value
+        for key, value in env.items()
+        if key.startswith('HTTP_')
+    }
+    headers['Content-Type'] = env.get('CONTENT_TYPE', '')
+    length = int(env.get('CONTENT_LENGTH') or 0)
+    query = env.get('QUERY_STRING')
+    return EagerRequest(
+        path=env.get('PATH_INFO') or '/',
+        method=env['REQUEST_METHOD'],
+        body=env['wsgi.input'].read(length) if length > 0 else b'',
+        headers=headers,
+        query=dict(parse_qsl(query, keep_blank_values=True)) if query else {},
+        remote_addr=env.get('REMOTE_ADDR'),
+    )
+
+
+def measure(build, method, path, body, requests, use):
+    envs = [environ(method, path, body) for _ in range(requests)]
+    start = perf_counter()
+    for env in envs:
+        use(build(env))
+    return (perf_counter() - start) / requests * 1e6
+
+
+def main(requests=100000):
+    cases = [
+        ('GET, path only', 'GET', lambda req: req.path, b''),
+        ('GET, authorization', 'GET', lambda req: req.authorization, b''),
+        ('POST, body', 'POST', lambda req: req.body, BODY),
+    ]
+    builds = [
+        ('eager', eager_request),
+        ('lazy', environ_request),
+    ]
+    for case, method, use, body in cases:
+        print(case)
+        for name, build in builds:
+            print('  {:<6} {:5.2f} us/request'.format(
+                name,
+                measure(build, method, '/api/items', body, requests, use),
+            ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,68 @@
+'''Per-request overhead of tracing
+
+Run with: python -m benchmarks.bench_tracing [requests]
+
+GET /api/items/{uid} on the native WSGI backend, with a traced use case
+calling a traced in-memory repo: three spans per request when tracing
+records, none when the tracer has no exporter.
+'''
+import sys
+
+from utils.http import Api, Request, RequestTracing, json_response
+from utils.http.backends.wsgi import WsgiApp
+from utils.tracing import RingBufferExporter, trace_methods, tracer
+
+from .bench_http_backends import measure
+
+
+@trace_methods('ItemsRepo')
+class ItemsRepo:
+    def get_item(self, uid: str) -> dict:
+        return {'id': uid}
+
+
+@trace_methods('ItemUseCases')
+class ItemUseCases:
+    def __init__(self, repo: ItemsRepo):
+        self.repo = repo
+
+    def get_item(self, uid: str) -> dict:
+        return self.repo.get_item(uid)
+
+
+class ItemApi:
+    api = Api('/api/items/{uid}')
+
+    def __init__(self, ucs: ItemUseCases):
+        self.ucs = ucs
+
+    @api.get
+    def get_item(self, req: Request, uid: str):
+        return json_response(self.ucs.get_item(uid))
+
+
+def app(middleware):
+    return WsgiApp(middleware=middleware) \
+        .add_api(ItemApi(ItemUseCases(ItemsRepo()))) \
+        .configure()
+
+
+def main(requests=50000):
+    cases = [
+        ('no middleware', None, app([])),
+        ('no exporter', None, app([RequestTracing()])),
+        ('ring buffer', RingBufferExporter(), app([RequestTracing()])),
+    ]
+    print('GET /api/items/{uid}')
+    for name, exporter, wsgi_app in cases:
+        tracer.exporter = exporter
+        print('  {:<14} {:6.1f} us/request'.format(
+            name,
+            measure(wsgi_app, 'GET', '/api/items/10', b'', requests),
+        ))
+
+    tracer.exporter = None
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
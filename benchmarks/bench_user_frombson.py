@@ -0,0 +1,76 @@
+'''Hydration cost of user_frombson for a bulk user listing
+
+Run with: python -m benchmarks.bench_user_frombson [users] [roles]
+'''
+import sys
+from random import Random
+from time import perf_counter
+
+from usersvc.entities import Role, User
+from usersvc.repos.mongo.adapters import roles_index, user_frombson
+
+ROLES_PER_USER = 3
+
+
+def legacy_user_frombson(data, roles):
+    user_roles = []
+    for role in roles:
+        if role.id in data['roles']:
+            user_roles.append(role)
+
+    return User(
+        id=data.get('_id'),
+        username=data.get('username'),
+        email=data.get('email'),
+        fullname=data.get('fullname'),
+        password=data.get('password'),
+        roles=user_roles,
+    )
+
+
+def make_data(users_count, roles_count):
+    rand = Random(42)
+    roles = [
+        Role(id=i, name='role.{}'.format(i), permissions=['perm:{}'.format(i)])
+        for i in range(roles_count)
+    ]
+    users = [
+        {
+            '_id': i,
+            'username': 'user{}'.format(i),
+            'email': 'user{}@company.com'.format(i),
+            'fullname': 'User {}'.format(i),
+            'password': 'pass',
+            'roles': rand.sample(range(roles_count), ROLES_PER_USER),
+        }
+        for i in range(users_count)
+    ]
+    return users, roles
+
+
+def bench(name, func):
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+    print('{:<10} {:>10.3f}s'.format(name, elapsed))
+    return elapsed
+
+
+def main(users_count=100000, roles_count=1000):
+    users, roles = make_data(users_count, roles_count)
+    print('{} users x {} roles'.format(users_count, roles_count))
+
+    legacy = bench('legacy', lambda: [
+        legacy_user_frombson(user, roles) for user in users
+    ])
+
+    def indexed_run():
+        index = roles_index(roles)
+        return [user_frombson(user, index) for user in users]
+
+    indexed = bench('indexed', indexed_run)
+    print('speedup    {:>10.1f}x'.format(legacy / indexed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,46 @@
+import pytest
+
+from usersvc.amqp_rpc.auth import AuthService
+
+
+@pytest.fixture
+def auth_service(auth_ucs):
+    return AuthService(auth_ucs)
+
+
+def test_check_permissions(auth_service):
+    resp = auth_service.check_permissions({
+        'checks': [
+            {'user_id': 0, 'permission': 'users:edit'},
+            {'user_id': 0, 'permission': 'users:view'},
+            {'user_id': 1, 'permission': 'users:edit'},
+        ],
+    })
+    assert resp == {
+        'ok': True,
+        'payload': {'results': [True, False, False]},
+    }
+
+
+def test_check_permissions_invalid(auth_service):
+    too_many = [{'user_id': 0, 'permission': 'users:edit'}] * 1001
+    for req in [
+            None,
+            {},
+            {'checks': [{'user_id': 0}]},
+            {'checks': [{'user_id': 0, 'permission': ['users:edit']}]},
+            {'checks': [{'user_id': [1], 'permission': 'users:edit'}]},
+            {'checks': [{'user_id': {'a': 1}, 'permission': 'users:edit'}]},
+            {'checks': [{'user_id': 'x', 'permission': 'users:edit'}]},
+            {'checks': too_many},
+    ]:
+        resp = auth_service.check_permissions(req)
+        assert resp == {'ok': False, 'error': 'badrequest'}
+
+
+def test_check_permissions_parses_ids(auth_ucs):
+    auth_service = AuthService(auth_ucs, parse_id=int)
+    resp = auth_service.check_permissions({
+        'checks': [{'user_id': '0', 'permission': 'users:edit'}],
+    })
+    assert resp == {'ok': True, 'payload': {'results': [True]}}
@@ -37,6 +37,35 @@ def test_list_users(users_service):
     }
 
 
+def test_list_users_page(user_service):
+    resp = user_service.list_users({'limit': 1})
+    assert resp['ok']
+    assert [user['id'] for user in resp['payload']['users']] == [0]
+    assert resp['payload']['next'] == 0
+
+    resp = user_service.list_users({'limit': 1, 'after': 0})
+    assert [user['id'] for user in resp['payload']['users']] == [1]
+    assert resp['payload']['next'] == 1
+
+
+def test_create_user_hasher_busy(user_service):
+    resp = user_service.create_user({
+        'username': 'test01',
+        'password': 'busy_pass',
+        'fullname': 'Test',
+        'email': 'test01@company.com',
+        'roles': [],
+    })
+    assert resp == {'ok': False, 'error': 'busy'}
+
+
+def test_list_users_invalid_page(user_service):
+    for req in [{'limit': '10'}, {'limit': None}, {'limit': 1, 'after': 'x'},
+                {'after': [1]}]:
+        resp = user_service.list_users(req)
+        assert resp == {'ok': False, 'error': 'badrequest'}
+
+
 def test_get_user(users_client):
     resp = users_client.simulate_get(USER_ID_URL.format(id=0))
     assert resp.status_code == http_status.OK
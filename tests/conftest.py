@@ -0,0 +1,10 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
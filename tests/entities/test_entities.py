@@ -0,0 +1,56 @@
+import pickle
+
+import pytest
+from dataclasses import FrozenInstanceError
+
+from usersvc.entities import Role, User
+
+ROLE = Role(id=0, name='users.admin', permissions=['users:edit'])
+
+
+@pytest.fixture
+def user():
+    return User(
+        id=0,
+        username='admin01',
+        fullname='Admin',
+        email='admin01@company.com',
+        password='admin123',
+        roles=[ROLE],
+    )
+
+
+def test_user_is_frozen(user):
+    with pytest.raises(FrozenInstanceError):
+        user.username = 'changed'
+
+
+def test_user_has_no_dict(user):
+    assert not hasattr(user, '__dict__')
+
+
+def test_user_replace(user):
+    new_user = user.replace(id=1, roles=[])
+
+    assert new_user.id == 1
+    assert new_user.username == 'admin01'
+    assert not new_user.has_permission('users:edit')
+    assert user.id == 0
+    assert user.has_permission('users:edit')
+
+
+def test_user_replace_unknown_field(user):
+    with pytest.raises(TypeError):
+        user.replace(unknown=1)
+
+
+def test_user_hashable(user):
+    assert user.replace(password='') in {user.replace(password='')}
+    assert ROLE in {ROLE}
+
+
+def test_user_pickle(user):
+    new_user = pickle.loads(pickle.dumps(user))
+
+    assert new_user == user
+    assert new_user.has_permission('users:edit')
@@ -0,0 +1,51 @@
+from usersvc.entities import Role, User
+from usersvc.entities.permission import PermissionRegistry, registry
+
+
+def test_registry_interns_bits():
+    permissions = PermissionRegistry()
+    assert permissions.bit('users:view') == 1
+    assert permissions.bit('users:edit') == 2
+    assert permissions.bit('users:view') == 1
+    assert len(permissions) == 2
+
+
+def test_registry_lookup_does_not_intern():
+    permissions = PermissionRegistry()
+    assert permissions.lookup('users:view') == 0
+    assert len(permissions) == 0
+
+
+def test_registry_names():
+    permissions = PermissionRegistry()
+    mask = permissions.mask(['a', 'b', 'c'])
+    assert permissions.names(mask & ~permissions.bit('b')) == {'a', 'c'}
+
+
+def test_role_permission_mask():
+    role = Role(name='users.admin', permissions=['users:edit', 'users:view'])
+    assert role.permission_mask == registry.mask(['users:view', 'users:edit'])
+
+    role = role.replace(permissions=['users:view'])
+    assert role.permission_mask == registry.bit('users:view')
+
+
+def test_user_permissions():
+    user = User(
+        username='admin01',
+        fullname='Admin',
+        email='admin01@company.com',
+        password='admin123',
+        roles=[
+            Role(name='users.admin', permissions=['users:edit', 'users:view']),
+            Role(name='users.viewer', permissions=['users:view']),
+        ],
+    )
+    assert user.permissions == {'users:edit', 'users:view'}
+    assert user.has_permission('users:edit')
+    assert not user.has_permission('shopping.list:edit')
+    assert not user.has_permission('never.registered:permission')
+
+    user = user.replace(roles=[])
+    assert user.permissions == frozenset()
+    assert not user.has_permission('users:edit')
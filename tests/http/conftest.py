@@ -1,21 +1,32 @@
-from typing import List
+from typing import Iterator, List
 
 import pytest
 
 from usersvc.entities.role import Role
 from usersvc.entities.token import Token
 from usersvc.entities.user import User
-from usersvc.use_cases.auth import UserLoginRequest
+from usersvc.use_cases.auth import (
+    UserLoginRequest,
+    UsersHavePermissionsRequest
+)
+from usersvc.use_cases.password import PasswordHasherBusy
 from usersvc.use_cases.user import (
     CreateUserRequest,
     DeleteUserRequest,
     GetUserByIdRequest,
-    UpdateUserRequest
+    ListUsersRequest,
+    UpdateUserRequest,
+    UsersPage
 )
+from utils.http.backends.asgi import AsgiApp
+from utils.http.backends.falcon import FalconApp
+from utils.http.backends.wsgi import WsgiApp
 
 
 class AuthUseCasesStub:
     def user_login(self, req: UserLoginRequest) -> Token:
+        if req.username == 'busy_user':
+            raise PasswordHasherBusy()
         if req.username != 'valid_user':
             return None
         if req.password != 'valid_pass':
@@ -31,6 +42,15 @@ class AuthUseCasesStub:
             ],
         )
 
+    def users_have_permissions(
+            self,
+            req: UsersHavePermissionsRequest,
+    ) -> List[bool]:
+        return [
+            check.user_id == 0 and check.permission == 'users:edit'
+            for check in req.checks
+        ]
+
 
 class UserUseCasesStub:
     roles = [
@@ -66,6 +86,23 @@ class UserUseCasesStub:
     def get_all_users(self) -> List[User]:
         return [self.admin_user, self.common_user]
 
+    def list_users(self, req: ListUsersRequest) -> UsersPage:
+        users = [
+            user for user in self.get_all_users()
+            if req.after is None or user.id > req.after
+        ]
+        users = users[:req.limit]
+        if len(users) < req.limit:
+            return UsersPage(users=users)
+
+        return UsersPage(users=users, next=users[-1].id)
+
+    def iter_all_users(self) -> Iterator[User]:
+        yield from self.get_all_users()
+
+    def get_users_version(self) -> str:
+        return '1.0'
+
     def get_user_by_id(self, req: GetUserByIdRequest) -> User:
         if req.id >= 2:
             return None
@@ -73,6 +110,8 @@ class UserUseCasesStub:
         return self.admin_user
 
     def create_user(self, req: CreateUserRequest) -> User:
+        if req.password == 'busy_pass':
+            raise PasswordHasherBusy()
         usernames = [
             self.admin_user.username,
             self.common_user.username,
@@ -83,6 +122,10 @@ class UserUseCasesStub:
         return self.admin_user
 
     def update_user(self, req: UpdateUserRequest) -> User:
+        if req.password == 'busy_pass':
+            raise PasswordHasherBusy()
+        if req.email == self.common_user.email and req.id != 1:
+            return 'duplicated data'
         if req.id >= 2:
             return None
 
@@ -103,3 +146,11 @@ def auth_ucs():
 @pytest.fixture
 def user_ucs():
     return UserUseCasesStub()
+
+
+@pytest.fixture(
+    params=[FalconApp, WsgiApp, AsgiApp],
+    ids=['falcon', 'wsgi', 'asgi'],
+)
+def http_app(request):
+    return request.param
@@ -3,10 +3,10 @@ from http import HTTPStatus as http_status
 import pytest
 from falcon import testing
 
-from usersvc.http.auth import AuthApi
-from utils.http.backends.falcon import FalconApp
+from usersvc.http.auth import AuthApi, PermissionsApi
 
 LOGIN_URL = '/api/login'
+PERMISSIONS_URL = '/api/permissions/check'
 
 
 @pytest.fixture
@@ -16,11 +16,11 @@ def auth_api(auth_ucs):
 
 
 @pytest.fixture
-def auth_client(auth_api):
-    app = FalconApp() \
+def auth_client(auth_api, http_app):
+    app = http_app() \
         .add_api(auth_api) \
         .configure()
-    return testing.TestClient(app.falcon)
+    return testing.TestClient(app)
 
 
 def test_user_login(auth_client):
@@ -53,3 +53,50 @@ def test_user_login_invalid_user(auth_client):
     })
     assert resp.status_code == http_status.NOT_FOUND
     assert resp.text == 'Username or password incorrect'
+
+
+def test_user_login_hasher_busy(auth_client):
+    resp = auth_client.simulate_post(LOGIN_URL, json={
+        'username': 'busy_user',
+        'password': 'valid_pass',
+    })
+    assert resp.status_code == http_status.SERVICE_UNAVAILABLE
+
+
+@pytest.fixture
+def permissions_client(auth_ucs, http_app):
+    app = http_app() \
+        .add_api(PermissionsApi(auth_ucs)) \
+        .configure()
+    return testing.TestClient(app)
+
+
+def test_check_permissions(permissions_client):
+    resp = permissions_client.simulate_post(PERMISSIONS_URL, json={
+        'checks': [
+            {'user_id': 0, 'permission': 'users:edit'},
+            {'user_id': 1, 'permission': 'users:edit'},
+        ],
+    })
+    assert resp.status_code == http_status.OK
+    assert resp.json == {'results': [True, False]}
+
+
+def test_check_permissions_missing_body(permissions_client):
+    resp = permissions_client.simulate_post(PERMISSIONS_URL)
+    assert resp.status_code == http_status.UNSUPPORTED_MEDIA_TYPE
+
+
+def test_check_permissions_invalid(permissions_client):
+    too_many = [{'user_id': 0, 'permission': 'users:edit'}] * 1001
+    for data in [
+            {},
+            {'checks': [{'user_id': 0}]},
+            {'checks': 1},
+            {'checks': [{'user_id': 0, 'permission': ['users:edit']}]},
+            {'checks': [{'user_id': 0, 'permission': {}}]},
+            {'checks': too_many},
+    ]:
+        resp = permissions_client.simulate_post(PERMISSIONS_URL, json=data)
+        assert resp.status_code == http_status.BAD_REQUEST
+        assert resp.text == 'Invalid permission checks'
@@ -4,7 +4,8 @@ import pytest
 from falcon import testing
 
 from usersvc.http.users import UserApi, UserListApi
-from utils.http.backends.falcon import FalconApp
+from usersvc.repos.mongo import UlidIdAllocator
+from utils.http import MSGPACK
 
 USERS_URL = '/api/users'
 USER_ID_URL = '/api/users/{id}'
@@ -23,12 +24,12 @@ def user_list_api(user_ucs):
 
 
 @pytest.fixture
-def users_client(user_api, user_list_api):
-    app = FalconApp() \
+def users_client(user_api, user_list_api, http_app):
+    app = http_app() \
         .add_api(user_list_api) \
         .add_api(user_api) \
         .configure()
-    return testing.TestClient(app.falcon)
+    return testing.TestClient(app)
 
 
 def test_list_users(users_client):
@@ -58,6 +59,34 @@ def test_list_users(users_client):
     }
 
 
+def test_list_users_page(users_client):
+    resp = users_client.simulate_get(USERS_URL, params={'limit': 1})
+
+    assert resp.status_code == http_status.OK
+    assert [user['id'] for user in resp.json['users']] == [0]
+    assert resp.json['next'] == 0
+
+    resp = users_client.simulate_get(USERS_URL, params={
+        'limit': 1,
+        'after': 0,
+    })
+    assert [user['id'] for user in resp.json['users']] == [1]
+    assert resp.json['next'] == 1
+
+
+def test_list_users_last_page(users_client):
+    resp = users_client.simulate_get(USERS_URL, params={'after': 0})
+
+    assert resp.status_code == http_status.OK
+    assert [user['id'] for user in resp.json['users']] == [1]
+    assert resp.json['next'] is None
+
+
+def test_list_users_invalid_page(users_client):
+    resp = users_client.simulate_get(USERS_URL, params={'limit': 'abc'})
+    assert resp.status_code == http_status.BAD_REQUEST
+
+
 def test_get_user(users_client):
     resp = users_client.simulate_get(USER_ID_URL.format(id=0))
     assert resp.status_code == http_status.OK
@@ -78,6 +107,31 @@ def test_get_user_not_found(users_client):
     assert resp.status_code == http_status.NOT_FOUND
 
 
+def test_invalid_user_id_not_found(users_client):
+    for method in ['GET', 'PUT', 'DELETE']:
+        resp = users_client.simulate_request(
+            method,
+            USER_ID_URL.format(id='abc'),
+            json={},
+        )
+        assert resp.status_code == http_status.NOT_FOUND
+
+
+def test_user_ids_parsed_by_allocator(user_ucs, http_app):
+    parse_id = UlidIdAllocator().parse_id
+    app = http_app() \
+        .add_api(UserListApi(user_ucs, parse_id)) \
+        .add_api(UserApi(user_ucs, parse_id)) \
+        .configure()
+    client = testing.TestClient(app)
+
+    resp = client.simulate_get(USER_ID_URL.format(id=0))
+    assert resp.status_code == http_status.NOT_FOUND
+
+    resp = client.simulate_get(USERS_URL, params={'after': 0})
+    assert resp.status_code == http_status.BAD_REQUEST
+
+
 def test_create_user(users_client):
     resp = users_client.simulate_post(USERS_URL, json={
         'username': 'admin01',
@@ -108,6 +162,17 @@ def test_create_user_duplicated(users_client):
     assert resp.text == 'Duplicated data'
 
 
+def test_create_user_hasher_busy(users_client):
+    resp = users_client.simulate_post(USERS_URL, json={
+        'username': 'test01',
+        'password': 'busy_pass',
+        'fullname': 'Test',
+        'email': 'test01@company.com',
+        'roles': [],
+    })
+    assert resp.status_code == http_status.SERVICE_UNAVAILABLE
+
+
 def test_update_user(users_client):
     resp = users_client.simulate_put(USER_ID_URL.format(id=0), json={
         'username': 'admin01',
@@ -126,6 +191,26 @@ def test_update_user(users_client):
     }
 
 
+def test_update_user_hasher_busy(users_client):
+    resp = users_client.simulate_put(USER_ID_URL.format(id=0), json={
+        'password': 'busy_pass',
+        'fullname': 'Admin',
+        'email': 'admin01@company.com',
+        'roles': [],
+    })
+    assert resp.status_code == http_status.SERVICE_UNAVAILABLE
+
+
+def test_update_user_duplicated(users_client):
+    resp = users_client.simulate_put(USER_ID_URL.format(id=0), json={
+        'password': '',
+        'fullname': 'Admin',
+        'email': 'user01@company.com',
+        'roles': [],
+    })
+    assert resp.status_code == http_status.CONFLICT
+
+
 def test_update_user_not_found(users_client):
     resp = users_client.simulate_put(USER_ID_URL.format(id=1000), json={
         'username': 'admin01',
@@ -146,3 +231,77 @@ def test_delete_user(users_client):
 def test_delete_user_not_found(users_client):
     resp = users_client.simulate_delete(USER_ID_URL.format(id=1000))
     assert resp.status_code == http_status.NOT_FOUND
+
+
+def test_get_user_msgpack(users_client):
+    resp = users_client.simulate_get(
+        USER_ID_URL.format(id=0),
+        headers={'Accept': 'application/msgpack'},
+    )
+
+    assert resp.status_code == http_status.OK
+    assert resp.headers['Content-Type'] == 'application/msgpack'
+    assert MSGPACK.loads(resp.content)['username'] == 'admin01'
+
+
+def test_list_users_msgpack(users_client):
+    resp = users_client.simulate_get(
+        USERS_URL,
+        headers={'Accept': 'application/msgpack'},
+    )
+
+    assert resp.status_code == http_status.OK
+    assert resp.headers['Content-Type'] == 'application/msgpack'
+    assert [
+        user['id'] for user in MSGPACK.loads(resp.content)['users']
+    ] == [0, 1]
+
+
+def test_create_user_msgpack(users_client):
+    resp = users_client.simulate_post(
+        USERS_URL,
+        body=MSGPACK.dumps({
+            'username': 'admin01',
+            'password': 'admin123',
+            'fullname': 'Admin',
+            'email': 'admin01@company.com',
+            'roles': ['users.admin', 'shopping.admin'],
+        }),
+        headers={'Content-Type': 'application/msgpack'},
+    )
+
+    assert resp.status_code == http_status.OK
+    assert resp.json['username'] == 'admin01'
+
+
+def test_get_user_etag(users_client):
+    resp = users_client.simulate_get(USER_ID_URL.format(id=0))
+    etag = resp.headers['ETag']
+    assert etag.startswith('W/"0.0.')
+
+    resp = users_client.simulate_get(
+        USER_ID_URL.format(id=0),
+        headers={'If-None-Match': etag},
+    )
+    assert resp.status_code == http_status.NOT_MODIFIED
+    assert resp.headers['ETag'] == etag
+    assert resp.content == b''
+
+    resp = users_client.simulate_get(
+        USER_ID_URL.format(id=0),
+        headers={'If-None-Match': 'W/"0.1.0"'},
+    )
+    assert resp.status_code == http_status.OK
+
+
+@pytest.mark.parametrize('query', ['', 'limit=10'])
+def test_list_users_etag(users_client, query):
+    resp = users_client.simulate_get(USERS_URL, query_string=query)
+    assert resp.headers['ETag'] == 'W/"1.0"'
+
+    resp = users_client.simulate_get(
+        USERS_URL,
+        query_string=query,
+        headers={'If-None-Match': 'W/"0.0", W/"1.0"'},
+    )
+    assert resp.status_code == http_status.NOT_MODIFIED
@@ -0,0 +1,122 @@
+from typing import List
+
+import pytest
+
+from usersvc.entities.role import Role, RolesRepo
+from usersvc.entities.user import User, UsersRepo
+
+
+class RolesRepoStub(RolesRepo):
+    def __init__(self):
+        self._id_count = 0
+        self._data = {}
+        self.calls = 0
+
+    def get_all_roles(self) -> List[Role]:
+        self.calls += 1
+        return list(self._data.values())
+
+    def create_role(self, role: Role) -> int:
+        role = role.replace(id=self._id_count)
+        self._id_count += 1
+        self._data[role.id] = role
+
+        return role.id
+
+    def update_role(self, role: Role) -> bool:
+        if role.id not in self._data:
+            return False
+
+        self._data[role.id] = role
+        return True
+
+    def delete_role(self, role: Role) -> bool:
+        if role.id not in self._data:
+            return False
+
+        del self._data[role.id]
+        return True
+
+
+class UsersRepoStub(UsersRepo):
+    def __init__(self):
+        self._data = {}
+        self.calls = 0
+
+    def get_user_by_id(self, uid: int) -> User:
+        self.calls += 1
+        return self._data.get(uid)
+
+    def get_user_by_name(self, name: str) -> User:
+        self.calls += 1
+        for item in self._data.values():
+            if item.username == name:
+                return item
+
+        return None
+
+    def get_users_by_ids(self, uids: List[int]) -> List[User]:
+        self.calls += 1
+        return [self._data[uid] for uid in uids if uid in self._data]
+
+    def create_and_get_user(self, user: User) -> User:
+        for item in self._data.values():
+            if user.username == item.username:
+                return None
+
+        user = user.replace(id=max(self._data, default=-1) + 1)
+        self._data[user.id] = user
+        return user
+
+    def update_and_get_user(self, user: User) -> User:
+        if user.id not in self._data:
+            return None
+
+        current = self._data[user.id]
+        self._data[user.id] = user.replace(username=current.username)
+        return self._data[user.id]
+
+    def delete_and_get_user(self, uid: int) -> User:
+        return self._data.pop(uid, None)
+
+
+class ClockStub:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return ClockStub()
+
+
+@pytest.fixture
+def roles_repo_stub():
+    repo = RolesRepoStub()
+    repo.create_role(Role(
+        name='users.admin',
+        permissions=['users:edit', 'users:view'],
+    ))
+    repo.create_role(Role(
+        name='shopping.admin',
+        permissions=['shopping.list:edit'],
+    ))
+    return repo
+
+
+@pytest.fixture
+def users_repo_stub():
+    repo = UsersRepoStub()
+    for uid in range(3):
+        repo._data[uid] = User(
+            id=uid,
+            username='user{:02}'.format(uid),
+            fullname='User',
+            email='user{:02}@company.com'.format(uid),
+            password='pass',
+            roles=[],
+        )
+    return repo
@@ -0,0 +1,134 @@
+import pytest
+
+from usersvc.entities import Generations
+from usersvc.entities.role import Role
+from usersvc.repos.cache import CachedRolesRepo
+
+
+@pytest.fixture
+def roles_repo(roles_repo_stub, clock):
+    return CachedRolesRepo(roles_repo_stub, ttl=10, clock=clock)
+
+
+def test_get_role_by_id(roles_repo):
+    role = roles_repo.get_role_by_id(0)
+    assert role.name == 'users.admin'
+
+
+def test_get_role_by_id_not_found(roles_repo):
+    role = roles_repo.get_role_by_id(1000)
+    assert role is None
+
+
+def test_get_role_by_name(roles_repo):
+    role = roles_repo.get_role_by_name('shopping.admin')
+    assert role.id == 1
+
+
+def test_get_role_by_name_not_found(roles_repo):
+    role = roles_repo.get_role_by_name('invalid.name')
+    assert role is None
+
+
+def test_get_roles_by_ids(roles_repo):
+    roles = roles_repo.get_roles_by_ids([1, 1000, 0])
+    assert [role.name for role in roles] == ['shopping.admin', 'users.admin']
+
+
+def test_get_roles_by_names(roles_repo):
+    roles = roles_repo.get_roles_by_names(['users.admin', 'invalid.name'])
+    assert [role.id for role in roles] == [0]
+
+
+def test_loads_table_once(roles_repo, roles_repo_stub):
+    roles_repo.get_all_roles()
+    roles_repo.get_role_by_id(0)
+    roles_repo.get_role_by_name('users.admin')
+
+    assert roles_repo_stub.calls == 1
+    assert roles_repo.stats() == {
+        'version': 0,
+        'hits': 2,
+        'misses': 1,
+    }
+
+
+def test_reloads_after_ttl(roles_repo, roles_repo_stub, clock):
+    roles_repo.get_all_roles()
+    clock.now = 9
+    roles_repo.get_all_roles()
+    assert roles_repo_stub.calls == 1
+
+    clock.now = 10
+    roles_repo.get_all_roles()
+    assert roles_repo_stub.calls == 2
+
+
+def test_create_role_invalidates(roles_repo, roles_repo_stub):
+    roles_repo.get_all_roles()
+    roles_repo.create_role(Role(
+        name='test.role',
+        permissions=['test.permission'],
+    ))
+
+    role = roles_repo.get_role_by_name('test.role')
+    assert role.id == 2
+    assert roles_repo.version == 1
+    assert roles_repo_stub.calls == 2
+
+
+def test_sync_version_invalidates_on_change(roles_repo, roles_repo_stub):
+    roles_repo.sync_version(3)
+    roles_repo.get_all_roles()
+    roles_repo.sync_version(3)
+    roles_repo.get_all_roles()
+    assert roles_repo_stub.calls == 1
+
+    roles_repo.sync_version(4)
+    roles_repo.get_all_roles()
+    assert roles_repo_stub.calls == 2
+
+
+def test_update_role_invalidates(roles_repo):
+    roles_repo.get_all_roles()
+    resp = roles_repo.update_role(Role(
+        id=0,
+        name='updated.role',
+        permissions=['updated.permission'],
+    ))
+    assert resp is True
+
+    assert roles_repo.get_role_by_name('users.admin') is None
+    assert roles_repo.get_role_by_id(0).name == 'updated.role'
+
+
+def test_delete_role_invalidates(roles_repo):
+    roles_repo.get_all_roles()
+    resp = roles_repo.delete_role(Role(
+        id=0,
+        name='users.admin',
+        permissions=[],
+    ))
+    assert resp is True
+
+    assert roles_repo.get_role_by_id(0) is None
+    assert len(roles_repo.get_all_roles()) == 1
+
+
+def test_invalidate_bumps_generation_after_reset(roles_repo_stub, clock):
+    gens = Generations()
+    roles_repo = CachedRolesRepo(roles_repo_stub, clock=clock, gens=gens)
+    update_role = roles_repo_stub.update_role
+    stamps = []
+
+    def update_and_stamp(role):
+        # the mongo repo bumps on write, a decision stamped right after
+        # may still read the old table
+        gens.bump_roles()
+        stamps.append(gens.stamp(0))
+        return update_role(role)
+
+    roles_repo_stub.update_role = update_and_stamp
+    role = roles_repo.get_role_by_id(0)
+    roles_repo.update_role(role)
+    assert gens.stamp(0) != stamps[0]
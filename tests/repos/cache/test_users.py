@@ -0,0 +1,162 @@
+import pytest
+
+from usersvc.entities import Generations
+from usersvc.entities.user import User
+from usersvc.repos.cache import CachedRolesRepo, CachedUsersRepo
+
+
+@pytest.fixture
+def users_repo(users_repo_stub, clock):
+    return CachedUsersRepo(users_repo_stub, max_size=2, ttl=10, clock=clock)
+
+
+def test_get_user_by_id(users_repo, users_repo_stub):
+    user = users_repo.get_user_by_id(0)
+    assert user.username == 'user00'
+
+    user = users_repo.get_user_by_id(0)
+    assert user.username == 'user00'
+    assert users_repo_stub.calls == 1
+
+
+def test_get_user_by_id_not_found(users_repo, users_repo_stub):
+    assert users_repo.get_user_by_id(1000) is None
+    assert users_repo.stats()['size'] == 0
+
+
+def test_get_user_by_name_shares_entry(users_repo, users_repo_stub):
+    users_repo.get_user_by_id(1)
+    user = users_repo.get_user_by_name('user01')
+
+    assert user.id == 1
+    assert users_repo_stub.calls == 1
+
+
+def test_get_user_by_name_not_found(users_repo):
+    assert users_repo.get_user_by_name('invalid_name') is None
+
+
+def test_get_users_by_ids(users_repo, users_repo_stub):
+    users_repo.get_user_by_id(0)
+    users = users_repo.get_users_by_ids([0, 1, 1000])
+    assert [user.id for user in users] == [0, 1]
+    assert users_repo_stub.calls == 2
+
+    users_repo.get_users_by_ids([0, 1])
+    assert users_repo_stub.calls == 2
+
+
+def test_expires_after_ttl(users_repo, users_repo_stub, clock):
+    users_repo.get_user_by_id(0)
+    clock.now = 10
+    users_repo.get_user_by_id(0)
+
+    assert users_repo_stub.calls == 2
+
+
+def test_evicts_least_recently_used(users_repo, users_repo_stub):
+    users_repo.get_user_by_id(0)
+    users_repo.get_user_by_id(1)
+    users_repo.get_user_by_id(0)
+    users_repo.get_user_by_id(2)
+
+    users_repo.get_user_by_name('user00')
+    assert users_repo_stub.calls == 3
+
+    users_repo.get_user_by_name('user01')
+    assert users_repo_stub.calls == 4
+
+
+def test_update_and_get_user_invalidates(users_repo):
+    users_repo.get_user_by_id(0)
+    users_repo.update_and_get_user(User(
+        id=0,
+        username=None,
+        fullname='Updated',
+        email='updated@company.com',
+        password='',
+        roles=[],
+    ))
+
+    user = users_repo.get_user_by_id(0)
+    assert user.fullname == 'Updated'
+
+
+def test_create_and_get_user_invalidates(users_repo, users_repo_stub):
+    assert users_repo.get_user_by_name('user03') is None
+    user = users_repo_stub.get_user_by_id(0).replace(username='user03')
+    user = users_repo.create_and_get_user(user)
+    assert users_repo.get_user_by_name('user03').id == user.id
+
+    # renamed elsewhere, the name is reused by a new user
+    users_repo.get_user_by_name('user01')
+    old = users_repo_stub._data[1]
+    users_repo_stub._data[1] = old.replace(username='renamed01')
+    user = users_repo.create_and_get_user(old.replace(id=-1))
+    assert users_repo.get_user_by_name('user01').id == user.id
+
+
+def test_delete_and_get_user_invalidates(users_repo):
+    users_repo.get_user_by_name('user00')
+    users_repo.delete_and_get_user(0)
+
+    assert users_repo.get_user_by_name('user00') is None
+    assert users_repo.get_user_by_id(0) is None
+
+
+def test_roles_change_invalidates(users_repo_stub, roles_repo_stub, clock):
+    roles_repo = CachedRolesRepo(roles_repo_stub)
+    users_repo = CachedUsersRepo(users_repo_stub, roles_repo=roles_repo)
+
+    users_repo.get_user_by_id(0)
+    roles_repo.invalidate()
+    users_repo.get_user_by_id(0)
+
+    assert users_repo_stub.calls == 2
+
+
+def test_stats(users_repo):
+    users_repo.get_user_by_id(0)
+    users_repo.get_user_by_id(0)
+    users_repo.get_user_by_id(1)
+    users_repo.get_user_by_id(2)
+
+    assert users_repo.stats() == {
+        'size': 2,
+        'max_size': 2,
+        'hits': 1,
+        'misses': 3,
+        'evictions': 1,
+        'hit_rate': 0.25,
+    }
+
+
+def test_roles_change_during_load_expires_entry(
+        users_repo_stub,
+        roles_repo_stub,
+):
+    roles_repo = CachedRolesRepo(roles_repo_stub)
+    users_repo = CachedUsersRepo(users_repo_stub, roles_repo=roles_repo)
+    load = users_repo_stub.get_user_by_id
+
+    def load_during_role_write(uid):
+        user = load(uid)
+        roles_repo.invalidate()
+        return user
+
+    users_repo_stub.get_user_by_id = load_during_role_write
+    users_repo.get_user_by_id(0)
+    users_repo_stub.get_user_by_id = load
+
+    users_repo.get_user_by_id(0)
+    assert users_repo_stub.calls == 2
+
+
+def test_invalidate_bumps_generation_after_removal(users_repo_stub, clock):
+    gens = Generations()
+    users_repo = CachedUsersRepo(users_repo_stub, clock=clock, gens=gens)
+    user = users_repo.get_user_by_id(0)
+    stamp = gens.stamp(user.id)
+
+    users_repo.invalidate(user.id)
+    assert gens.stamp(user.id) != stamp
@@ -1,7 +1,88 @@
+import asyncio
+
 import pytest
 from mongomock import MongoClient
 
+from usersvc.repos.mongo import IdAllocator
+
+
+class IdAllocatorStub(IdAllocator):
+    def __init__(self, start: int):
+        self._next = start
+
+    def next_id(self) -> int:
+        uid = self._next
+        self._next += 1
+        return uid
+
 
 @pytest.fixture
 def mongo():
     return MongoClient()
+
+
+@pytest.fixture
+def ids():
+    return IdAllocatorStub(2)
+
+
+class AsyncCursorStub:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self.cursor = self.cursor.limit(*args, **kwargs)
+        return self
+
+    async def to_list(self, length):
+        await asyncio.sleep(0)
+        data = list(self.cursor)
+        return data if length is None else data[:length]
+
+
+class AsyncCollectionStub:
+    '''Motor-like wrapper around a mongomock collection'''
+
+    def __init__(self, coll):
+        self.coll = coll
+        self.calls = []
+
+    def find(self, *args, **kwargs):
+        self.calls.append('find')
+        return AsyncCursorStub(self.coll.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self.coll, name)
+
+        async def wrapper(*args, **kwargs):
+            self.calls.append(name)
+            await asyncio.sleep(0)
+            return method(*args, **kwargs)
+
+        return wrapper
+
+
+class AsyncDatabaseStub:
+    def __init__(self, db):
+        self.db = db
+        self.colls = {}
+
+    def __getattr__(self, name):
+        if name not in self.colls:
+            self.colls[name] = AsyncCollectionStub(getattr(self.db, name))
+        return self.colls[name]
+
+
+class AsyncClientStub:
+    def __init__(self, client):
+        self.client = client
+        self.auth = AsyncDatabaseStub(client.auth)
+
+
+@pytest.fixture
+def aio_mongo(mongo):
+    return AsyncClientStub(mongo)
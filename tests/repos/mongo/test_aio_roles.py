@@ -0,0 +1,83 @@
+import pytest
+
+from usersvc.entities.role import Role
+from usersvc.repos.aio_mongo import AsyncRolesRepoMongo
+
+
+class AsyncIdAllocatorStub:
+    def __init__(self, start: int):
+        self._next = start
+
+    async def next_id(self) -> int:
+        uid = self._next
+        self._next += 1
+        return uid
+
+
+@pytest.fixture
+def roles_repo(mongo, aio_mongo):
+    mongo.auth.drop_collection('roles')
+    mongo.auth.roles.insert_one({
+        '_id': 0,
+        'name': 'users.admin',
+        'permissions': ['users:edit', 'users:view'],
+    })
+    mongo.auth.roles.insert_one({
+        '_id': 1,
+        'name': 'shopping.admin',
+        'permissions': ['shopping.list:edit'],
+    })
+    return AsyncRolesRepoMongo(aio_mongo, AsyncIdAllocatorStub(2))
+
+
+def test_get_role_by_id(roles_repo, run):
+    role = run(roles_repo.get_role_by_id(0))
+    assert role.id == 0
+    assert role.name == 'users.admin'
+
+
+def test_get_role_by_name_not_found(roles_repo, run):
+    role = run(roles_repo.get_role_by_name('invalid.name'))
+    assert role is None
+
+
+def test_get_roles_by_names(roles_repo, run):
+    roles = run(roles_repo.get_roles_by_names(['shopping.admin', 'invalid']))
+    assert [role.id for role in roles] == [1]
+
+
+def test_get_all_roles(roles_repo, run):
+    roles = run(roles_repo.get_all_roles())
+    assert [role.name for role in roles] == ['users.admin', 'shopping.admin']
+
+
+def test_create_role(roles_repo, mongo, run):
+    inserted_id = run(roles_repo.create_role(Role(
+        name='test.role',
+        permissions=['test.permission'],
+    )))
+    assert inserted_id == 2
+
+    result = mongo.auth.roles.find_one({'_id': 2})
+    assert result['name'] == 'test.role'
+
+
+def test_update_role(roles_repo, mongo, run):
+    resp = run(roles_repo.update_role(Role(
+        id=0,
+        name='updated.role',
+        permissions=['updated.permission'],
+    )))
+    assert resp is True
+
+    result = mongo.auth.roles.find_one({'_id': 0})
+    assert result['name'] == 'updated.role'
+
+
+def test_delete_role_not_found(roles_repo, run):
+    resp = run(roles_repo.delete_role(Role(
+        id=1000,
+        name='notfound.role',
+        permissions=[],
+    )))
+    assert resp is False
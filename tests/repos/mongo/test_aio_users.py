@@ -0,0 +1,172 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from usersvc.entities import DuplicatedUser
+from usersvc.entities.role import AsyncRolesRepo, Role
+from usersvc.entities.user import User
+from usersvc.repos.aio_mongo import AsyncHiLoIdAllocator, AsyncUsersRepoMongo
+from utils.querystats import count_queries
+
+USERS_ADMIN_ROLE = Role(
+    id=0,
+    name='users.admin',
+    permissions=['users:edit', 'users:view'],
+)
+SHOPPING_USER_ROLE = Role(
+    id=2,
+    name='shopping.user',
+    permissions=['shopping.list:view'],
+)
+
+
+class AsyncRolesRepoStub(AsyncRolesRepo):
+    async def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        await asyncio.sleep(0)
+        return [
+            role for role in [USERS_ADMIN_ROLE, SHOPPING_USER_ROLE]
+            if role.id in uids
+        ]
+
+
+@pytest.fixture
+def users_repo(mongo, aio_mongo):
+    mongo.auth.drop_collection('users')
+    mongo.auth.drop_collection('counters')
+    for uid in range(5):
+        mongo.auth.users.insert_one({
+            '_id': uid,
+            'username': 'user{:02}'.format(uid),
+            'password': 'pass',
+            'fullname': 'User',
+            'email': 'user{:02}@company.com'.format(uid),
+            'roles': [uid % 3],
+        })
+
+    return AsyncUsersRepoMongo(aio_mongo, AsyncRolesRepoStub())
+
+
+def test_get_user_by_id(users_repo, run):
+    user = run(users_repo.get_user_by_id(0))
+    assert user.username == 'user00'
+    assert user.roles == [USERS_ADMIN_ROLE]
+
+
+def test_get_users_by_ids(users_repo, run):
+    users = run(users_repo.get_users_by_ids([3, 0, 1000]))
+    assert sorted(user.id for user in users) == [0, 3]
+    assert run(users_repo.get_users_by_ids([])) == []
+
+
+def test_get_user_by_name_not_found(users_repo, run):
+    user = run(users_repo.get_user_by_name('invalid_name'))
+    assert user is None
+
+
+def test_get_users_page(users_repo, run):
+    users = run(users_repo.get_users_page(2, after=1))
+    assert [user.id for user in users] == [2, 3]
+    assert users[0].roles == [SHOPPING_USER_ROLE]
+
+
+def test_iter_all_users(users_repo, run):
+    async def collect():
+        return [user.id async for user in users_repo.iter_all_users(2)]
+
+    assert run(collect()) == [0, 1, 2, 3, 4]
+
+
+def test_iter_all_users_prefetches_next_page(users_repo, aio_mongo, run):
+    async def first_user():
+        users = users_repo.iter_all_users(2)
+        user = await users.__anext__()
+        await users.aclose()
+        return user
+
+    user = run(first_user())
+    assert user.id == 0
+    assert aio_mongo.auth.users.calls == ['find', 'find']
+
+
+def test_create_and_get_user(users_repo, mongo, aio_mongo, run):
+    users_repo.ids = AsyncHiLoIdAllocator(aio_mongo, 'users', min_id=100)
+    user = run(users_repo.create_and_get_user(User(
+        username='test_user',
+        password='test123',
+        fullname='Test',
+        email='test@company.com',
+        roles=[USERS_ADMIN_ROLE],
+    )))
+    assert user.id == 100
+
+    result = mongo.auth.users.find_one({'_id': 100})
+    assert result['username'] == 'test_user'
+
+
+def test_create_user_duplicated(users_repo, run):
+    run(users_repo.ensure_indexes())
+    user = run(users_repo.create_and_get_user(User(
+        username='user00',
+        password='test123',
+        fullname='Test',
+        email='test@company.com',
+        roles=[],
+    )))
+    assert user is None
+
+
+def test_update_and_get_user(users_repo, run):
+    user = run(users_repo.update_and_get_user(User(
+        id=0,
+        username=None,
+        password='',
+        fullname='Updated',
+        email='updated@company.com',
+        roles=[SHOPPING_USER_ROLE],
+    )))
+    assert user.username == 'user00'
+    assert user.password == 'pass'
+    assert user.fullname == 'Updated'
+    assert user.roles == [SHOPPING_USER_ROLE]
+
+
+def test_update_user_duplicated_email(users_repo, run):
+    run(users_repo.ensure_indexes())
+    user = run(users_repo.get_user_by_id(1)).replace(
+        email='user00@company.com',
+    )
+    with pytest.raises(DuplicatedUser):
+        run(users_repo.update_user(user))
+    with pytest.raises(DuplicatedUser):
+        run(users_repo.update_and_get_user(user))
+
+
+def test_delete_and_get_user(users_repo, mongo, run):
+    user = run(users_repo.delete_and_get_user(1))
+    assert user.username == 'user01'
+
+    assert mongo.auth.users.find_one({'_id': 1}) is None
+
+
+def test_query_budget(users_repo, aio_mongo, run):
+    with count_queries() as stats:
+        run(users_repo.get_user_by_id(0))
+    assert (stats.ops, stats.docs) == (1, 1)
+
+    with count_queries() as stats:
+        run(users_repo.get_users_page(3))
+    assert (stats.ops, stats.docs) == (1, 3)
+
+    users_repo.ids = AsyncHiLoIdAllocator(aio_mongo, 'users', min_id=100)
+    run(users_repo.ids.next_id())
+    with count_queries() as stats:
+        run(users_repo.create_and_get_user(User(
+            username='test_user',
+            password='test123',
+            fullname='Test',
+            email='test@company.com',
+            roles=[],
+        )))
+    # one round trip for the user and one for the collection version
+    assert stats.ops == 2
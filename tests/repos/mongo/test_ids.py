@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from usersvc.entities import RolesRepo, User
+from usersvc.repos.mongo import (
+    HiLoIdAllocator,
+    UlidIdAllocator,
+    UsersRepoMongo
+)
+
+
+def test_hilo_allocates_sequential_ids(mongo):
+    mongo.auth.drop_collection('counters')
+    ids = HiLoIdAllocator(mongo, 'test', block_size=10, min_id=100)
+
+    assert [ids.next_id() for _ in range(3)] == [100, 101, 102]
+
+
+def test_hilo_reserves_one_block_per_update(mongo):
+    mongo.auth.drop_collection('counters')
+    ids = HiLoIdAllocator(mongo, 'test', block_size=10, min_id=0)
+
+    [ids.next_id() for _ in range(25)]
+    counter = mongo.auth.counters.find_one({'_id': 'test'})
+    assert counter['next'] == 30
+
+
+def test_hilo_allocators_do_not_overlap(mongo):
+    mongo.auth.drop_collection('counters')
+    first = HiLoIdAllocator(mongo, 'test', block_size=10)
+    second = HiLoIdAllocator(mongo, 'test', block_size=5)
+
+    allocated = []
+    for _ in range(30):
+        allocated.append(first.next_id())
+        allocated.append(second.next_id())
+
+    assert len(set(allocated)) == len(allocated)
+
+
+def test_hilo_skips_legacy_ids(mongo):
+    mongo.auth.drop_collection('counters')
+    ids = HiLoIdAllocator(mongo, 'test')
+    assert ids.next_id() > 100000
+
+
+def test_ulid_allocator():
+    ids = UlidIdAllocator()
+    first = ids.next_id()
+    second = ids.next_id()
+
+    assert isinstance(first, str)
+    assert len(first) == 26
+    assert first != second
+
+
+def test_parse_id(mongo):
+    ids = HiLoIdAllocator(mongo, 'test')
+    assert ids.parse_id('12') == 12
+    with pytest.raises(ValueError):
+        ids.parse_id('abc')
+
+    ids = UlidIdAllocator()
+    uid = ids.next_id()
+    assert ids.parse_id(uid.lower()) == uid
+    for value in ['12', 12]:
+        with pytest.raises(ValueError):
+            ids.parse_id(value)
+
+
+def test_create_users_concurrently(mongo):
+    mongo.auth.drop_collection('users')
+    mongo.auth.drop_collection('counters')
+    ids = HiLoIdAllocator(mongo, 'users', block_size=16)
+    users_repo = UsersRepoMongo(mongo, RolesRepo(), ids)
+
+    def create_user(num):
+        return users_repo.create_user(User(
+            username='user{}'.format(num),
+            password='pass',
+            fullname='User',
+            email='user{}@company.com'.format(num),
+            roles=[],
+        ))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        inserted_ids = list(executor.map(create_user, range(500)))
+
+    assert len(set(inserted_ids)) == 500
+    assert mongo.auth.users.count() == 500
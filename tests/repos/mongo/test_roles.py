@@ -1,13 +1,12 @@
-from unittest.mock import patch
-
 import pytest
 
+from usersvc.entities import Generations
 from usersvc.entities.role import Role
 from usersvc.repos.mongo.roles import RolesRepoMongo
 
 
 @pytest.fixture
-def roles_repo(mongo):
+def roles_repo(mongo, ids):
     mongo.auth.drop_collection('roles')
     mongo.auth.roles.insert_one({
         '_id': 0,
@@ -19,7 +18,7 @@ def roles_repo(mongo):
         'name': 'shopping.admin',
         'permissions': ['shopping.list:edit'],
     })
-    return RolesRepoMongo(mongo)
+    return RolesRepoMongo(mongo, ids)
 
 
 def test_get_role_by_id(roles_repo):
@@ -52,6 +51,25 @@ def test_get_role_by_name_not_found(roles_repo):
     assert role is None
 
 
+def test_get_roles_by_ids(roles_repo):
+    roles = roles_repo.get_roles_by_ids([1, 1000])
+    assert len(roles) == 1
+    assert roles[0].id == 1
+    assert roles[0].name == 'shopping.admin'
+
+
+def test_get_roles_by_ids_empty(roles_repo):
+    roles = roles_repo.get_roles_by_ids([])
+    assert roles == []
+
+
+def test_get_roles_by_names(roles_repo):
+    roles = roles_repo.get_roles_by_names(['users.admin', 'invalid.name'])
+    assert len(roles) == 1
+    assert roles[0].id == 0
+    assert roles[0].name == 'users.admin'
+
+
 def test_get_all_roles(roles_repo):
     roles = roles_repo.get_all_roles()
     assert len(roles) == 2
@@ -61,10 +79,7 @@ def test_get_all_roles(roles_repo):
     assert roles[1].name == 'shopping.admin'
 
 
-@patch('usersvc.repos.mongo.roles.randint')
-def test_create_role(randint_mock, roles_repo, mongo):
-    randint_mock.return_value = 2
-
+def test_create_role(roles_repo, mongo):
     inserted_id = roles_repo.create_role(Role(
         name='test.role',
         permissions=['test.permission'],
@@ -79,6 +94,12 @@ def test_create_role(randint_mock, roles_repo, mongo):
     }
 
 
+def test_ensure_indexes(roles_repo, mongo):
+    roles_repo.ensure_indexes()
+    indexes = mongo.auth.roles.index_information()
+    assert indexes['name_1']['unique'] is True
+
+
 def test_update_role(roles_repo, mongo):
     resp = roles_repo.update_role(Role(
         id=0,
@@ -129,3 +150,29 @@ def test_delete_role_not_found(roles_repo, mongo):
 
     result = mongo.auth.roles.count()
     assert result == 2
+
+
+def test_role_writes_bump_generation(roles_repo, mongo, ids):
+    gens = Generations()
+    roles_repo = RolesRepoMongo(mongo, ids, gens)
+    role = roles_repo.get_role_by_id(0)
+
+    roles_repo.update_role(role.replace(permissions=['users:view']))
+    assert gens.roles == 1
+
+    roles_repo.delete_role(role)
+    assert gens.roles == 2
+
+
+def test_role_writes_bump_version(roles_repo, mongo):
+    mongo.auth.drop_collection('counters')
+    role = roles_repo.get_role_by_id(0)
+
+    roles_repo.update_role(role.replace(name='updated.role'))
+    roles_repo.delete_role(role)
+    assert mongo.auth.counters.find_one({'_id': 'roles'})['version'] == 2
+
+    # nothing matched, nothing to bump
+    assert not roles_repo.update_role(role)
+    assert not roles_repo.delete_role(role)
+    assert mongo.auth.counters.find_one({'_id': 'roles'})['version'] == 2
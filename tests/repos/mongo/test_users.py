@@ -1,11 +1,19 @@
 from typing import List
-from unittest.mock import patch
 
 import pytest
 
+from usersvc.entities import DuplicatedUser, Generations
 from usersvc.entities.role import Role, RolesRepo
 from usersvc.entities.user import User
+from usersvc.repos.cache import CachedRolesRepo
+from usersvc.repos.mongo import HiLoIdAllocator, RolesRepoMongo
 from usersvc.repos.mongo.users import UsersRepoMongo
+from usersvc.use_cases.user import (
+    GetUserByIdRequest,
+    UpdateUserRequest,
+    UserUseCases
+)
+from utils.querystats import count_queries
 
 USERS_ADMIN_ROLE = Role(
     id=0,
@@ -25,6 +33,16 @@ SHOPPING_USER_ROLE = Role(
 
 
 class RolesRepoStub(RolesRepo):
+    def __init__(self):
+        self.calls = []
+
+    def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        self.calls.append(sorted(uids))
+        return [
+            role for role in self.get_all_roles()
+            if role.id in uids
+        ]
+
     def get_all_roles(self) -> List[Role]:
         return [
             USERS_ADMIN_ROLE,
@@ -39,7 +57,7 @@ def roles_repo_stub():
 
 
 @pytest.fixture
-def users_repo(mongo, roles_repo_stub):
+def users_repo(mongo, roles_repo_stub, ids):
     mongo.auth.drop_collection('users')
     mongo.auth.users.insert_one({
         '_id': 0,
@@ -57,7 +75,7 @@ def users_repo(mongo, roles_repo_stub):
         'email': 'user01@company.com',
         'roles': [2],
     })
-    return UsersRepoMongo(mongo, roles_repo_stub)
+    return UsersRepoMongo(mongo, roles_repo_stub, ids)
 
 
 def test_get_user_by_id(users_repo):
@@ -103,12 +121,56 @@ def test_get_all_users(users_repo):
     assert users[0].username == 'admin01'
     assert users[1].id == 1
     assert users[1].username == 'user01'
+    assert users[1].roles == [SHOPPING_USER_ROLE]
+
+
+def test_get_users_by_ids(users_repo, roles_repo_stub):
+    users = users_repo.get_users_by_ids([1, 0, 1000])
+    assert sorted(user.id for user in users) == [0, 1]
+    assert roles_repo_stub.calls == [[0, 1, 2]]
+
+    assert users_repo.get_users_by_ids([]) == []
+
+
+def test_get_users_page(users_repo):
+    users = users_repo.get_users_page(1)
+    assert [user.id for user in users] == [0]
+
+    users = users_repo.get_users_page(1, after=0)
+    assert [user.id for user in users] == [1]
+    assert users[0].roles == [SHOPPING_USER_ROLE]
+
+    users = users_repo.get_users_page(1, after=1)
+    assert users == []
+
+
+def test_iter_all_users(users_repo, mongo):
+    for uid in range(2, 7):
+        mongo.auth.users.insert_one({
+            '_id': uid,
+            'username': 'user{:02}'.format(uid),
+            'password': '',
+            'fullname': '',
+            'email': '',
+            'roles': [],
+        })
+
+    users = users_repo.iter_all_users(batch_size=3)
+    assert not isinstance(users, list)
+    assert [user.id for user in users] == list(range(7))
+
+
+def test_get_user_fetches_only_user_roles(users_repo, roles_repo_stub):
+    users_repo.get_user_by_id(1)
+    assert roles_repo_stub.calls == [[2]]
 
 
-@patch('usersvc.repos.mongo.users.randint')
-def test_create_user(randint_mock, users_repo, mongo):
-    randint_mock.return_value = 2
+def test_get_all_users_fetches_roles_once(users_repo, roles_repo_stub):
+    users_repo.get_all_users()
+    assert roles_repo_stub.calls == [[0, 1, 2]]
 
+
+def test_create_user(users_repo, mongo):
     inserted_id = users_repo.create_user(User(
         username='test_user',
         password='test123',
@@ -126,9 +188,44 @@ def test_create_user(randint_mock, users_repo, mongo):
         'fullname': 'Test',
         'email': 'test@company.com',
         'roles': [0],
+        'version': 1,
     }
 
 
+def test_ensure_indexes(users_repo, mongo):
+    users_repo.ensure_indexes()
+    indexes = mongo.auth.users.index_information()
+    assert indexes['username_1']['unique'] is True
+    assert indexes['email_1']['unique'] is True
+
+
+def test_create_user_duplicated(users_repo, mongo):
+    users_repo.ensure_indexes()
+    inserted_id = users_repo.create_user(User(
+        username='admin01',
+        password='test123',
+        fullname='Test',
+        email='test@company.com',
+        roles=[],
+    ))
+    assert inserted_id is None
+
+    result = mongo.auth.users.count()
+    assert result == 2
+
+
+def test_create_and_get_user_duplicated_email(users_repo):
+    users_repo.ensure_indexes()
+    user = users_repo.create_and_get_user(User(
+        username='test_user',
+        password='test123',
+        fullname='Test',
+        email='admin01@company.com',
+        roles=[],
+    ))
+    assert user is None
+
+
 def test_update_user(users_repo, mongo):
     resp = users_repo.update_user(User(
         id=0,
@@ -148,9 +245,22 @@ def test_update_user(users_repo, mongo):
         'fullname': 'Updated',
         'email': 'updated@company.com',
         'roles': [2],
+        'version': 1,
     }
 
 
+def test_update_user_duplicated_email(users_repo, mongo):
+    users_repo.ensure_indexes()
+    user = users_repo.get_user_by_id(1).replace(email='admin01@company.com')
+    with pytest.raises(DuplicatedUser):
+        users_repo.update_user(user)
+    with pytest.raises(DuplicatedUser):
+        users_repo.update_and_get_user(user)
+
+    assert mongo.auth.users.find_one({'_id': 1})['email'] == \
+        'user01@company.com'
+
+
 def test_update_user_not_found(users_repo):
     resp = users_repo.update_user(User(
         id=1000,
@@ -195,3 +305,256 @@ def test_delete_user_not_found(users_repo, mongo):
 
     result = mongo.auth.users.count()
     assert result == 2
+
+
+def test_create_and_get_user(users_repo, mongo):
+    user = users_repo.create_and_get_user(User(
+        username='test_user',
+        password='test123',
+        fullname='Test',
+        email='test@company.com',
+        roles=[USERS_ADMIN_ROLE],
+    ))
+    assert user.id == 2
+    assert user.username == 'test_user'
+    assert user.roles == [USERS_ADMIN_ROLE]
+
+    result = mongo.auth.users.find_one({'_id': 2})
+    assert result['username'] == 'test_user'
+    assert result['roles'] == [0]
+
+
+def test_update_and_get_user(users_repo, roles_repo_stub, mongo):
+    user = users_repo.update_and_get_user(User(
+        id=0,
+        username=None,
+        password='',
+        fullname='Updated',
+        email='updated@company.com',
+        roles=[SHOPPING_USER_ROLE],
+    ))
+    assert user.id == 0
+    assert user.username == 'admin01'
+    assert user.password == 'admin123'
+    assert user.fullname == 'Updated'
+    assert user.roles == [SHOPPING_USER_ROLE]
+    assert roles_repo_stub.calls == []
+
+    result = mongo.auth.users.find_one({'_id': 0})
+    assert result == {
+        '_id': 0,
+        'username': 'admin01',
+        'password': 'admin123',
+        'fullname': 'Updated',
+        'email': 'updated@company.com',
+        'roles': [2],
+        'version': 1,
+    }
+
+
+def test_update_and_get_user_not_found(users_repo):
+    user = users_repo.update_and_get_user(User(
+        id=1000,
+        username=None,
+        password='',
+        fullname='',
+        email='',
+        roles=[],
+    ))
+    assert user is None
+
+
+def test_delete_and_get_user(users_repo, mongo):
+    user = users_repo.delete_and_get_user(0)
+    assert user.id == 0
+    assert user.username == 'admin01'
+    assert user.roles == [USERS_ADMIN_ROLE, SHOPPING_ADMIN_ROLE]
+
+    result = mongo.auth.users.find_one({'_id': 0})
+    assert result is None
+
+
+def test_delete_and_get_user_not_found(users_repo, mongo):
+    user = users_repo.delete_and_get_user(1000)
+    assert user is None
+
+    result = mongo.auth.users.count()
+    assert result == 2
+
+
+def test_user_writes_bump_generation(users_repo, roles_repo_stub, mongo, ids):
+    gens = Generations(stripes=8)
+    users_repo = UsersRepoMongo(mongo, roles_repo_stub, ids, gens)
+    user = users_repo.get_user_by_id(0)
+
+    users_repo.update_and_get_user(user.replace(fullname='Updated'))
+    assert gens.stamp(0) == (0, 1)
+    assert gens.stamp(1) == (0, 0)
+
+    users_repo.delete_and_get_user(0)
+    assert gens.stamp(0) == (0, 2)
+
+
+def test_user_writes_bump_versions(users_repo, mongo):
+    mongo.auth.drop_collection('counters')
+    assert users_repo.get_users_version() == '0.0'
+
+    user = users_repo.get_user_by_id(0)
+    assert user.version == 0
+
+    user = users_repo.update_and_get_user(user.replace(fullname='Updated'))
+    assert user.version == 1
+    assert users_repo.get_users_version() == '1.0'
+
+    user = users_repo.create_and_get_user(user.replace(
+        username='test_user',
+        email='test@company.com',
+    ))
+    assert user.version == 1
+    assert users_repo.get_user_by_id(user.id).version == 1
+
+    users_repo.delete_and_get_user(user.id)
+    mongo.auth.counters.insert_one({'_id': 'roles', 'version': 5})
+    assert users_repo.get_users_version() == '3.5'
+
+    # nothing matched, nothing to bump
+    assert users_repo.update_and_get_user(user) is None
+    assert users_repo.delete_and_get_user(user.id) is None
+    assert not users_repo.update_user(user)
+    assert not users_repo.delete_user(user)
+    assert users_repo.get_users_version() == '3.5'
+
+
+def test_users_version_reloads_cached_roles(users_repo, mongo, ids):
+    mongo.auth.drop_collection('counters')
+    mongo.auth.drop_collection('roles')
+    mongo.auth.roles.insert_one({
+        '_id': 0,
+        'name': 'users.admin',
+        'permissions': ['users:edit', 'users:view'],
+    })
+    users_repo.roles_repo = CachedRolesRepo(RolesRepoMongo(mongo, ids))
+    users_repo.get_users_version()
+    assert users_repo.get_user_by_id(0).roles[0].name == 'users.admin'
+
+    # renamed by another process, this one keeps the table until the
+    # version is read again
+    other = RolesRepoMongo(mongo, ids)
+    other.update_role(other.get_role_by_id(0).replace(name='users.root'))
+    assert users_repo.get_user_by_id(0).roles[0].name == 'users.admin'
+
+    assert users_repo.get_users_version() == '0.1'
+    assert users_repo.get_user_by_id(0).roles[0].name == 'users.root'
+
+
+def test_reads_query_budget(users_repo):
+    with count_queries() as stats:
+        users_repo.get_user_by_id(0)
+    assert stats.ops == 1
+    assert stats.docs == 1
+    assert stats.bytes > 0
+
+    with count_queries() as stats:
+        users_repo.get_users_page(10)
+    assert (stats.ops, stats.docs) == (1, 2)
+
+    with count_queries() as stats:
+        users_repo.get_users_version()
+    assert stats.ops == 1
+
+
+def test_writes_query_budget(users_repo, roles_repo_stub, mongo):
+    users_repo.ids = HiLoIdAllocator(mongo, 'users', block_size=10)
+    user = users_repo.get_user_by_id(1)
+    with count_queries() as stats:
+        user = users_repo.create_and_get_user(user.replace(
+            username='test_user',
+            email='test@company.com',
+        ))
+    # reserving the first block of ids, then the insert and the version
+    assert stats.ops == 3
+
+    # one round trip for the user and one for the collection version
+    with count_queries() as stats:
+        users_repo.create_and_get_user(user.replace(
+            username='test_user2',
+            email='test2@company.com',
+        ))
+    assert stats.ops == 2
+
+    with count_queries() as stats:
+        users_repo.update_and_get_user(user.replace(fullname='Updated'))
+    assert (stats.ops, stats.docs) == (2, 1)
+
+    with count_queries() as stats:
+        users_repo.delete_and_get_user(user.id)
+    assert (stats.ops, stats.docs) == (2, 1)
+
+    # misses leave the collection version alone
+    with count_queries() as stats:
+        users_repo.update_and_get_user(user)
+        users_repo.delete_and_get_user(user.id)
+    assert stats.ops == 2
+
+
+def test_get_user_query_budget_with_roles_repo(mongo, ids):
+    mongo.auth.drop_collection('roles')
+    mongo.auth.roles.insert_one({
+        '_id': 0,
+        'name': 'users.admin',
+        'permissions': ['users:edit', 'users:view'],
+    })
+    mongo.auth.users.insert_one({
+        '_id': 2,
+        'username': 'admin02',
+        'password': 'admin123',
+        'fullname': 'Admin',
+        'email': 'admin02@company.com',
+        'roles': [0],
+    })
+    users_repo = UsersRepoMongo(mongo, RolesRepoMongo(mongo), ids)
+    with count_queries() as stats:
+        user = users_repo.get_user_by_id(2)
+    assert user.roles[0].name == 'users.admin'
+    # the user, then its roles
+    assert (stats.ops, stats.docs) == (2, 2)
+
+
+def test_use_cases_query_budget(users_repo, mongo, ids):
+    mongo.auth.drop_collection('roles')
+    mongo.auth.roles.insert_one({
+        '_id': 0,
+        'name': 'users.admin',
+        'permissions': ['users:edit', 'users:view'],
+    })
+    roles_repo = CachedRolesRepo(RolesRepoMongo(mongo, ids))
+    users_repo.roles_repo = roles_repo
+    users_ucs = UserUseCases(users_repo, roles_repo)
+
+    # the user, then the roles table on its first use
+    with count_queries() as stats:
+        users_ucs.get_user_by_id(GetUserByIdRequest(id=0))
+    assert stats.ops == 2
+
+    with count_queries() as stats:
+        users_ucs.get_user_by_id(GetUserByIdRequest(id=0))
+    assert stats.ops == 1
+
+    req = UpdateUserRequest(
+        id=0,
+        fullname='Updated',
+        email='admin01@company.com',
+        password='',
+        roles=['users.admin'],
+    )
+    # the update, then the collection version
+    with count_queries() as stats:
+        user = users_ucs.update_user(req)
+    assert user.fullname == 'Updated'
+    assert stats.ops == 2
+
+    # unknown users are a single round trip
+    req.id = 1000
+    with count_queries() as stats:
+        assert users_ucs.update_user(req) is None
+    assert stats.ops == 1
@@ -1,9 +1,10 @@
-from typing import List
+import asyncio
+from typing import Iterator, List
 
 import pytest
 
 from usersvc.entities.role import Role, RolesRepo
-from usersvc.entities.user import User, UsersRepo
+from usersvc.entities.user import DuplicatedUser, User, UsersRepo
 
 
 class UsersRepoStub(UsersRepo):
@@ -26,15 +27,31 @@ class UsersRepoStub(UsersRepo):
 
         return None
 
+    def get_users_by_ids(self, uids: List[int]) -> List[User]:
+        return [self._data[uid] for uid in uids if uid in self._data]
+
     def get_all_users(self) -> List[User]:
         return self._data.values()
 
+    def get_users_page(self, limit: int, after: int = None) -> List[User]:
+        users = sorted(self._data.values(), key=lambda user: user.id)
+        if after is not None:
+            users = [user for user in users if user.id > after]
+
+        return users[:limit]
+
+    def iter_all_users(self, batch_size: int = 1000) -> Iterator[User]:
+        yield from self._data.values()
+
     def create_user(self, user: User) -> int:
-        user.id = self._id_count
+        return self._insert(user).id
+
+    def _insert(self, user: User) -> User:
+        user = user.replace(id=self._id_count)
         self._id_count += 1
         self._data[user.id] = user
 
-        return user.id
+        return user
 
     def update_user(self, user: User) -> User:
         if user.id not in self._data:
@@ -50,6 +67,43 @@ class UsersRepoStub(UsersRepo):
         del self._data[user.id]
         return True
 
+    def create_and_get_user(self, user: User) -> User:
+        if self.get_user_by_name(user.username):
+            return None
+
+        return self._insert(user)
+
+    def update_and_get_user(self, user: User) -> User:
+        current = self._data.get(user.id)
+        if current is None:
+            return None
+        for other in self._data.values():
+            if other.id != user.id and other.email == user.email:
+                raise DuplicatedUser(user.id)
+
+        changes = {
+            'fullname': user.fullname,
+            'email': user.email,
+            'roles': user.roles,
+        }
+        if user.username is not None:
+            changes['username'] = user.username
+        if user.password:
+            changes['password'] = user.password
+
+        self._data[user.id] = current.replace(**changes)
+        return self._data[user.id]
+
+    def delete_and_get_user(self, uid: int) -> User:
+        return self._data.pop(uid, None)
+
+    def update_user_password(self, uid: int, password: str) -> bool:
+        if uid not in self._data:
+            return False
+
+        self._data[uid] = self._data[uid].replace(password=password)
+        return True
+
 
 class RolesRepoStub(RolesRepo):
     def __init__(self):
@@ -71,11 +125,20 @@ class RolesRepoStub(RolesRepo):
 
         return None
 
+    def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        return [self._data[uid] for uid in uids if uid in self._data]
+
+    def get_roles_by_names(self, names: List[str]) -> List[Role]:
+        return [
+            item for item in self._data.values()
+            if item.name in names
+        ]
+
     def get_all_roles(self) -> List[Role]:
         return self._data.values()
 
     def create_role(self, role: Role) -> int:
-        role.id = self._id_count
+        role = role.replace(id=self._id_count)
         self._id_count += 1
         self._data[role.id] = role
 
@@ -96,6 +159,25 @@ class RolesRepoStub(RolesRepo):
         return True
 
 
+class AsyncRepoStub:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def __getattr__(self, name):
+        method = getattr(self.repo, name)
+
+        async def wrapper(*args, **kwargs):
+            await asyncio.sleep(0)
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    async def iter_all_users(self, batch_size: int = 1000):
+        for user in self.repo.iter_all_users(batch_size):
+            await asyncio.sleep(0)
+            yield user
+
+
 @pytest.fixture
 def roles_repo():
     repo = RolesRepoStub()
@@ -144,3 +226,13 @@ def users_repo(roles_repo):
     repo.create_user(admin_user)
     repo.create_user(common_user)
     return repo
+
+
+@pytest.fixture
+def aio_roles_repo(roles_repo):
+    return AsyncRepoStub(roles_repo)
+
+
+@pytest.fixture
+def aio_users_repo(users_repo):
+    return AsyncRepoStub(users_repo)
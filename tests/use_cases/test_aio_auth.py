@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from usersvc.use_cases.aio_auth import AsyncAuthUseCases
+from usersvc.use_cases.auth import (
+    UserHasPermissionRequest,
+    UserLoginRequest,
+    UsersHavePermissionsRequest
+)
+from usersvc.use_cases.password import PasswordHasher
+
+
+@pytest.fixture
+def auth_ucs(aio_users_repo):
+    return AsyncAuthUseCases(aio_users_repo)
+
+
+def test_login(auth_ucs, run):
+    req = UserLoginRequest(
+        username='admin01',
+        password='admin123',
+    )
+    token = run(auth_ucs.user_login(req))
+    assert token.owner == 'admin01'
+
+
+def test_login_wrong_password(auth_ucs, run):
+    req = UserLoginRequest(
+        username='admin01',
+        password='wrong_pass',
+    )
+    token = run(auth_ucs.user_login(req))
+    assert token is None
+
+
+def test_concurrent_logins(auth_ucs, run):
+    reqs = [
+        UserLoginRequest(username='admin01', password='admin123'),
+        UserLoginRequest(username='user01', password='user123'),
+        UserLoginRequest(username='user01', password='wrong_pass'),
+    ] * 100
+
+    async def login_all():
+        return await asyncio.gather(*[
+            auth_ucs.user_login(req) for req in reqs
+        ])
+
+    tokens = run(login_all())
+
+    owners = [token.owner if token else None for token in tokens]
+    assert owners == ['admin01', 'user01', None] * 100
+
+
+def test_user_has_permission(auth_ucs, run):
+    req = UserHasPermissionRequest(
+        user_id=0,
+        permission='users:edit',
+    )
+    assert run(auth_ucs.user_has_permission(req)) is True
+
+
+def test_user_has_permission_not_found(auth_ucs, run):
+    req = UserHasPermissionRequest(
+        user_id=1000,
+        permission='users:edit',
+    )
+    assert run(auth_ucs.user_has_permission(req)) is False
+
+
+def test_login_rehashes_legacy_password(aio_users_repo, users_repo, run):
+    hasher = PasswordHasher(params={'n': 2 ** 4, 'r': 8, 'p': 1}, workers=0)
+    auth_ucs = AsyncAuthUseCases(aio_users_repo, hasher=hasher)
+    req = UserLoginRequest(
+        username='admin01',
+        password='admin123',
+    )
+    assert run(auth_ucs.user_login(req)).owner == 'admin01'
+
+    password = users_repo.get_user_by_id(0).password
+    assert hasher.needs_rehash(password) is False
+    assert run(auth_ucs.user_login(req)).owner == 'admin01'
+
+
+def test_login_unknown_user_verifies_dummy_hash(aio_users_repo, run):
+    hasher = PasswordHasher(params={'n': 2 ** 4, 'r': 8, 'p': 1}, workers=0)
+    verified = []
+    submit_verify = hasher.submit_verify
+    hasher.submit_verify = lambda password, encoded: \
+        verified.append(encoded) or submit_verify(password, encoded)
+    auth_ucs = AsyncAuthUseCases(aio_users_repo, hasher=hasher)
+
+    token = run(auth_ucs.user_login(UserLoginRequest(
+        username='wrong_user',
+        password='admin123',
+    )))
+    assert token is None
+    assert verified == [hasher.dummy_hash()]
+
+
+def test_users_have_permissions(auth_ucs, run):
+    resp = run(auth_ucs.users_have_permissions(UsersHavePermissionsRequest(
+        checks=[
+            UserHasPermissionRequest(user_id=0, permission='users:edit'),
+            UserHasPermissionRequest(user_id=1, permission='users:edit'),
+            UserHasPermissionRequest(user_id=1000, permission='users:edit'),
+        ],
+    )))
+    assert resp == [True, False, False]
@@ -0,0 +1,104 @@
+import pytest
+
+from usersvc.use_cases.aio_user import AsyncUserUseCases
+from usersvc.use_cases.user import (
+    CreateUserRequest,
+    DeleteUserRequest,
+    GetUserByIdRequest,
+    ListUsersRequest,
+    UpdateUserRequest
+)
+
+
+@pytest.fixture
+def users_ucs(aio_users_repo, aio_roles_repo):
+    return AsyncUserUseCases(aio_users_repo, aio_roles_repo)
+
+
+def test_list_users(users_ucs, run):
+    page = run(users_ucs.list_users(ListUsersRequest(limit=1)))
+    assert [user.username for user in page.users] == ['admin01']
+    assert page.next == 0
+
+
+def test_iter_all_users(users_ucs, run):
+    async def collect():
+        return [user.username async for user in users_ucs.iter_all_users()]
+
+    assert run(collect()) == ['admin01', 'user01']
+
+
+def test_get_user_by_id(users_ucs, run):
+    user = run(users_ucs.get_user_by_id(GetUserByIdRequest(id=1)))
+    assert user.username == 'user01'
+
+
+def test_create_user(users_ucs, run):
+    req = CreateUserRequest(
+        username='newuser01',
+        fullname='New User',
+        email='newuser@company.com',
+        password='newuser123',
+        roles=['users.admin', 'shopping.user'],
+    )
+    user = run(users_ucs.create_user(req))
+    assert user.username == req.username
+    assert [role.name for role in user.roles] == req.roles
+
+
+def test_create_user_invalid_role(users_ucs, run):
+    req = CreateUserRequest(
+        username='newuser01',
+        fullname='New User',
+        email='newuser@company.com',
+        password='newuser123',
+        roles=['users.admin', 'invalid.role'],
+    )
+    resp = run(users_ucs.create_user(req))
+    assert resp == 'invalid role: invalid.role'
+
+
+def test_update_user(users_ucs, run):
+    req = UpdateUserRequest(
+        id=0,
+        fullname='Updated User',
+        email='updated@company.com',
+        password='',
+        roles=['shopping.user'],
+    )
+    user = run(users_ucs.update_user(req))
+    assert user.username == 'admin01'
+    assert user.fullname == req.fullname
+    assert user.password == 'admin123'
+    assert [role.name for role in user.roles] == req.roles
+
+
+def test_update_user_duplicated_email(users_ucs, run):
+    req = UpdateUserRequest(
+        id=0,
+        fullname='Updated User',
+        email='user01@company.com',
+        password='',
+        roles=['users.admin'],
+    )
+    assert run(users_ucs.update_user(req)) == 'duplicated data'
+
+
+def test_update_user_not_found(users_ucs, run):
+    req = UpdateUserRequest(
+        id=1000,
+        fullname='Updated User',
+        email='updated@company.com',
+        password='updateduser123',
+        roles=['users.admin', 'invalid.role'],
+    )
+    resp = run(users_ucs.update_user(req))
+    assert resp is None
+
+
+def test_delete_user(users_ucs, aio_users_repo, run):
+    user = run(users_ucs.delete_user(DeleteUserRequest(id=0)))
+    assert user.username == 'admin01'
+
+    resp = run(aio_users_repo.get_user_by_id(0))
+    assert resp is None
@@ -1,10 +1,16 @@
 import pytest
 
+from usersvc.entities import Generations
 from usersvc.use_cases.auth import (
     AuthUseCases,
     UserHasPermissionRequest,
-    UserLoginRequest
+    UserLoginRequest,
+    UsersHavePermissionsRequest,
+    VerifyTokenRequest
 )
+from usersvc.use_cases.decisions import PermissionDecisions
+from usersvc.use_cases.password import PasswordHasher
+from utils.token import TokenSigner
 
 
 @pytest.fixture
@@ -64,3 +70,226 @@ def test_user_has_permission_not_found(auth_ucs):
     )
     resp = auth_ucs.user_has_permission(req)
     assert resp is False
+
+
+@pytest.fixture
+def signer():
+    return TokenSigner(b'secret')
+
+
+@pytest.fixture
+def signed_auth_ucs(users_repo, signer):
+    return AuthUseCases(users_repo, signer, token_ttl=60, clock=lambda: 1000)
+
+
+def login(auth_ucs):
+    return auth_ucs.user_login(UserLoginRequest(
+        username='admin01',
+        password='admin123',
+    ))
+
+
+def test_login_signed_token(signed_auth_ucs, signer):
+    token = login(signed_auth_ucs)
+    assert token.expires_at == 1060
+    assert signer.verify(token.token) == {
+        'v': 1,
+        'sub': 'admin01',
+        'exp': 1060,
+        'perms': ['shopping.list:edit', 'users:edit', 'users:view'],
+    }
+
+
+def test_verify_token(signed_auth_ucs):
+    token = login(signed_auth_ucs)
+    resp = signed_auth_ucs.verify_token(VerifyTokenRequest(
+        token=token.token,
+        permission='users:edit',
+    ))
+    assert resp == token
+
+
+def test_verify_token_missing_permission(signed_auth_ucs):
+    token = login(signed_auth_ucs)
+    resp = signed_auth_ucs.verify_token(VerifyTokenRequest(
+        token=token.token,
+        permission='another.module:edit',
+    ))
+    assert resp is None
+
+
+def test_verify_token_expired(signed_auth_ucs):
+    token = login(signed_auth_ucs)
+    signed_auth_ucs.clock = lambda: 1060
+    resp = signed_auth_ucs.verify_token(VerifyTokenRequest(token=token.token))
+    assert resp is None
+
+
+def test_verify_token_tampered(signed_auth_ucs, signer):
+    token = login(signed_auth_ucs)
+    payload = signer.verify(token.token)
+    payload['perms'].append('another.module:edit')
+    body = TokenSigner(b'other').sign(payload).split('.')[0]
+    signature = token.token.split('.')[1]
+
+    resp = signed_auth_ucs.verify_token(VerifyTokenRequest(
+        token=body + '.' + signature,
+    ))
+    assert resp is None
+
+
+def test_verify_token_malformed(signed_auth_ucs):
+    for token in ['', 'abc', 'abc.!!!', '.abc']:
+        resp = signed_auth_ucs.verify_token(VerifyTokenRequest(token=token))
+        assert resp is None
+
+
+def test_verify_token_rotated_key(users_repo, signer):
+    old_ucs = AuthUseCases(users_repo, signer, clock=lambda: 1000)
+    token = login(old_ucs)
+
+    new_ucs = AuthUseCases(
+        users_repo,
+        TokenSigner(b'new_secret', old_keys=[b'secret']),
+        clock=lambda: 1000,
+    )
+    resp = new_ucs.verify_token(VerifyTokenRequest(token=token.token))
+    assert resp.owner == 'admin01'
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(params={'n': 2 ** 4, 'r': 8, 'p': 1}, workers=0)
+
+
+def test_login_rehashes_legacy_password(users_repo, hasher):
+    auth_ucs = AuthUseCases(users_repo, hasher=hasher)
+    assert login(auth_ucs).owner == 'admin01'
+
+    password = users_repo.get_user_by_id(0).password
+    assert password.startswith('scrypt$')
+    assert hasher.needs_rehash(password) is False
+
+    assert login(auth_ucs).owner == 'admin01'
+    assert users_repo.get_user_by_id(0).password == password
+
+
+def test_login_rehashes_on_cost_change(users_repo, hasher):
+    login(AuthUseCases(users_repo, hasher=hasher))
+    password = users_repo.get_user_by_id(0).password
+
+    stronger = PasswordHasher(params={'n': 2 ** 5, 'r': 8, 'p': 1}, workers=0)
+    assert login(AuthUseCases(users_repo, hasher=stronger)).owner == 'admin01'
+    assert users_repo.get_user_by_id(0).password.startswith('scrypt$32,8,1$')
+    assert users_repo.get_user_by_id(0).password != password
+
+
+def test_login_hashed_wrong_password(users_repo, hasher):
+    auth_ucs = AuthUseCases(users_repo, hasher=hasher)
+    login(auth_ucs)
+    password = users_repo.get_user_by_id(0).password
+
+    token = auth_ucs.user_login(UserLoginRequest(
+        username='admin01',
+        password='wrong_pass',
+    ))
+    assert token is None
+    assert users_repo.get_user_by_id(0).password == password
+
+
+def test_login_without_stored_password(users_repo, hasher):
+    user = users_repo.get_user_by_id(0)
+    users_repo.update_user_password(0, None)
+    auth_ucs = AuthUseCases(users_repo, hasher=hasher)
+
+    for password in ['', None]:
+        token = auth_ucs.user_login(UserLoginRequest(
+            username=user.username,
+            password=password,
+        ))
+        assert token is None
+
+    assert users_repo.get_user_by_id(0).password is None
+
+
+def test_login_unknown_user_verifies_dummy_hash(users_repo, hasher):
+    verified = []
+    verify = hasher.verify
+    hasher.verify = lambda password, encoded: \
+        verified.append(encoded) or verify(password, encoded)
+    auth_ucs = AuthUseCases(users_repo, hasher=hasher)
+
+    token = auth_ucs.user_login(UserLoginRequest(
+        username='wrong_user',
+        password='admin123',
+    ))
+    assert token is None
+    assert verified == [hasher.dummy_hash()]
+    assert hasher.needs_rehash(verified[0]) is False
+
+
+def test_users_have_permissions(auth_ucs, users_repo):
+    calls = []
+    get_users_by_ids = users_repo.get_users_by_ids
+
+    def get_users_by_ids_spy(uids):
+        calls.append(uids)
+        return get_users_by_ids(uids)
+
+    users_repo.get_users_by_ids = get_users_by_ids_spy
+    resp = auth_ucs.users_have_permissions(UsersHavePermissionsRequest(checks=[
+        UserHasPermissionRequest(user_id=0, permission='users:edit'),
+        UserHasPermissionRequest(user_id=1, permission='users:edit'),
+        UserHasPermissionRequest(user_id=1, permission='shopping.list:view'),
+        UserHasPermissionRequest(user_id=0, permission='another.module:edit'),
+        UserHasPermissionRequest(user_id=1000, permission='users:edit'),
+    ]))
+    assert resp == [True, False, True, False, False]
+    assert calls == [[0, 1, 1000]]
+
+
+def test_users_have_permissions_empty(auth_ucs):
+    resp = auth_ucs.users_have_permissions(
+        UsersHavePermissionsRequest(checks=[]),
+    )
+    assert resp == []
+
+
+def test_user_has_permission_cached(users_repo):
+    gens = Generations()
+    decisions = PermissionDecisions(gens=gens)
+    auth_ucs = AuthUseCases(users_repo, decisions=decisions)
+    req = UserHasPermissionRequest(user_id=0, permission='users:edit')
+    assert auth_ucs.user_has_permission(req) is True
+
+    users_repo.get_users_by_ids = None
+    assert auth_ucs.user_has_permission(req) is True
+    assert decisions.stats()['hits'] == 1
+
+
+def test_users_have_permissions_cached(users_repo):
+    gens = Generations()
+    decisions = PermissionDecisions(gens=gens)
+    auth_ucs = AuthUseCases(users_repo, decisions=decisions)
+    auth_ucs.user_has_permission(
+        UserHasPermissionRequest(user_id=0, permission='users:edit'),
+    )
+
+    calls = []
+    get_users_by_ids = users_repo.get_users_by_ids
+
+    def get_users_by_ids_spy(uids):
+        calls.append(uids)
+        return get_users_by_ids(uids)
+
+    users_repo.get_users_by_ids = get_users_by_ids_spy
+    req = UsersHavePermissionsRequest(checks=[
+        UserHasPermissionRequest(user_id=0, permission='users:edit'),
+        UserHasPermissionRequest(user_id=1, permission='users:edit'),
+    ])
+    assert auth_ucs.users_have_permissions(req) == [True, False]
+    assert calls == [[1]]
+
+    gens.bump_user(0)
+    assert auth_ucs.users_have_permissions(req) == [True, False]
+    assert calls == [[1], [0]]
@@ -0,0 +1,95 @@
+import pytest
+
+from usersvc.entities import Generations
+from usersvc.use_cases.decisions import PermissionDecisions
+
+
+class ClockStub:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def gens():
+    return Generations(stripes=8)
+
+
+@pytest.fixture
+def clock():
+    return ClockStub()
+
+
+@pytest.fixture
+def decisions(gens, clock):
+    return PermissionDecisions(max_size=2, ttl=10, gens=gens, clock=clock)
+
+
+def test_get_put(decisions):
+    assert decisions.get(0, 'users:edit') is None
+
+    decisions.put(0, 'users:edit', decisions.stamp(0), True)
+    decisions.put(0, 'users:view', decisions.stamp(0), False)
+    assert decisions.get(0, 'users:edit') is True
+    assert decisions.get(0, 'users:view') is False
+
+
+def test_user_write_invalidates(decisions, gens):
+    decisions.put(0, 'users:edit', decisions.stamp(0), True)
+    decisions.put(1, 'users:edit', decisions.stamp(1), True)
+
+    gens.bump_user(0)
+    assert decisions.get(0, 'users:edit') is None
+    assert decisions.get(1, 'users:edit') is True
+
+
+def test_roles_write_invalidates(decisions, gens):
+    decisions.put(0, 'users:edit', decisions.stamp(0), True)
+    decisions.put(1, 'users:edit', decisions.stamp(1), True)
+
+    gens.bump_roles()
+    assert decisions.get(0, 'users:edit') is None
+    assert decisions.get(1, 'users:edit') is None
+
+
+def test_put_after_write_is_dropped(decisions, gens):
+    stamp = decisions.stamp(0)
+    gens.bump_user(0)
+    decisions.put(0, 'users:edit', stamp, True)
+
+    assert decisions.stats()['size'] == 0
+
+
+def test_expires_after_ttl(decisions, clock):
+    decisions.put(0, 'users:edit', decisions.stamp(0), True)
+    clock.now = 10
+    assert decisions.get(0, 'users:edit') is None
+
+
+def test_evicts_least_recently_used(decisions):
+    decisions.put(0, 'users:edit', decisions.stamp(0), True)
+    decisions.put(1, 'users:edit', decisions.stamp(1), True)
+    decisions.get(0, 'users:edit')
+    decisions.put(2, 'users:edit', decisions.stamp(2), True)
+
+    assert decisions.get(1, 'users:edit') is None
+    assert decisions.get(0, 'users:edit') is True
+    assert decisions.stats()['evictions'] == 1
+
+
+def test_stats(decisions):
+    decisions.get(0, 'users:edit')
+    decisions.put(0, 'users:edit', decisions.stamp(0), True)
+    decisions.get(0, 'users:edit')
+    decisions.get(0, 'users:edit')
+
+    assert decisions.stats() == {
+        'size': 1,
+        'max_size': 2,
+        'hits': 2,
+        'misses': 1,
+        'evictions': 0,
+        'hit_rate': 2 / 3,
+    }
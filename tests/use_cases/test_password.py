@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+from usersvc.use_cases.password import (
+    PBKDF2,
+    SCRYPT,
+    PasswordHasher,
+    PasswordHasherBusy,
+    hash_password,
+    parse_hash,
+    verify_password
+)
+
+FAST_SCRYPT = {'n': 2 ** 4, 'r': 8, 'p': 1}
+FAST_PBKDF2 = {'iterations': 10}
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(params=FAST_SCRYPT, workers=0)
+
+
+def test_hash_password_scrypt():
+    encoded = hash_password(SCRYPT, FAST_SCRYPT, 'admin123')
+    assert encoded.startswith('scrypt$16,8,1$')
+    assert verify_password('admin123', encoded) is True
+    assert verify_password('wrong_pass', encoded) is False
+
+
+def test_hash_password_pbkdf2():
+    encoded = hash_password(PBKDF2, FAST_PBKDF2, 'admin123')
+    assert encoded.startswith('pbkdf2_sha256$10$')
+    assert verify_password('admin123', encoded) is True
+    assert verify_password('wrong_pass', encoded) is False
+
+
+def test_hash_password_salted():
+    first = hash_password(SCRYPT, FAST_SCRYPT, 'admin123')
+    second = hash_password(SCRYPT, FAST_SCRYPT, 'admin123')
+    assert first != second
+
+
+def test_verify_password_legacy_plaintext():
+    assert verify_password('admin123', 'admin123') is True
+    assert verify_password('wrong_pass', 'admin123') is False
+    assert verify_password('admin123', None) is False
+
+
+def test_verify_password_missing():
+    assert verify_password('', None) is False
+    assert verify_password('', '') is False
+    assert verify_password(None, 'admin123') is False
+    encoded = hash_password(PBKDF2, FAST_PBKDF2, 'admin123')
+    assert verify_password(None, encoded) is False
+
+
+def test_parse_hash_invalid():
+    for encoded in ['', 'admin123', 'md5$1$abc$abc', 'scrypt$x$abc$abc']:
+        assert parse_hash(encoded) is None
+
+
+def test_needs_rehash(hasher):
+    assert hasher.needs_rehash('admin123') is True
+    assert hasher.needs_rehash(hasher.hash('admin123')) is False
+
+    stronger = PasswordHasher(params={'n': 2 ** 5, 'r': 8, 'p': 1}, workers=0)
+    assert stronger.needs_rehash(hasher.hash('admin123')) is True
+
+    pbkdf2 = PasswordHasher(PBKDF2, FAST_PBKDF2, workers=0)
+    assert pbkdf2.needs_rehash(hasher.hash('admin123')) is True
+
+
+def test_hasher_busy():
+    hasher = PasswordHasher(params=FAST_SCRYPT, workers=0, max_pending=1)
+    hasher.executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        # hold the only worker so the queued hash stays pending
+        release = Event()
+        hasher.executor.submit(release.wait)
+        future = hasher.submit_hash('admin123')
+        with pytest.raises(PasswordHasherBusy):
+            hasher.submit_hash('user123')
+
+        release.set()
+        assert verify_password('admin123', future.result())
+        assert hasher.verify('admin123', future.result()) is True
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_hasher_process_pool():
+    hasher = PasswordHasher(params=FAST_SCRYPT, workers=1)
+    try:
+        encoded = hasher.hash('admin123')
+        assert hasher.verify('admin123', encoded) is True
+        assert hasher.verify('wrong_pass', encoded) is False
+    finally:
+        hasher.shutdown()
@@ -1,9 +1,11 @@
 import pytest
 
+from usersvc.use_cases.password import PasswordHasher
 from usersvc.use_cases.user import (
     CreateUserRequest,
     DeleteUserRequest,
     GetUserByIdRequest,
+    ListUsersRequest,
     UpdateUserRequest,
     UserUseCases
 )
@@ -23,6 +25,34 @@ def test_get_all_users(users_ucs):
     ]
 
 
+def test_list_users(users_ucs):
+    page = users_ucs.list_users(ListUsersRequest(limit=1))
+    assert [user.username for user in page.users] == ['admin01']
+    assert page.next == 0
+
+    page = users_ucs.list_users(ListUsersRequest(limit=1, after=page.next))
+    assert [user.username for user in page.users] == ['user01']
+    assert page.next == 1
+
+    page = users_ucs.list_users(ListUsersRequest(limit=1, after=page.next))
+    assert page.users == []
+    assert page.next is None
+
+
+def test_list_users_last_page(users_ucs):
+    page = users_ucs.list_users(ListUsersRequest(limit=10))
+    assert len(page.users) == 2
+    assert page.next is None
+
+
+def test_iter_all_users(users_ucs):
+    users_list = [user.username for user in users_ucs.iter_all_users()]
+    assert users_list == [
+        'admin01',
+        'user01',
+    ]
+
+
 def test_get_user_by_id(users_ucs):
     req = GetUserByIdRequest(id=1)
     user = users_ucs.get_user_by_id(req)
@@ -46,6 +76,18 @@ def test_create_user(users_ucs):
     assert roles_names == req.roles
 
 
+def test_create_user_duplicated(users_ucs):
+    req = CreateUserRequest(
+        username='admin01',
+        fullname='New User',
+        email='newuser@company.com',
+        password='newuser123',
+        roles=['users.admin'],
+    )
+    resp = users_ucs.create_user(req)
+    assert resp == 'duplicated data'
+
+
 def test_create_user_invalid_role(users_ucs):
     req = CreateUserRequest(
         username='newuser01',
@@ -91,6 +133,17 @@ def test_update_user_no_password(users_ucs):
     assert user.password == 'admin123'
 
 
+def test_update_user_duplicated_email(users_ucs):
+    req = UpdateUserRequest(
+        id=0,
+        fullname='Updated User',
+        email='user01@company.com',
+        password='',
+        roles=['users.admin'],
+    )
+    assert users_ucs.update_user(req) == 'duplicated data'
+
+
 def test_update_user_not_found(users_ucs):
     req = UpdateUserRequest(
         id=1000,
@@ -129,3 +182,27 @@ def test_delete_user_not_found(users_ucs):
     req = DeleteUserRequest(id=1000)
     user = users_ucs.delete_user(req)
     assert user is None
+
+
+def test_create_user_hashes_password(users_repo, roles_repo):
+    hasher = PasswordHasher(params={'n': 2 ** 4, 'r': 8, 'p': 1}, workers=0)
+    users_ucs = UserUseCases(users_repo, roles_repo, hasher=hasher)
+    req = CreateUserRequest(
+        username='newuser01',
+        fullname='New User',
+        email='newuser@company.com',
+        password='newuser123',
+        roles=['users.admin'],
+    )
+    user = users_ucs.create_user(req)
+    assert user.password.startswith('scrypt$')
+    assert hasher.verify('newuser123', user.password) is True
+
+    req = UpdateUserRequest(
+        id=user.id,
+        fullname='New User',
+        email='newuser@company.com',
+        password='',
+        roles=['users.admin'],
+    )
+    assert users_ucs.update_user(req).password == user.password
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from http import HTTPStatus as http_status
+
+import pytest
+from falcon import testing
+
+from utils.http import Api, Request, json_response, json_stream_response
+from utils.http.backends.asgi import AsgiApp
+from utils.http.backends.falcon import FalconApp
+from utils.http.backends.wsgi import WsgiApp
+
+
+async def items():
+    for uid in range(3):
+        await asyncio.sleep(0)
+        yield {'id': uid}
+
+
+class ItemsApi:
+    api = Api('/items')
+
+    def __init__(self):
+        self.waiting = 0
+        self.all_waiting = None
+
+    @api.get
+    async def list_items(self, _):
+        return json_stream_response('items', items())
+
+    @api.post
+    async def create_item(self, req: Request):
+        # returns only once two requests are handled at the same time
+        self.waiting += 1
+        if self.all_waiting is None:
+            self.all_waiting = asyncio.Event()
+        if self.waiting == 2:
+            self.all_waiting.set()
+
+        await asyncio.wait_for(self.all_waiting.wait(), 1)
+        return json_response(req.json, status=http_status.CREATED)
+
+
+class ItemApi:
+    api = Api('/items/{uid}')
+
+    @api.get
+    def get_item(self, _, uid: str):
+        return json_response({
+            'id': uid,
+            'thread': threading.current_thread().name,
+        })
+
+    @api.put
+    def update_item(self, req: Request, uid: str):
+        return json_response(dict(req.json, id=uid))
+
+    @api.delete
+    async def delete_item(self, _, uid: str):
+        raise RuntimeError(uid)
+
+
+@pytest.fixture
+def app():
+    return AsgiApp(max_workers=2) \
+        .add_api(ItemsApi()) \
+        .add_api(ItemApi()) \
+        .configure()
+
+
+@pytest.fixture
+def client(app):
+    return testing.TestClient(app)
+
+
+def test_sync_handler_offloaded(client):
+    resp = client.simulate_get('/items/10')
+    assert resp.status_code == http_status.OK
+    assert resp.json['id'] == '10'
+    assert resp.json['thread'].startswith('asgi')
+
+
+def test_async_handlers_concurrent(app, run):
+    async def create_items():
+        async with testing.ASGIConductor(app) as conductor:
+            return await asyncio.gather(
+                conductor.simulate_post('/items', json={'id': 1}),
+                conductor.simulate_post('/items', json={'id': 2}),
+            )
+
+    resps = run(create_items())
+    assert [resp.json for resp in resps] == [{'id': 1}, {'id': 2}]
+
+
+def test_async_stream(client):
+    resp = client.simulate_get('/items')
+    assert resp.json == {'items': [{'id': 0}, {'id': 1}, {'id': 2}]}
+
+
+def test_not_found(client):
+    resp = client.simulate_get('/invalid')
+    assert resp.status_code == http_status.NOT_FOUND
+
+
+def test_sync_handler_reads_body(client):
+    resp = client.simulate_put('/items/10', json={'name': 'item'})
+    assert resp.status_code == http_status.OK
+    assert resp.json == {'id': '10', 'name': 'item'}
+
+
+def test_method_not_allowed(client):
+    resp = client.simulate_patch('/items/10')
+    assert resp.status_code == http_status.METHOD_NOT_ALLOWED
+    assert resp.headers['Allow'] == 'DELETE, GET, PUT'
+
+
+def test_handler_error(client):
+    resp = client.simulate_delete('/items/10')
+    assert resp.status_code == http_status.INTERNAL_SERVER_ERROR
+
+
+def test_wsgi_backends_reject_async_handlers():
+    for app in [WsgiApp(), FalconApp()]:
+        with pytest.raises(TypeError):
+            app.add_api(ItemsApi())
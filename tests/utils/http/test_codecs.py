@@ -0,0 +1,101 @@
+import msgpack
+import pytest
+
+from utils.http import JSON, MSGPACK, Request, default_codecs
+from utils.http.codecs import Codecs, parse_accept
+from utils.http.response import ContentResponse, ListStreamResponse
+
+
+def test_parse_accept():
+    assert parse_accept(
+        'text/html;q=0.5, application/msgpack, */*;q=0.1, image/png;q=0',
+    ) == ['application/msgpack', 'text/html', '*/*']
+
+
+@pytest.mark.parametrize('accept,codec', [
+    (None, JSON),
+    ('', JSON),
+    ('application/msgpack', MSGPACK),
+    ('application/x-msgpack', MSGPACK),
+    ('application/json, application/msgpack', JSON),
+    ('application/json;q=0.5, application/msgpack', MSGPACK),
+    ('*/*', JSON),
+    ('text/html', JSON),
+    ('application/msgpack;q=0, */*', JSON),
+])
+def test_for_accept(accept, codec):
+    assert default_codecs.for_accept(accept) is codec
+
+
+def test_for_accept_wildcard_subtype():
+    codecs = Codecs().register(MSGPACK).register(JSON)
+    assert codecs.for_accept('application/*') is MSGPACK
+    assert codecs.for_accept('text/*, application/*;q=0.5') is MSGPACK
+
+
+def test_for_content_type():
+    assert default_codecs.for_content_type(
+        'application/msgpack; charset=utf-8',
+    ) is MSGPACK
+    assert default_codecs.for_content_type('text/plain') is JSON
+    assert default_codecs.for_content_type(None) is JSON
+
+
+@pytest.mark.parametrize('codec', [JSON, MSGPACK])
+def test_round_trip(codec):
+    value = {'id': 1, 'name': 'test', 'roles': ['users.admin']}
+    assert codec.loads(codec.dumps(value)) == value
+
+    stream = b''.join(codec.dumps_list('items', iter([value, value])))
+    assert codec.loads(stream) == {'items': [value, value]}
+
+
+def test_msgpack_list_single_document(run):
+    items = [{'id': uid, 'name': 'x' * 1000} for uid in range(200)]
+    chunks = list(MSGPACK.dumps_list('items', iter(items)))
+    assert len(chunks) > 1
+    assert msgpack.unpackb(b''.join(chunks), raw=False) == {'items': items}
+
+    async def aitems():
+        for item in items:
+            yield item
+
+    async def adumps():
+        return [data async for data in MSGPACK.adumps_list('items', aitems())]
+
+    assert run(adumps()) == chunks
+    assert list(MSGPACK.dumps_list('items', iter([]))) == [
+        MSGPACK.dumps({'items': []}),
+    ]
+
+
+@pytest.mark.parametrize('codec,data', [
+    (JSON, b'{"id":'),
+    (MSGPACK, b'\x92\x01'),
+    (MSGPACK, b'\xc1'),
+])
+def test_loads_invalid(codec, data):
+    with pytest.raises(ValueError):
+        codec.loads(data)
+
+
+def test_request_decodes_by_content_type():
+    req = Request(
+        '/',
+        'POST',
+        body=MSGPACK.dumps({'id': 1}),
+        headers={'Content-Type': 'application/msgpack'},
+    )
+    assert req.json == {'id': 1}
+    assert Request('/', 'POST', body=b'{"id": 1}').json == {'id': 1}
+
+
+def test_negotiate():
+    req = Request('/', 'GET', headers={'Accept': 'application/msgpack'})
+    resp = default_codecs.negotiate(req, ContentResponse({'id': 1}))
+    assert resp.headers['Content-Type'] == 'application/msgpack'
+    assert resp.headers['Vary'] == 'Accept'
+    assert MSGPACK.loads(resp.body) == {'id': 1}
+
+    resp = default_codecs.negotiate(req, ListStreamResponse('ids', [1, 2]))
+    assert MSGPACK.loads(b''.join(resp.stream)) == {'ids': [1, 2]}
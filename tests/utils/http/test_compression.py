@@ -0,0 +1,117 @@
+import gzip
+import zlib
+
+import pytest
+from falcon import testing
+
+from utils.http import (
+    Api,
+    Compression,
+    Request,
+    Response,
+    json_response,
+    json_stream_response
+)
+from utils.http.backends.asgi import AsgiApp
+from utils.http.backends.falcon import FalconApp
+from utils.http.backends.wsgi import WsgiApp
+
+ITEMS = [{'id': uid, 'name': 'item {}'.format(uid)} for uid in range(100)]
+
+
+class ItemsApi:
+    api = Api('/items')
+
+    @api.get
+    def list_items(self, req: Request):
+        if 'stream' in req.query:
+            return json_stream_response('items', iter(ITEMS))
+
+        return json_response({'items': ITEMS})
+
+
+class ItemApi:
+    api = Api('/items/{uid}')
+
+    @api.get
+    def get_item(self, _, uid: str):
+        return json_response(ITEMS[int(uid)])
+
+
+@pytest.fixture(
+    params=[FalconApp, WsgiApp, AsgiApp],
+    ids=['falcon', 'wsgi', 'asgi'],
+)
+def client(request):
+    app = request.param(middleware=[Compression(min_size=256)]) \
+        .add_api(ItemsApi()) \
+        .add_api(ItemApi()) \
+        .configure()
+    return testing.TestClient(app)
+
+
+@pytest.mark.parametrize('query', ['', 'stream'])
+def test_gzip(client, query):
+    resp = client.simulate_get(
+        '/items',
+        query_string=query,
+        headers={'Accept-Encoding': 'gzip, deflate'},
+    )
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert resp.headers['Vary'] == 'Accept, Accept-Encoding'
+    assert gzip.decompress(resp.content) == \
+        b'{"items":' + json_items() + b'}'
+
+
+def test_deflate(client):
+    resp = client.simulate_get(
+        '/items',
+        headers={'Accept-Encoding': 'gzip;q=0.5, deflate'},
+    )
+    assert resp.headers['Content-Encoding'] == 'deflate'
+    assert zlib.decompress(resp.content) == b'{"items":' + json_items() + b'}'
+
+
+def test_not_accepted(client):
+    resp = client.simulate_get('/items')
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.json == {'items': ITEMS}
+
+
+def test_below_min_size(client):
+    resp = client.simulate_get(
+        '/items/1',
+        headers={'Accept-Encoding': 'gzip'},
+    )
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.json == ITEMS[1]
+
+
+@pytest.mark.parametrize('accept_encoding,encoding', [
+    (None, None),
+    ('gzip', 'gzip'),
+    ('br, deflate', 'deflate'),
+    ('*', 'gzip'),
+    ('identity, gzip', None),
+    ('gzip;q=0, deflate;q=0.1', 'deflate'),
+    ('gzip;q=0, *', 'deflate'),
+    ('gzip;q=0, deflate;q=0, *', None),
+    ('br', None),
+])
+def test_encoding(accept_encoding, encoding):
+    assert Compression().encoding(accept_encoding) == encoding
+
+
+def test_skips_encoded_and_empty_responses():
+    compression = Compression(min_size=0)
+    req = Request('/', 'GET', headers={'Accept-Encoding': 'gzip'})
+
+    resp = Response(b'data', headers={'Content-Encoding': 'br'})
+    assert compression.compress(req, resp) is resp
+
+    resp = Response(status=304)
+    assert compression.compress(req, resp) is resp
+
+
+def json_items() -> bytes:
+    return json_response(ITEMS).body
@@ -0,0 +1,25 @@
+import pytest
+
+from utils.http import Request, etag_matches, not_modified
+
+
+@pytest.mark.parametrize('if_none_match,matches', [
+    (None, False),
+    ('', False),
+    ('*', True),
+    ('"1.0"', True),
+    ('W/"1.0"', True),
+    ('"0.0", W/"1.0"', True),
+    ('"1.1"', False),
+])
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, 'W/"1.0"') is matches
+
+
+def test_not_modified():
+    req = Request('/', 'GET', headers={'If-None-Match': '"1"'})
+    resp = not_modified(req, '"1"')
+    assert resp.status == 304
+    assert resp.headers['ETag'] == '"1"'
+
+    assert not_modified(Request('/', 'GET'), '"1"') is None
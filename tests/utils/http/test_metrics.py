@@ -0,0 +1,133 @@
+from threading import Thread
+
+from falcon import testing
+
+from utils.http import (
+    Api,
+    HttpMetrics,
+    MetricsApi,
+    Request,
+    Response,
+    StatsMetrics
+)
+from utils.http.backends.wsgi import WsgiApp
+from utils.http.metrics import Gauge, Histogram, ShardedCounters
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.003
+        return self.now
+
+
+class ItemApi:
+    api = Api('/items/{uid}')
+
+    @api.get
+    def get_item(self, _, uid: str):
+        return Response(uid)
+
+    @api.delete
+    def delete_item(self, _, uid: str):
+        raise RuntimeError(uid)
+
+
+def test_sharded_counters_threads():
+    counters = ShardedCounters(2)
+
+    def add():
+        for _ in range(10000):
+            counters.add(0)
+            counters.add(1, 2)
+
+    threads = [Thread(target=add) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counters.totals() == [40000, 80000]
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+
+    cumulative, total, count = histogram.snapshot()
+    assert cumulative == [2, 3, 4]
+    assert total == 2.65
+    assert count == 4
+
+
+def test_gauge():
+    gauge = Gauge()
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.value == 1
+
+
+def test_middleware():
+    metrics = HttpMetrics(buckets=(0.001, 0.01), clock=Clock())
+    req = Request('/items/1', 'GET')
+    req.route = '/items/{uid}'
+
+    metrics.before(req)
+    assert metrics.in_flight[('/items/{uid}', 'GET')].value == 1
+
+    metrics.after(req, Response())
+    assert metrics.in_flight[('/items/{uid}', 'GET')].value == 0
+    assert metrics.latency[('/items/{uid}', 'GET')].snapshot() == \
+        ([0, 1, 1], 0.003, 1)
+    assert metrics.responses[('/items/{uid}', 'GET', 200)].value == 1
+
+
+def test_metrics_api():
+    metrics = HttpMetrics(buckets=(0.001, 0.01), clock=Clock())
+    app = WsgiApp(middleware=[metrics]) \
+        .add_api(ItemApi()) \
+        .add_api(MetricsApi(metrics)) \
+        .configure()
+    client = testing.TestClient(app)
+    client.simulate_get('/items/1')
+    client.simulate_delete('/items/1')
+
+    resp = client.simulate_get('/metrics')
+    assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    lines = resp.text.splitlines()
+    labels = 'route="/items/{uid}",method="GET"'
+    assert 'http_request_duration_seconds_bucket{' + labels + \
+        ',le="0.001"} 0' in lines
+    assert 'http_request_duration_seconds_bucket{' + labels + \
+        ',le="0.01"} 1' in lines
+    assert 'http_request_duration_seconds_bucket{' + labels + \
+        ',le="+Inf"} 1' in lines
+    assert 'http_request_duration_seconds_count{' + labels + '} 1' in lines
+    assert 'http_requests_in_flight{' + labels + '} 0' in lines
+    assert 'http_requests_in_flight{route="/metrics",method="GET"} 1' in lines
+    assert 'http_responses_total{' + labels + ',status="200"} 1' in lines
+    assert 'http_responses_total{route="/items/{uid}",method="DELETE",' \
+        'status="500"} 1' in lines
+
+
+def test_stats_metrics():
+    stats = {'size': 2, 'hits': 3, 'misses': 1, 'hit_rate': 0.75, 'on': True}
+    app = WsgiApp() \
+        .add_api(MetricsApi(StatsMetrics('cache', lambda: stats))) \
+        .configure()
+
+    lines = testing.TestClient(app).simulate_get('/metrics').text.splitlines()
+    assert lines == [
+        '# TYPE cache_hit_rate gauge',
+        'cache_hit_rate 0.75',
+        '# TYPE cache_hits_total counter',
+        'cache_hits_total 3',
+        '# TYPE cache_misses_total counter',
+        'cache_misses_total 1',
+        '# TYPE cache_size gauge',
+        'cache_size 2',
+    ]
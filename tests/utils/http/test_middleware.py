@@ -0,0 +1,145 @@
+import pytest
+from falcon import testing
+
+from utils.http import (
+    Api,
+    Middleware,
+    Pipeline,
+    Request,
+    Response,
+    json_response
+)
+from utils.http.backends.asgi import AsgiApp
+from utils.http.backends.falcon import FalconApp
+from utils.http.backends.wsgi import WsgiApp
+
+
+class Recorder(Middleware):
+    def __init__(self, name, calls, before=None, error=None):
+        self.name = name
+        self.calls = calls
+        self.before_resp = before
+        self.error_resp = error
+
+    def before(self, req: Request) -> Response:
+        self.calls.append((self.name, 'before', req.route))
+        return self.before_resp
+
+    def after(self, req: Request, resp: Response) -> Response:
+        self.calls.append((self.name, 'after', resp.status))
+        resp.headers['X-' + self.name] = 'yes'
+        return resp
+
+    def error(self, req: Request, exc: Exception) -> Response:
+        self.calls.append((self.name, 'error', str(exc)))
+        return self.error_resp
+
+
+class ItemApi:
+    api = Api('/items/{uid}')
+
+    @api.get
+    def get_item(self, _, uid: str):
+        return json_response({'id': uid})
+
+    @api.delete
+    def delete_item(self, _, uid: str):
+        raise RuntimeError(uid)
+
+
+def handler(req: Request):
+    return Response('ok')
+
+
+def failing_handler(req: Request):
+    raise RuntimeError('failed')
+
+
+def test_hooks_order():
+    calls = []
+    pipeline = Pipeline(middleware=[
+        Recorder('outer', calls),
+        Recorder('inner', calls),
+    ])
+    resp = pipeline.dispatch(Request('/', 'GET'), handler, {})
+    assert resp.body == b'ok'
+    assert [call[:2] for call in calls] == [
+        ('outer', 'before'),
+        ('inner', 'before'),
+        ('inner', 'after'),
+        ('outer', 'after'),
+    ]
+
+
+def test_before_short_circuits():
+    calls = []
+    pipeline = Pipeline(middleware=[
+        Recorder('outer', calls),
+        Recorder('auth', calls, before=Response(status=401)),
+        Recorder('inner', calls),
+    ])
+    resp = pipeline.dispatch(Request('/', 'GET'), failing_handler, {})
+    assert resp.status == 401
+    assert [call[:2] for call in calls] == [
+        ('outer', 'before'),
+        ('auth', 'before'),
+        ('auth', 'after'),
+        ('outer', 'after'),
+    ]
+
+
+def test_error_handled():
+    calls = []
+    pipeline = Pipeline(middleware=[
+        Recorder('outer', calls),
+        Recorder('inner', calls, error=Response(status=503)),
+    ])
+    resp = pipeline.dispatch(Request('/', 'GET'), failing_handler, {})
+    assert resp.status == 503
+    assert calls[2:] == [
+        ('inner', 'error', 'failed'),
+        ('outer', 'error', 'failed'),
+    ]
+
+
+def test_error_raised():
+    calls = []
+    pipeline = Pipeline(middleware=[Recorder('outer', calls)])
+    with pytest.raises(RuntimeError):
+        pipeline.dispatch(Request('/', 'GET'), failing_handler, {})
+    assert calls[-1] == ('outer', 'error', 'failed')
+
+
+def test_async_dispatch(run):
+    async def async_handler(req: Request, uid: str):
+        return json_response({'id': uid})
+
+    calls = []
+    pipeline = Pipeline(middleware=[Recorder('outer', calls)])
+    resp = run(pipeline.adispatch(
+        Request('/', 'GET', headers={'Accept': 'application/msgpack'}),
+        async_handler,
+        {'uid': '1'},
+    ))
+    assert resp.headers['Content-Type'] == 'application/msgpack'
+    assert calls[-1] == ('outer', 'after', 200)
+
+
+@pytest.mark.parametrize('backend', [FalconApp, WsgiApp, AsgiApp])
+def test_backends_run_middleware(backend):
+    calls = []
+    app = backend(middleware=[Recorder('outer', calls)]) \
+        .add_api(ItemApi()) \
+        .configure()
+    client = testing.TestClient(app)
+
+    resp = client.simulate_get('/items/1')
+    assert resp.headers['X-outer'] == 'yes'
+    assert calls == [
+        ('outer', 'before', '/items/{uid}'),
+        ('outer', 'after', 200),
+    ]
+
+    resp = client.simulate_delete('/items/2')
+    assert resp.status_code == 500
+    assert calls[-1] == ('outer', 'error', '2')
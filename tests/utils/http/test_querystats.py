@@ -0,0 +1,151 @@
+import pytest
+from falcon import testing
+from mongomock import MongoClient
+
+from utils.http import (
+    Api,
+    HttpMetrics,
+    MetricsApi,
+    QueryMetrics,
+    RequestTracing,
+    Response,
+    json_stream_response
+)
+from utils.http.backends.asgi import AsgiApp
+from utils.http.backends.falcon import FalconApp
+from utils.http.backends.wsgi import WsgiApp
+from utils.querystats import CountedCollection
+from utils.tracing import RingBufferExporter, tracer
+
+
+class ItemApi:
+    api = Api('/items/{uid}')
+
+    def __init__(self, coll: CountedCollection):
+        self.coll = coll
+
+    @api.get
+    def get_item(self, _, uid: str):
+        self.coll.find_one({'_id': int(uid)})
+        self.coll.find_one({'_id': int(uid) + 1})
+        return Response(uid)
+
+    @api.delete
+    def delete_item(self, _, uid: str):
+        self.coll.delete_one({'_id': int(uid)})
+        raise RuntimeError(uid)
+
+
+class ItemListApi:
+    api = Api('/items')
+
+    def __init__(self, coll: CountedCollection):
+        self.coll = coll
+
+    @api.get
+    def list_items(self, _):
+        self.coll.find_one({'_id': 0})
+        return json_stream_response('items', self._iter_items())
+
+    def _iter_items(self):
+        # one query per item, like pages read while the body is sent
+        for uid in range(3):
+            yield {'id': self.coll.find_one({'_id': uid})['_id']}
+
+
+@pytest.fixture
+def exporter():
+    exporter = RingBufferExporter()
+    tracer.exporter = exporter
+    yield exporter
+    tracer.exporter = None
+
+
+@pytest.fixture
+def coll():
+    coll = MongoClient().test.items
+    coll.drop()
+    coll.insert_many([{'_id': uid} for uid in range(3)])
+    return CountedCollection(coll)
+
+
+@pytest.mark.parametrize('backend', [FalconApp, WsgiApp, AsgiApp])
+def test_query_totals_on_request_span(backend, coll, exporter):
+    middleware = [RequestTracing(), QueryMetrics(measure_bytes=True)]
+    app = backend(middleware=middleware) \
+        .add_api(ItemApi(coll)) \
+        .configure()
+    client = testing.TestClient(app)
+
+    client.simulate_get('/items/1', headers={'X-Request-ID': 'abc'})
+    root, = exporter.spans('abc')
+    assert root.attrs['db.ops'] == 2
+    assert root.attrs['db.docs'] == 2
+    assert root.attrs['db.bytes'] > 0
+
+    resp = client.simulate_delete('/items/2', headers={'X-Request-ID': 'def'})
+    assert resp.status_code == 500
+    root, = exporter.spans('def')
+    assert root.attrs['db.ops'] == 1
+
+
+def test_query_metrics(coll):
+    query_metrics = QueryMetrics(measure_bytes=True)
+    app = WsgiApp(middleware=[query_metrics]) \
+        .add_api(ItemApi(coll)) \
+        .add_api(MetricsApi(HttpMetrics(), query_metrics)) \
+        .configure()
+    client = testing.TestClient(app)
+    client.simulate_get('/items/1')
+    client.simulate_get('/items/2')
+
+    lines = client.simulate_get('/metrics').text.splitlines()
+    labels = 'route="/items/{uid}",method="GET"'
+    assert 'mongo_operations_per_request_bucket{{{},le="2"}} 2'.format(
+        labels,
+    ) in lines
+    assert 'mongo_operations_per_request_sum{{{}}} 4.0'.format(
+        labels,
+    ) in lines
+    # the second request finds a single item
+    assert 'mongo_documents_per_request_bucket{{{},le="1"}} 1'.format(
+        labels,
+    ) in lines
+    assert 'mongo_bytes_per_request_count{{{}}} 2'.format(labels) in lines
+    assert '# TYPE http_request_duration_seconds histogram' in lines
+
+
+def test_query_metrics_without_bytes(coll, exporter):
+    query_metrics = QueryMetrics()
+    app = WsgiApp(middleware=[RequestTracing(), query_metrics]) \
+        .add_api(ItemApi(coll)) \
+        .add_api(MetricsApi(query_metrics)) \
+        .configure()
+    client = testing.TestClient(app)
+    client.simulate_get('/items/1', headers={'X-Request-ID': 'abc'})
+
+    root, = exporter.spans('abc')
+    assert root.attrs['db.ops'] == 2
+    assert 'db.bytes' not in root.attrs
+    assert 'mongo_bytes_per_request' not in \
+        client.simulate_get('/metrics').text
+
+
+@pytest.mark.parametrize('backend', [FalconApp, WsgiApp, AsgiApp])
+def test_streamed_queries_counted(backend, coll):
+    query_metrics = QueryMetrics()
+    app = backend(middleware=[query_metrics]) \
+        .add_api(ItemListApi(coll)) \
+        .add_api(MetricsApi(query_metrics)) \
+        .configure()
+    client = testing.TestClient(app)
+    assert len(client.simulate_get('/items').json['items']) == 3
+
+    lines = client.simulate_get('/metrics').text.splitlines()
+    labels = 'route="/items",method="GET"'
+    assert 'mongo_operations_per_request_sum{{{}}} 4.0'.format(
+        labels,
+    ) in lines
+    assert 'mongo_operations_per_request_count{{{}}} 1'.format(
+        labels,
+    ) in lines
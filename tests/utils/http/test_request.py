@@ -0,0 +1,103 @@
+from io import BytesIO
+
+from utils.http import Request
+from utils.http.request import EnvironHeaders, PairsHeaders
+
+
+class CountingStream(BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+def test_body_read_lazily():
+    stream = CountingStream(b'{"name": "test"}extra')
+    req = Request('/', 'POST', stream=stream, content_length=16)
+    assert stream.reads == 0
+
+    assert req.json == {'name': 'test'}
+    assert req.body == b'{"name": "test"}'
+    assert stream.reads == 1
+
+
+def test_body_without_stream():
+    assert Request('/', 'GET').body == b''
+    assert Request('/', 'POST', body=b'data').stream.read() == b'data'
+
+
+def test_iter_body():
+    stream = CountingStream(b'0123456789extra')
+    req = Request('/', 'POST', stream=stream, content_length=10)
+    assert list(req.iter_body(chunk_size=4)) == [b'0123', b'4567', b'89']
+
+
+def test_iter_body_until_eof():
+    req = Request('/', 'POST', stream=BytesIO(b'01234'))
+    assert list(req.iter_body(chunk_size=2)) == [b'01', b'23', b'4']
+
+
+def test_query_string():
+    req = Request('/', 'GET', query_string='limit=10&name=&a=%20b')
+    assert req.query == {'limit': '10', 'name': '', 'a': ' b'}
+    assert Request('/', 'GET').query == {}
+
+
+def test_environ_headers():
+    headers = EnvironHeaders({
+        'HTTP_X_REAL_IP': '10.0.0.1',
+        'HTTP_AUTHORIZATION': 'Bearer token',
+        'CONTENT_TYPE': 'application/json',
+        'PATH_INFO': '/',
+    })
+    assert headers['x-real-ip'] == '10.0.0.1'
+    assert headers.get('AUTHORIZATION') == 'Bearer token'
+    assert 'Content-Type' in headers
+    assert 'Content-Length' not in headers
+    assert dict(headers) == {
+        'X-Real-Ip': '10.0.0.1',
+        'Authorization': 'Bearer token',
+        'Content-Type': 'application/json',
+    }
+
+
+def test_pairs_headers():
+    headers = PairsHeaders([
+        (b'content-type', b'application/json'),
+        (b'Host', b'localhost:8080'),
+    ])
+    assert headers['Content-Type'] == 'application/json'
+    assert headers.get('host') == 'localhost:8080'
+    assert headers.get('Authorization', '') == ''
+    assert len(headers) == 2
+
+
+def test_header_properties():
+    req = Request('/', 'GET', headers=PairsHeaders([
+        (b'authorization', b'Bearer token'),
+        (b'host', b'localhost:8080'),
+    ]))
+    assert req.authorization == 'Bearer token'
+    assert req.content_type == 'text/plain'
+    assert req.port == 8080
+    assert Request('/', 'GET').port == 80
+
+
+def test_remote_addr():
+    assert Request('/', 'GET', remote_addr='10.0.0.1').remote_addr == \
+        '10.0.0.1'
+    assert Request('/', 'GET').remote_addr == ''
+
+    req = Request(
+        '/',
+        'GET',
+        headers=EnvironHeaders({
+            'HTTP_X_FORWARDED_FOR': '10.0.0.2',
+            'HTTP_X_REAL_IP': '10.0.0.3',
+        }),
+        remote_addr='10.0.0.1',
+    )
+    assert req.remote_addr == '10.0.0.3'
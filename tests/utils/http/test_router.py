@@ -0,0 +1,49 @@
+from utils.http.router import Router
+
+
+def handler():
+    pass
+
+
+def test_match_static():
+    router = Router() \
+        .add('/api/users', {'GET': handler}) \
+        .compile()
+
+    assert router.match('/api/users') == ({'GET': handler}, {})
+    assert router.match('/api/users/') == ({'GET': handler}, {})
+    assert router.match('/api/user') == (None, None)
+
+
+def test_match_params():
+    router = Router() \
+        .add('/api/users', {'GET': 'list'}) \
+        .add('/api/users/{uid}', {'GET': 'get'}) \
+        .add('/api/users/{uid}/roles/{name}', {'GET': 'role'}) \
+        .compile()
+
+    assert router.match('/api/users/10') == ({'GET': 'get'}, {'uid': '10'})
+    assert router.match('/api/users/10/roles/users.admin') == (
+        {'GET': 'role'},
+        {'uid': '10', 'name': 'users.admin'},
+    )
+    assert router.match('/api/users/10/roles') == (None, None)
+
+
+def test_match_static_before_params():
+    router = Router() \
+        .add('/api/users/{uid}', {'GET': 'get'}) \
+        .add('/api/users/me', {'GET': 'me'}) \
+        .compile()
+
+    assert router.match('/api/users/me') == ({'GET': 'me'}, {})
+
+
+def test_match_escapes_template():
+    router = Router() \
+        .add('/api/users.json', {'GET': 'list'}) \
+        .add('/api/v1.{version}', {'GET': 'version'}) \
+        .compile()
+
+    assert router.match('/api/usersxjson') == (None, None)
+    assert router.match('/api/v1.2') == ({'GET': 'version'}, {'version': '2'})
@@ -0,0 +1,112 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from http.client import HTTPConnection
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__),
+))))
+
+SERVER = '''
+import os, sys
+from utils.http.server import serve
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+serve(app, '127.0.0.1', int(sys.argv[1]), workers=int(sys.argv[2]),
+      graceful_timeout=1)
+'''
+
+FACTORY_SERVER = '''
+import os, sys
+from utils.http.server import serve
+
+def app_factory():
+    built_in = str(os.getpid()).encode()
+
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [built_in]
+
+    return app
+
+serve(app_factory, '127.0.0.1', int(sys.argv[1]), workers=int(sys.argv[2]),
+      graceful_timeout=1, factory=True)
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_pid(port: int) -> int:
+    deadline = time.monotonic() + 10
+    while True:
+        conn = HTTPConnection('127.0.0.1', port, timeout=1)
+        try:
+            conn.request('GET', '/')
+            return int(conn.getresponse().read())
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+        finally:
+            conn.close()
+
+
+def start_server(port: int, workers: int, server: str = SERVER):
+    return subprocess.Popen(
+        [sys.executable, '-c', server, str(port), str(workers)],
+        cwd=ROOT,
+    )
+
+
+@pytest.fixture
+def port():
+    return free_port()
+
+
+def test_serve_single_process(port):
+    proc = start_server(port, 1)
+    try:
+        assert get_pid(port) == proc.pid
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+
+
+def test_serve_prefork_restart(port):
+    proc = start_server(port, 2)
+    try:
+        pids = {get_pid(port) for _ in range(20)}
+        assert proc.pid not in pids
+
+        proc.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 10
+        while get_pid(port) in pids:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+
+
+def test_serve_prefork_factory(port):
+    proc = start_server(port, 2, FACTORY_SERVER)
+    try:
+        # every worker answers with the pid that built its app
+        pids = {get_pid(port) for _ in range(20)}
+        assert pids
+        assert proc.pid not in pids
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
@@ -0,0 +1,103 @@
+import pytest
+from falcon import testing
+
+from utils.http import Api, RequestTracing, Response, TracesApi
+from utils.http.backends.asgi import AsgiApp
+from utils.http.backends.falcon import FalconApp
+from utils.http.backends.wsgi import WsgiApp
+from utils.tracing import RingBufferExporter, traced, tracer
+
+
+@traced('load_item')
+def load_item(uid: str) -> str:
+    return uid
+
+
+class ItemApi:
+    api = Api('/items/{uid}')
+
+    @api.get
+    def get_item(self, _, uid: str):
+        return Response(load_item(uid))
+
+    @api.delete
+    def delete_item(self, _, uid: str):
+        raise RuntimeError(uid)
+
+
+@pytest.fixture
+def exporter():
+    exporter = RingBufferExporter()
+    tracer.exporter = exporter
+    yield exporter
+    tracer.exporter = None
+
+
+@pytest.fixture(params=[FalconApp, WsgiApp, AsgiApp])
+def client(request, exporter):
+    app = request.param(middleware=[RequestTracing()]) \
+        .add_api(ItemApi()) \
+        .add_api(TracesApi(exporter)) \
+        .configure()
+    return testing.TestClient(app)
+
+
+def test_request_span(client, exporter):
+    resp = client.simulate_get('/items/1', headers={'X-Request-ID': 'abc'})
+    assert resp.status_code == 200
+    assert resp.headers['X-Request-ID'] == 'abc'
+
+    child, root = exporter.spans('abc')
+    assert root.name == 'http GET /items/{uid}'
+    assert root.parent_id is None
+    assert root.attrs['status'] == 200
+    assert root.attrs['path'] == '/items/1'
+    assert child.name == 'load_item'
+    assert child.parent_id == root.span_id
+
+
+def test_request_id_generated(client):
+    first = client.simulate_get('/items/1').headers['X-Request-ID']
+    second = client.simulate_get('/items/1').headers['X-Request-ID']
+    assert len(first) == 32
+    assert first != second
+
+    resp = client.simulate_get('/items/1', headers={'X-Request-ID': 'a' * 200})
+    assert len(resp.headers['X-Request-ID']) == 32
+
+
+def test_request_span_error(client, exporter):
+    resp = client.simulate_delete('/items/2', headers={'X-Request-ID': 'abc'})
+    assert resp.status_code == 500
+
+    root, = exporter.spans('abc')
+    assert root.attrs['status'] == 500
+    assert root.error == 'RuntimeError: 2'
+
+
+def test_request_id_without_exporter():
+    app = WsgiApp(middleware=[RequestTracing()]).add_api(ItemApi()).configure()
+    resp = testing.TestClient(app).simulate_get(
+        '/items/1',
+        headers={'X-Request-ID': 'abc'},
+    )
+    assert resp.headers['X-Request-ID'] == 'abc'
+
+
+def test_traces_api(client):
+    client.simulate_get('/items/1', headers={'X-Request-ID': 'abc'})
+
+    resp = client.simulate_get('/debug/traces')
+    traces = [
+        trace for trace in resp.json['traces'] if trace['trace_id'] == 'abc'
+    ]
+    assert [span['name'] for span in traces[0]['spans']] == [
+        'load_item',
+        'http GET /items/{uid}',
+    ]
+
+    resp = client.simulate_get('/debug/traces', params={'min_duration': 60})
+    assert resp.json == {'traces': []}
+
+    resp = client.simulate_get('/debug/traces', params={'min_duration': 'x'})
+    assert resp.status_code == 400
@@ -0,0 +1,93 @@
+from http import HTTPStatus as http_status
+
+import pytest
+from falcon import testing
+
+from utils.http import Api, Request, Response, json_response
+from utils.http.backends.wsgi import WsgiApp, environ_content_length
+
+
+class EchoApi:
+    api = Api('/echo/{name}')
+
+    @api.post
+    def echo(self, req: Request, name: str):
+        return json_response({
+            'name': name,
+            'body': req.body.decode(),
+            'query': req.query,
+            'content_type': req.content_type,
+            'authorization': req.authorization,
+        })
+
+    @api.delete
+    def fail(self, req: Request, name: str):
+        raise RuntimeError(name)
+
+
+@pytest.fixture
+def client():
+    app = WsgiApp() \
+        .add_api(EchoApi()) \
+        .configure()
+    return testing.TestClient(app)
+
+
+def test_request(client):
+    resp = client.simulate_post(
+        '/echo/test',
+        body='data',
+        params={'limit': '10'},
+        headers={
+            'Content-Type': 'text/csv',
+            'Authorization': 'Bearer token',
+        },
+    )
+    assert resp.status_code == http_status.OK
+    assert resp.headers['Content-Type'] == 'application/json'
+    assert resp.json == {
+        'name': 'test',
+        'body': 'data',
+        'query': {'limit': '10'},
+        'content_type': 'text/csv',
+        'authorization': 'Bearer token',
+    }
+
+
+def test_not_found(client):
+    resp = client.simulate_post('/invalid')
+    assert resp.status_code == http_status.NOT_FOUND
+
+
+def test_method_not_allowed(client):
+    resp = client.simulate_get('/echo/test')
+    assert resp.status_code == http_status.METHOD_NOT_ALLOWED
+    assert resp.headers['Allow'] == 'DELETE, POST'
+
+
+def test_handler_error(client):
+    resp = client.simulate_delete('/echo/test')
+    assert resp.status_code == http_status.INTERNAL_SERVER_ERROR
+
+
+def test_stream_response():
+    class StreamApi:
+        api = Api('/stream')
+
+        @api.get
+        def stream(self, _):
+            return Response(stream=iter([b'a', b'b']))
+
+    app = WsgiApp().add_api(StreamApi()).configure()
+    resp = testing.TestClient(app).simulate_get('/stream')
+    assert resp.text == 'ab'
+
+
+def test_environ_content_length():
+    assert environ_content_length({'CONTENT_LENGTH': '10'}) == 10
+    assert environ_content_length({'CONTENT_LENGTH': ''}) == 0
+    assert environ_content_length({'CONTENT_LENGTH': 'x'}) == 0
+    assert environ_content_length({
+        'CONTENT_LENGTH': '10',
+        'HTTP_TRANSFER_ENCODING': 'chunked',
+    }) is None
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+from bson import encode
+from mongomock import MongoClient
+
+from utils.querystats import (
+    AsyncCountedCollection,
+    CountedCollection,
+    count_queries,
+    current_stats
+)
+
+ITEMS = [{'_id': uid, 'name': 'item{}'.format(uid)} for uid in range(3)]
+
+
+class AsyncCursorStub:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    async def to_list(self, length):
+        await asyncio.sleep(0)
+        return list(self.cursor)
+
+
+class AsyncCollectionStub:
+    def __init__(self, coll):
+        self.coll = coll
+
+    def find(self, *args, **kwargs):
+        return AsyncCursorStub(self.coll.find(*args, **kwargs))
+
+    async def find_one(self, *args, **kwargs):
+        await asyncio.sleep(0)
+        return self.coll.find_one(*args, **kwargs)
+
+    async def insert_one(self, *args, **kwargs):
+        await asyncio.sleep(0)
+        return self.coll.insert_one(*args, **kwargs)
+
+
+@pytest.fixture
+def coll():
+    coll = MongoClient().test.items
+    coll.drop()
+    coll.insert_many([dict(item) for item in ITEMS])
+    return coll
+
+
+def test_counts_operations_and_documents(coll):
+    counted = CountedCollection(coll)
+    with count_queries() as stats:
+        assert current_stats() is stats
+        assert counted.find_one({'_id': 0}) == ITEMS[0]
+        assert counted.find_one({'_id': 100}) is None
+        assert list(counted.find().sort('_id').limit(2)) == ITEMS[:2]
+        counted.update_one({'_id': 0}, {'$set': {'name': 'updated'}})
+    assert current_stats() is None
+
+    assert stats.ops == 4
+    assert stats.docs == 3
+    assert stats.bytes == len(encode(ITEMS[0])) + len(encode(ITEMS[1])) * 2
+    assert stats.asdict() == {'ops': 4, 'docs': 3, 'bytes': stats.bytes}
+
+
+def test_nested_stats_add_to_enclosing(coll):
+    counted = CountedCollection(coll)
+    with count_queries() as outer:
+        counted.find_one({'_id': 0})
+        with count_queries() as inner:
+            counted.find_one({'_id': 1})
+        assert current_stats() is outer
+
+    assert (inner.ops, inner.docs) == (1, 1)
+    assert (outer.ops, outer.docs) == (2, 2)
+
+
+def test_failed_operations_counted(coll):
+    coll.create_index('name', unique=True)
+    counted = CountedCollection(coll)
+    with count_queries() as stats:
+        with pytest.raises(Exception):
+            counted.insert_one({'_id': 10, 'name': 'item0'})
+    assert stats.ops == 1
+
+
+def test_not_counted_without_stats(coll):
+    counted = CountedCollection(coll)
+    assert counted.find_one({'_id': 0}) == ITEMS[0]
+    assert counted.name == 'items'
+
+
+def test_async_collection(coll, run):
+    counted = AsyncCountedCollection(AsyncCollectionStub(coll))
+
+    async def read():
+        await counted.find_one({'_id': 0})
+        tasks = [
+            asyncio.ensure_future(counted.find().sort('_id').to_list(None))
+            for _ in range(2)
+        ]
+        await asyncio.gather(*tasks)
+        await counted.insert_one({'_id': 10})
+
+    with count_queries() as stats:
+        run(read())
+
+    assert (stats.ops, stats.docs) == (4, 7)
+
+
+def test_bytes_only_measured_when_asked(coll):
+    counted = CountedCollection(coll)
+    with count_queries(measure_bytes=False) as outer:
+        counted.find_one({'_id': 0})
+        with count_queries() as inner:
+            counted.find_one({'_id': 1})
+
+    assert (outer.ops, outer.docs) == (2, 2)
+    assert inner.bytes == len(encode(ITEMS[1]))
+    # only what the inner stats measured
+    assert outer.bytes == inner.bytes
+
+
+def test_resume_adds_to_enclosing_stats(coll):
+    counted = CountedCollection(coll)
+    with count_queries() as outer:
+        stats = count_queries().start()
+        stats.stop()
+
+    stats.resume()
+    counted.find_one({'_id': 0})
+    stats.stop()
+    assert current_stats() is None
+    assert (stats.ops, outer.ops) == (1, 1)
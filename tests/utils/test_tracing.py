@@ -0,0 +1,174 @@
+import json
+
+import pytest
+
+from utils.tracing import (
+    JsonLinesExporter,
+    RingBufferExporter,
+    Tracer,
+    trace_methods,
+    traced,
+    tracer
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.25
+        return self.now
+
+
+@trace_methods('Repo')
+class Repo:
+    def get_item(self, uid: int) -> dict:
+        return {'id': uid}
+
+    def get_items(self):
+        yield from [self.get_item(1), self.get_item(2)]
+
+    async def aget_item(self, uid: int) -> dict:
+        return self.get_item(uid)
+
+    def fail(self):
+        raise ValueError('failed')
+
+    def _private(self):
+        return tracer.current()
+
+
+@pytest.fixture
+def exporter():
+    exporter = RingBufferExporter()
+    tracer.exporter = exporter
+    yield exporter
+    tracer.exporter = None
+
+
+def test_nested_spans():
+    exporter = RingBufferExporter()
+    local_tracer = Tracer(exporter, clock=Clock())
+    with local_tracer.span('outer', trace_id='abc', path='/') as outer:
+        with local_tracer.span('inner') as inner:
+            assert local_tracer.current() is inner
+        assert local_tracer.current() is outer
+    assert local_tracer.current() is None
+
+    inner, outer = exporter.spans()
+    assert outer.name == 'outer'
+    assert outer.parent_id is None
+    assert outer.attrs == {'path': '/'}
+    assert inner.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id == 'abc'
+    assert inner.duration == 0.25
+    assert outer.duration == 0.75
+
+
+def test_new_trace_per_root_span():
+    exporter = RingBufferExporter()
+    local_tracer = Tracer(exporter)
+    with local_tracer.span('first'):
+        pass
+    with local_tracer.span('second'):
+        pass
+
+    first, second = exporter.spans()
+    assert len(first.trace_id) == 32
+    assert first.trace_id != second.trace_id
+    assert exporter.spans(first.trace_id) == [first]
+
+
+def test_disabled_tracer_records_nothing():
+    local_tracer = Tracer()
+    assert not local_tracer.enabled
+    with local_tracer.span('outer') as span:
+        span.set('status', 200)
+        assert local_tracer.current() is None
+
+
+def test_span_error():
+    exporter = RingBufferExporter()
+    local_tracer = Tracer(exporter)
+    with pytest.raises(ValueError):
+        with local_tracer.span('outer'):
+            raise ValueError('failed')
+
+    span, = exporter.spans()
+    assert span.error == 'ValueError: failed'
+
+
+def test_trace_methods(exporter):
+    repo = Repo()
+    assert repo.get_item(1) == {'id': 1}
+    assert list(repo.get_items()) == [{'id': 1}, {'id': 2}]
+    assert repo._private() is None
+    with pytest.raises(ValueError):
+        repo.fail()
+
+    assert [(span.name, span.error) for span in exporter.spans()] == [
+        ('Repo.get_item', None),
+        ('Repo.get_item', None),
+        ('Repo.get_item', None),
+        ('Repo.fail', 'ValueError: failed'),
+    ]
+
+
+def test_trace_methods_async(exporter, run):
+    assert run(Repo().aget_item(1)) == {'id': 1}
+
+    inner, outer = exporter.spans()
+    assert outer.name == 'Repo.aget_item'
+    assert inner.name == 'Repo.get_item'
+    assert inner.parent_id == outer.span_id
+
+
+def test_traced(exporter):
+    @traced('compute')
+    def compute():
+        return tracer.current().name
+
+    assert compute() == 'compute'
+    assert exporter.spans()[0].name == 'compute'
+
+
+def test_ring_buffer_size():
+    exporter = RingBufferExporter(size=2)
+    local_tracer = Tracer(exporter)
+    for name in ['first', 'second', 'third']:
+        with local_tracer.span(name):
+            pass
+
+    assert [span.name for span in exporter.spans()] == ['second', 'third']
+
+
+def test_slow_traces():
+    exporter = RingBufferExporter()
+    local_tracer = Tracer(exporter, clock=Clock())
+    with local_tracer.span('fast', trace_id='fast'):
+        pass
+    with local_tracer.span('slow', trace_id='slow'):
+        with local_tracer.span('child'):
+            pass
+
+    traces = exporter.slow_traces(min_duration=0.5)
+    assert list(traces) == ['slow']
+    assert [span.name for span in traces['slow']] == ['child', 'slow']
+    assert len(exporter.slow_traces()) == 2
+
+
+def test_json_lines_exporter(tmp_path):
+    path = tmp_path / 'spans.jsonl'
+    exporter = JsonLinesExporter(str(path))
+    local_tracer = Tracer(exporter)
+    with local_tracer.span('outer', trace_id='abc', uid=1):
+        with local_tracer.span('inner'):
+            pass
+    exporter.close()
+
+    inner, outer = [json.loads(line) for line in path.read_text().splitlines()]
+    assert outer['name'] == 'outer'
+    assert outer['trace_id'] == inner['trace_id'] == 'abc'
+    assert outer['attrs'] == {'uid': 1}
+    assert inner['parent_id'] == outer['span_id']
@@ -1,33 +1,7 @@
-from pymongo import MongoClient
-
-from utils.http.backends.falcon import FalconApp
-
-from .http import AuthApi, UserApi, UserListApi
-from .repos.mongo import RolesRepoMongo, UsersRepoMongo
-from .use_cases.auth import AuthUseCases
-from .use_cases.user import UserUseCases
-
-
-def create_app():
-    client = MongoClient()
-    roles_repo = RolesRepoMongo(client)
-    users_repo = UsersRepoMongo(client, roles_repo)
-
-    user_ucs = UserUseCases(users_repo, roles_repo)
-    auth_ucs = AuthUseCases(users_repo)
-
-    app = FalconApp() \
-        .add_api(AuthApi(auth_ucs)) \
-        .add_api(UserApi(user_ucs)) \
-        .add_api(UserListApi(user_ucs))
-
-    app.configure()
-    return app
-
-
-def main(app):
-    app.run()
+from gevent import monkey  # isort:skip
+monkey.patch_all()  # isort:skip
 
+from .app import create_app, main  # noqa: E402
 
 if __name__ == '__main__':
-    main(create_app())
+    main(create_app)
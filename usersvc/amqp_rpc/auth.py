@@ -0,0 +1,43 @@
+from simple_amqp_rpc import Service
+
+from usersvc.use_cases.auth import (
+    MAX_PERMISSION_CHECKS,
+    AuthUseCases,
+    UserHasPermissionRequest,
+    UsersHavePermissionsRequest,
+    permission_name
+)
+from utils.tracing import trace_methods
+
+
+@trace_methods('AuthService')
+class AuthService:
+    svc = Service('auth.auth')
+
+    def __init__(self, ucs: AuthUseCases, parse_id=int):
+        self.ucs = ucs
+        self.parse_id = parse_id
+
+    @svc.rpc('CheckPermissions')
+    def check_permissions(self, req):
+        try:
+            checks = req['checks']
+            if len(checks) > MAX_PERMISSION_CHECKS:
+                raise ValueError('too many checks')
+
+            req = UsersHavePermissionsRequest(checks=[
+                UserHasPermissionRequest(
+                    user_id=self.parse_id(check['user_id']),
+                    permission=permission_name(check['permission']),
+                )
+                for check in checks
+            ])
+        except (KeyError, TypeError, ValueError):
+            return {'ok': False, 'error': 'badrequest'}
+
+        return {
+            'ok': True,
+            'payload': {
+                'results': self.ucs.users_have_permissions(req),
+            },
+        }
@@ -1,28 +1,58 @@
 from simple_amqp_rpc import Service
 
 from usersvc.entities import User
+from usersvc.use_cases.password import PasswordHasherBusy
 from usersvc.use_cases.user import (
     CreateUserRequest,
     GetUserByIdRequest,
+    ListUsersRequest,
     UserUseCases
 )
+from utils.tracing import trace_methods
 
 from .adapters import user_asjson
 
 
+def is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+@trace_methods('UserService')
 class UserService:
     svc = Service('auth.users')
 
-    def __init__(self, ucs: UserUseCases):
+    def __init__(self, ucs: UserUseCases, parse_id=int):
         self.ucs = ucs
+        self.parse_id = parse_id
 
     @svc.rpc('ListUsers')
     def list_users(self, req):
-        users = self.ucs.get_all_users()
+        req = req if req else {}
+        if 'limit' not in req and 'after' not in req:
+            users = self.ucs.iter_all_users()
+            return {
+                'ok': True,
+                'payload': {
+                    'users': [user_asjson(user) for user in users],
+                },
+            }
+
+        limit = req.get('limit', ListUsersRequest.limit)
+        after = req.get('after')
+        try:
+            if not is_int(limit):
+                raise ValueError(limit)
+            if after is not None:
+                after = self.parse_id(after)
+        except (TypeError, ValueError):
+            return {'ok': False, 'error': 'badrequest'}
+
+        page = self.ucs.list_users(ListUsersRequest(limit=limit, after=after))
         return {
             'ok': True,
             'payload': {
-                'users': [user_asjson(user) for user in users],
+                'users': [user_asjson(user) for user in page.users],
+                'next': page.next,
             },
         }
 
@@ -47,7 +77,11 @@ class UserService:
             roles=req.get('roles'),
         )
 
-        user = self.ucs.create_user(req)
+        try:
+            user = self.ucs.create_user(req)
+        except PasswordHasherBusy:
+            return {'ok': False, 'error': 'busy'}
+
         if not isinstance(user, User):
             return {'ok': False, 'error': 'conflict'}
 
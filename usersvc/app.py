@@ -0,0 +1,117 @@
+import os
+
+from pymongo import MongoClient
+
+from utils.http import (
+    Compression,
+    HttpMetrics,
+    MetricsApi,
+    QueryMetrics,
+    RequestTracing,
+    StatsMetrics,
+    TracesApi
+)
+from utils.http.backends.falcon import FalconApp
+from utils.http.server import serve
+from utils.token import TokenSigner
+from utils.tracing import JsonLinesExporter, RingBufferExporter, tracer
+
+from .http import AuthApi, PermissionsApi, UserApi, UserListApi
+from .repos.cache import CachedRolesRepo, CachedUsersRepo
+from .repos.mongo import RolesRepoMongo, UsersRepoMongo
+from .use_cases.auth import AuthUseCases
+from .use_cases.decisions import PermissionDecisions
+from .use_cases.password import PasswordHasher
+from .use_cases.user import UserUseCases
+
+
+def token_signer() -> TokenSigner:
+    # tokens are verified by every worker and by other services, a random
+    # key would not survive restarts nor be known to them
+    token_key = os.environ.get('USERSVC_TOKEN_KEY')
+    if not token_key:
+        raise RuntimeError('USERSVC_TOKEN_KEY is not set')
+
+    return TokenSigner(token_key.encode())
+
+
+def create_app():
+    signer = token_signer()
+
+    client = MongoClient()
+    roles_repo_mongo = RolesRepoMongo(client)
+    roles_repo_mongo.ensure_indexes()
+    roles_repo = CachedRolesRepo(roles_repo_mongo)
+
+    users_repo_mongo = UsersRepoMongo(client, roles_repo)
+    users_repo_mongo.ensure_indexes()
+    parse_id = users_repo_mongo.ids.parse_id
+    users_repo = CachedUsersRepo(users_repo_mongo, roles_repo=roles_repo)
+
+    hasher = PasswordHasher()
+    user_ucs = UserUseCases(users_repo, roles_repo, hasher=hasher)
+    decisions = PermissionDecisions()
+    auth_ucs = AuthUseCases(
+        users_repo,
+        signer,
+        hasher=hasher,
+        decisions=decisions,
+    )
+
+    compression = Compression(
+        min_size=int(os.environ.get('USERSVC_GZIP_MIN_SIZE', 1024)),
+        level=int(os.environ.get('USERSVC_GZIP_LEVEL', 6)),
+    )
+    metrics = HttpMetrics()
+    query_metrics = QueryMetrics()
+    app = FalconApp(middleware=[
+        RequestTracing(),
+        query_metrics,
+        metrics,
+        compression,
+    ]) \
+        .add_api(MetricsApi(
+            metrics,
+            query_metrics,
+            StatsMetrics('permission_decisions', decisions.stats),
+            StatsMetrics('users_cache', users_repo.stats),
+            StatsMetrics('roles_cache', roles_repo.stats),
+        )) \
+        .add_api(AuthApi(auth_ucs)) \
+        .add_api(PermissionsApi(auth_ucs, parse_id)) \
+        .add_api(UserApi(user_ucs, parse_id)) \
+        .add_api(UserListApi(user_ucs, parse_id))
+
+    # spans go to a JSON-lines file, or when asked to a buffer served by
+    # TracesApi; it is unauthenticated and only holds the traces of the
+    # worker answering, keep it for debugging
+    trace_file = os.environ.get('USERSVC_TRACE_FILE')
+    trace_buffer = int(os.environ.get('USERSVC_TRACE_BUFFER', 0))
+    if trace_file:
+        tracer.exporter = JsonLinesExporter(trace_file)
+    elif trace_buffer > 0:
+        tracer.exporter = RingBufferExporter(trace_buffer)
+        app.add_api(TracesApi(tracer.exporter))
+
+    app.configure()
+    return app
+
+
+def main(app_factory=create_app):
+    '''Serves the apps of app_factory, built in every worker after the
+    fork: each one has its own clients, hasher pool, caches and metrics'''
+    port = int(os.environ.get('USERSVC_PORT', 3000))
+    if os.environ.get('USERSVC_ENV') == 'development':
+        app_factory().run(port=port)
+        return
+
+    # fail once here rather than in every worker
+    token_signer()
+    print('Starting server at http://0.0.0.0:{}/'.format(port))
+    serve(
+        app_factory,
+        port=port,
+        workers=int(os.environ.get('USERSVC_WORKERS', 1)),
+        pool_size=int(os.environ.get('USERSVC_POOL_SIZE', 1000)),
+        factory=True,
+    )
@@ -1,11 +1,17 @@
-from .role import Role, RolesRepo
+from .generations import Generations, generations
+from .role import AsyncRolesRepo, Role, RolesRepo
 from .token import Token
-from .user import User, UsersRepo
+from .user import AsyncUsersRepo, DuplicatedUser, User, UsersRepo
 
 __all__ = [
+    'AsyncRolesRepo',
+    'AsyncUsersRepo',
+    'DuplicatedUser',
+    'Generations',
     'Role',
     'RolesRepo',
     'User',
     'UsersRepo',
     'Token',
+    'generations',
 ]
@@ -0,0 +1,31 @@
+from threading import Lock
+
+
+class Generations:
+    '''Write counters for roles and users, bumped by the repos
+
+    Per-user counters are striped over a fixed array, so memory stays
+    constant and a write to one user may also invalidate its neighbours.
+    '''
+
+    def __init__(self, stripes: int = 4096):
+        self.roles = 0
+        self._users = [0] * stripes
+        self._lock = Lock()
+
+    def user(self, uid: int) -> int:
+        return self._users[hash(uid) % len(self._users)]
+
+    def stamp(self, uid: int) -> tuple:
+        return (self.roles, self.user(uid))
+
+    def bump_roles(self):
+        with self._lock:
+            self.roles += 1
+
+    def bump_user(self, uid: int):
+        with self._lock:
+            self._users[hash(uid) % len(self._users)] += 1
+
+
+generations = Generations()
@@ -0,0 +1,52 @@
+from threading import Lock
+from typing import FrozenSet, Iterable
+
+
+class PermissionRegistry:
+    '''Interns permission names to bit positions'''
+
+    def __init__(self):
+        self._bits = {}
+        self._names = []
+        self._sets = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def bit(self, permission: str) -> int:
+        bit = self._bits.get(permission)
+        if bit is not None:
+            return bit
+
+        with self._lock:
+            bit = self._bits.get(permission)
+            if bit is None:
+                bit = 1 << len(self._names)
+                self._names.append(permission)
+                self._bits[permission] = bit
+
+            return bit
+
+    def lookup(self, permission: str) -> int:
+        return self._bits.get(permission, 0)
+
+    def mask(self, permissions: Iterable[str]) -> int:
+        mask = 0
+        for permission in permissions:
+            mask |= self.bit(permission)
+        return mask
+
+    def names(self, mask: int) -> FrozenSet[str]:
+        names = self._sets.get(mask)
+        if names is None:
+            names = frozenset(
+                name for pos, name in enumerate(self._names)
+                if mask >> pos & 1
+            )
+            self._sets[mask] = names
+
+        return names
+
+
+registry = PermissionRegistry()
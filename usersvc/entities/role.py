@@ -1,14 +1,23 @@
 from abc import ABC
 from typing import List
 
-from dataclasses import dataclass
+from utils.struct import Struct, field
 
+from .permission import registry
 
-@dataclass
-class Role:
+
+class Role(metaclass=Struct(slots=True)):
     name: str
     permissions: List[str]
     id: int = -1
+    permission_mask: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        mask = registry.mask(self.permissions)
+        object.__setattr__(self, 'permission_mask', mask)
+
+    def __hash__(self):
+        return hash(self.id)
 
 
 class RolesRepo(ABC):
@@ -18,6 +27,12 @@ class RolesRepo(ABC):
     def get_role_by_name(self, name: str) -> Role:
         raise NotImplementedError
 
+    def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        raise NotImplementedError
+
+    def get_roles_by_names(self, names: List[str]) -> List[Role]:
+        raise NotImplementedError
+
     def get_all_roles(self) -> List[Role]:
         raise NotImplementedError
 
@@ -29,3 +44,37 @@ class RolesRepo(ABC):
 
     def delete_role(self, role: Role) -> bool:
         raise NotImplementedError
+
+    def sync_version(self, version: int):
+        '''Roles version another repo read from the database, caches drop
+        the roles they loaded before it'''
+
+
+class AsyncRolesRepo(ABC):
+    async def get_role_by_id(self, uid: int) -> Role:
+        raise NotImplementedError
+
+    async def get_role_by_name(self, name: str) -> Role:
+        raise NotImplementedError
+
+    async def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        raise NotImplementedError
+
+    async def get_roles_by_names(self, names: List[str]) -> List[Role]:
+        raise NotImplementedError
+
+    async def get_all_roles(self) -> List[Role]:
+        raise NotImplementedError
+
+    async def create_role(self, role: Role) -> int:
+        raise NotImplementedError
+
+    async def update_role(self, role: Role) -> bool:
+        raise NotImplementedError
+
+    async def delete_role(self, role: Role) -> bool:
+        raise NotImplementedError
+
+    def sync_version(self, version: int):
+        '''Roles version another repo read from the database, caches drop
+        the roles they loaded before it'''
@@ -1,11 +1,11 @@
 from typing import List
 
-from dataclasses import dataclass
+from utils.struct import Struct
 
 
-@dataclass
-class Token:
+class Token(metaclass=Struct(slots=True)):
     token: str
     owner: str
     version: int
     permissions: List[str]
+    expires_at: int = 0
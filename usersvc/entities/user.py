@@ -1,26 +1,43 @@
 from abc import ABC
-from typing import List
+from typing import AsyncIterator, FrozenSet, Iterator, List
 
-from dataclasses import dataclass
+from utils.struct import Struct, field
 
+from .permission import registry
 from .role import Role
 
 
-@dataclass
-class User:
+class DuplicatedUser(Exception):
+    '''A write would give a user the username or email of another'''
+
+
+class User(metaclass=Struct(slots=True)):
     username: str
     fullname: str
     email: str
     password: str
     roles: List[Role]
     id: int = -1
+    # bumped by the repos on every write, for ETags
+    version: int = field(default=0, compare=False)
+    permission_mask: int = field(init=False, repr=False, compare=False)
 
-    @property
-    def permissions(self) -> List[str]:
-        permissions = []
+    def __post_init__(self):
+        mask = 0
         for role in self.roles:
-            permissions.extend(role.permissions)
-        return list(set(permissions))
+            mask |= role.permission_mask
+
+        object.__setattr__(self, 'permission_mask', mask)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def permissions(self) -> FrozenSet[str]:
+        return registry.names(self.permission_mask)
+
+    def has_permission(self, permission: str) -> bool:
+        return self.permission_mask & registry.lookup(permission) != 0
 
 
 class UsersRepo(ABC):
@@ -30,14 +47,90 @@ class UsersRepo(ABC):
     def get_user_by_name(self, name: str) -> User:
         raise NotImplementedError
 
+    def get_users_by_ids(self, uids: List[int]) -> List[User]:
+        raise NotImplementedError
+
     def get_all_users(self) -> List[User]:
         raise NotImplementedError
 
+    def get_users_page(self, limit: int, after: int = None) -> List[User]:
+        raise NotImplementedError
+
+    def iter_all_users(self, batch_size: int = 1000) -> Iterator[User]:
+        raise NotImplementedError
+
     def create_user(self, user: User) -> int:
         raise NotImplementedError
 
     def update_user(self, user: User) -> bool:
+        '''Raises DuplicatedUser on a taken username or email'''
         raise NotImplementedError
 
     def delete_user(self, user: User) -> bool:
         raise NotImplementedError
+
+    def create_and_get_user(self, user: User) -> User:
+        raise NotImplementedError
+
+    def update_and_get_user(self, user: User) -> User:
+        '''Raises DuplicatedUser on a taken username or email'''
+        raise NotImplementedError
+
+    def delete_and_get_user(self, uid: int) -> User:
+        raise NotImplementedError
+
+    def update_user_password(self, uid: int, password: str) -> bool:
+        raise NotImplementedError
+
+    def get_users_version(self) -> str:
+        raise NotImplementedError
+
+
+class AsyncUsersRepo(ABC):
+    async def get_user_by_id(self, uid: int) -> User:
+        raise NotImplementedError
+
+    async def get_user_by_name(self, name: str) -> User:
+        raise NotImplementedError
+
+    async def get_users_by_ids(self, uids: List[int]) -> List[User]:
+        raise NotImplementedError
+
+    async def get_all_users(self) -> List[User]:
+        raise NotImplementedError
+
+    async def get_users_page(
+            self,
+            limit: int,
+            after: int = None,
+    ) -> List[User]:
+        raise NotImplementedError
+
+    def iter_all_users(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        raise NotImplementedError
+
+    async def create_user(self, user: User) -> int:
+        raise NotImplementedError
+
+    async def update_user(self, user: User) -> bool:
+        '''Raises DuplicatedUser on a taken username or email'''
+        raise NotImplementedError
+
+    async def delete_user(self, user: User) -> bool:
+        raise NotImplementedError
+
+    async def create_and_get_user(self, user: User) -> User:
+        raise NotImplementedError
+
+    async def update_and_get_user(self, user: User) -> User:
+        '''Raises DuplicatedUser on a taken username or email'''
+        raise NotImplementedError
+
+    async def delete_and_get_user(self, uid: int) -> User:
+        raise NotImplementedError
+
+    async def update_user_password(self, uid: int, password: str) -> bool:
+        raise NotImplementedError
+
+    async def get_users_version(self) -> str:
+        raise NotImplementedError
@@ -1,8 +1,9 @@
-from .auth import AuthApi
+from .auth import AuthApi, PermissionsApi
 from .users import UserApi, UserListApi
 
 __all__ = [
     'AuthApi',
+    'PermissionsApi',
     'UserApi',
     'UserListApi',
 ]
@@ -1,3 +1,5 @@
+from zlib import crc32
+
 from usersvc.entities import Role, User
 
 
@@ -11,6 +13,16 @@ def user_asjson(user: User) -> dict:
     }
 
 
+def user_etag(user: User) -> str:
+    # role names are part of the body but not of the user version
+    names = ','.join(role.name for role in user.roles).encode()
+    return 'W/"{}.{}.{:x}"'.format(user.id, user.version, crc32(names))
+
+
+def users_etag(version: str) -> str:
+    return 'W/"{}"'.format(version)
+
+
 def role_asjson(role: Role) -> dict:
     return {
         'id': role.id,
@@ -1,6 +1,14 @@
 from http import HTTPStatus as http_status
 
-from usersvc.use_cases.auth import AuthUseCases, UserLoginRequest
+from usersvc.use_cases.auth import (
+    MAX_PERMISSION_CHECKS,
+    AuthUseCases,
+    UserHasPermissionRequest,
+    UserLoginRequest,
+    UsersHavePermissionsRequest,
+    permission_name
+)
+from usersvc.use_cases.password import PasswordHasherBusy
 from utils.http import Api, Request, Response, json_response
 
 
@@ -37,7 +45,14 @@ class AuthApi:
             username=data['username'],
             password=data['password'],
         )
-        token = self.ucs.user_login(req)
+        try:
+            token = self.ucs.user_login(req)
+        except PasswordHasherBusy:
+            return Response(
+                'Too many login requests',
+                status=http_status.SERVICE_UNAVAILABLE,
+            )
+
         if not token:
             return Response(
                 'Username or password incorrect',
@@ -47,3 +62,43 @@ class AuthApi:
         return json_response({
             'token': token.token,
         })
+
+
+class PermissionsApi:
+    api = Api('/api/permissions/check')
+
+    def __init__(self, ucs: AuthUseCases, parse_id=int):
+        self.ucs = ucs
+        self.parse_id = parse_id
+
+    @api.post
+    def check_permissions(self, req: Request):
+        try:
+            data = req.json
+        except ValueError:
+            return Response(
+                'invalid request body',
+                status=http_status.UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        try:
+            checks = data['checks']
+            if len(checks) > MAX_PERMISSION_CHECKS:
+                raise ValueError('too many checks')
+
+            req = UsersHavePermissionsRequest(checks=[
+                UserHasPermissionRequest(
+                    user_id=self.parse_id(check['user_id']),
+                    permission=permission_name(check['permission']),
+                )
+                for check in checks
+            ])
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                'Invalid permission checks',
+                status=http_status.BAD_REQUEST,
+            )
+
+        return json_response({
+            'results': self.ucs.users_have_permissions(req),
+        })
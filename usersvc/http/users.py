@@ -1,30 +1,85 @@
 from http import HTTPStatus as http_status
 
 from usersvc.entities import User
+from usersvc.use_cases.password import PasswordHasherBusy
 from usersvc.use_cases.user import (
     CreateUserRequest,
     DeleteUserRequest,
     GetUserByIdRequest,
+    ListUsersRequest,
     UpdateUserRequest,
     UserUseCases
 )
-from utils.http import Api, Request, Response, json_response
+from utils.http import (
+    Api,
+    Request,
+    Response,
+    json_response,
+    json_stream_response,
+    not_modified
+)
+
+from .adapters import user_asjson, user_etag, users_etag
+
+
+def list_users_request(query: dict, parse_id=int) -> ListUsersRequest:
+    req = ListUsersRequest()
+    if 'limit' in query:
+        req.limit = int(query['limit'])
+    if 'after' in query:
+        req.after = parse_id(query['after'])
+
+    return req
 
-from .adapters import user_asjson
+
+def hasher_busy_response() -> Response:
+    return Response(
+        'Too many password changes',
+        status=http_status.SERVICE_UNAVAILABLE,
+    )
 
 
 class UserListApi:
+    '''parse_id turns ids in requests into the ids of the users repo,
+    the parse_id of its id allocator'''
     api = Api('/api/users')
 
-    def __init__(self, ucs: UserUseCases):
+    def __init__(self, ucs: UserUseCases, parse_id=int):
         self.ucs = ucs
+        self.parse_id = parse_id
 
     @api.get
-    def list_users(self, _):
-        users = self.ucs.get_all_users()
-        return json_response({
-            'users': [user_asjson(user) for user in users],
-        })
+    def list_users(self, req: Request):
+        # read before the users, a write in between only makes it older
+        etag = users_etag(self.ucs.get_users_version())
+        resp = not_modified(req, etag)
+        if resp is not None:
+            return resp
+
+        if 'limit' not in req.query and 'after' not in req.query:
+            users = self.ucs.iter_all_users()
+            return json_stream_response(
+                'users',
+                (user_asjson(user) for user in users),
+                headers={'ETag': etag},
+            )
+
+        try:
+            req = list_users_request(req.query, self.parse_id)
+        except ValueError:
+            return Response(
+                'Invalid pagination parameters',
+                status=http_status.BAD_REQUEST,
+            )
+
+        page = self.ucs.list_users(req)
+        return json_response(
+            {
+                'users': [user_asjson(user) for user in page.users],
+                'next': page.next,
+            },
+            headers={'ETag': etag},
+        )
 
     @api.post
     def create_user(self, req: Request):
@@ -36,7 +91,11 @@ class UserListApi:
             password=data.get('password'),
             roles=data.get('roles'),
         )
-        user = self.ucs.create_user(req)
+        try:
+            user = self.ucs.create_user(req)
+        except PasswordHasherBusy:
+            return hasher_busy_response()
+
         if not isinstance(user, User):
             return Response('Duplicated data', status=http_status.CONFLICT)
 
@@ -44,39 +103,69 @@ class UserListApi:
 
 
 class UserApi:
+    '''Unknown users and ids parse_id rejects are both not found'''
     api = Api('/api/users/{uid}')
 
-    def __init__(self, ucs: UserUseCases):
+    def __init__(self, ucs: UserUseCases, parse_id=int):
         self.ucs = ucs
+        self.parse_id = parse_id
+
+    def _user_id(self, uid: str):
+        try:
+            return self.parse_id(uid)
+        except ValueError:
+            return None
 
     @api.get
-    def get_user(self, _, uid: str):
-        req = GetUserByIdRequest(id=int(uid))
-        user = self.ucs.get_user_by_id(req)
+    def get_user(self, req: Request, uid: str):
+        uid = self._user_id(uid)
+        if uid is None:
+            return Response(status=http_status.NOT_FOUND)
+
+        user = self.ucs.get_user_by_id(GetUserByIdRequest(id=uid))
         if not user:
             return Response(status=http_status.NOT_FOUND)
 
-        return json_response(user_asjson(user))
+        etag = user_etag(user)
+        resp = not_modified(req, etag)
+        if resp is not None:
+            return resp
+
+        return json_response(user_asjson(user), headers={'ETag': etag})
 
     @api.put
     def update_user(self, req: Request, uid: str):
+        uid = self._user_id(uid)
+        if uid is None:
+            return Response('User not found', status=http_status.NOT_FOUND)
+
         data = req.json
         req = UpdateUserRequest(
-            id=int(uid),
+            id=uid,
             fullname=data.get('fullname'),
             email=data.get('email'),
             password=data.get('password'),
             roles=data.get('roles'),
         )
-        user = self.ucs.update_user(req)
+        try:
+            user = self.ucs.update_user(req)
+        except PasswordHasherBusy:
+            return hasher_busy_response()
+
         if not user:
             return Response('User not found', status=http_status.NOT_FOUND)
+        if not isinstance(user, User):
+            return Response('Duplicated data', status=http_status.CONFLICT)
 
         return json_response(user_asjson(user))
 
     @api.delete
     def delete_user(self, _, uid: str):
-        req = DeleteUserRequest(id=int(uid))
+        uid = self._user_id(uid)
+        if uid is None:
+            return Response(status=http_status.NOT_FOUND)
+
+        req = DeleteUserRequest(id=uid)
         user = self.ucs.delete_user(req)
         if not user:
             return Response(status=http_status.NOT_FOUND)
@@ -0,0 +1,11 @@
+from .ids import AsyncHiLoIdAllocator, AsyncIdAllocator, AsyncUlidIdAllocator
+from .roles import AsyncRolesRepoMongo
+from .users import AsyncUsersRepoMongo
+
+__all__ = [
+    'AsyncHiLoIdAllocator',
+    'AsyncIdAllocator',
+    'AsyncRolesRepoMongo',
+    'AsyncUlidIdAllocator',
+    'AsyncUsersRepoMongo',
+]
@@ -0,0 +1,63 @@
+from abc import ABC
+from asyncio import Lock
+
+from pymongo import ReturnDocument
+
+from usersvc.repos.mongo.ids import LEGACY_MAX_ID, UlidIdAllocator
+from utils.querystats import AsyncCountedCollection
+
+
+class AsyncIdAllocator(ABC):
+    async def next_id(self):
+        raise NotImplementedError
+
+    def parse_id(self, value):
+        '''Id from its text in urls and payloads, ValueError if invalid'''
+        return int(value)
+
+
+class AsyncHiLoIdAllocator(AsyncIdAllocator):
+    def __init__(
+            self,
+            client,
+            name: str,
+            block_size: int = 1000,
+            min_id: int = LEGACY_MAX_ID + 1,
+    ):
+        self.coll = AsyncCountedCollection(client.auth.counters)
+        self.name = name
+        self.block_size = block_size
+        self.min_id = min_id
+        self._next = 0
+        self._limit = 0
+        self._lock = Lock()
+
+    async def next_id(self) -> int:
+        async with self._lock:
+            if self._next >= self._limit:
+                self._limit = await self._reserve_block()
+                self._next = self._limit - self.block_size
+
+            uid = self._next
+            self._next += 1
+            return uid
+
+    async def _reserve_block(self) -> int:
+        data = await self.coll.find_one_and_update(
+            {'_id': self.name},
+            {'$inc': {'next': self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return self.min_id + data['next']
+
+
+class AsyncUlidIdAllocator(AsyncIdAllocator):
+    def __init__(self):
+        self.ids = UlidIdAllocator()
+
+    async def next_id(self) -> str:
+        return self.ids.next_id()
+
+    def parse_id(self, value) -> str:
+        return self.ids.parse_id(value)
@@ -0,0 +1,99 @@
+from typing import List
+
+from pymongo import ASCENDING
+
+from usersvc.entities import AsyncRolesRepo, Generations, Role, generations
+from usersvc.repos.mongo.adapters import role_asbson, role_frombson
+from utils.querystats import AsyncCountedCollection
+from utils.tracing import trace_methods
+
+from .ids import AsyncHiLoIdAllocator, AsyncIdAllocator
+
+
+@trace_methods('AsyncRolesRepoMongo')
+class AsyncRolesRepoMongo(AsyncRolesRepo):
+    def __init__(
+            self,
+            client,
+            ids: AsyncIdAllocator = None,
+            gens: Generations = generations,
+    ):
+        self.coll = AsyncCountedCollection(client.auth.roles)
+        self.counters = AsyncCountedCollection(client.auth.counters)
+        self.ids = ids if ids else AsyncHiLoIdAllocator(client, 'roles')
+        self.gens = gens
+
+    async def ensure_indexes(self):
+        await self.coll.create_index([('name', ASCENDING)], unique=True)
+
+    async def get_role_by_id(self, uid: int) -> Role:
+        data = await self.coll.find_one({'_id': uid})
+        if data is None:
+            return None
+
+        return role_frombson(data)
+
+    async def get_role_by_name(self, name: str) -> Role:
+        data = await self.coll.find_one({'name': name})
+        if data is None:
+            return None
+
+        return role_frombson(data)
+
+    async def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        if not uids:
+            return []
+
+        return await self._find({'_id': {'$in': list(uids)}})
+
+    async def get_roles_by_names(self, names: List[str]) -> List[Role]:
+        if not names:
+            return []
+
+        return await self._find({'name': {'$in': list(names)}})
+
+    async def get_all_roles(self) -> List[Role]:
+        return await self._find({})
+
+    async def create_role(self, role: Role) -> int:
+        insert_data = role_asbson(role)
+        insert_data['_id'] = await self.ids.next_id()
+        data = await self.coll.insert_one(insert_data)
+        return data.inserted_id
+
+    async def update_role(self, role: Role) -> bool:
+        data = await self.coll.update_one(
+            {
+                '_id': role.id
+            },
+            {'$set': role_asbson(role)},
+        )
+        self.gens.bump_roles()
+        if data.matched_count < 1:
+            return False
+
+        await self._bump_version()
+        return True
+
+    async def delete_role(self, role: Role) -> bool:
+        data = await self.coll.delete_one({
+            '_id': role.id,
+        })
+        self.gens.bump_roles()
+        if data.deleted_count < 1:
+            return False
+
+        await self._bump_version()
+        return True
+
+    async def _bump_version(self):
+        # users are read with the names of their roles, see users_version
+        await self.counters.update_one(
+            {'_id': 'roles'},
+            {'$inc': {'version': 1}},
+            upsert=True,
+        )
+
+    async def _find(self, query: dict) -> List[Role]:
+        data = await self.coll.find(query).to_list(length=None)
+        return [role_frombson(role) for role in data]
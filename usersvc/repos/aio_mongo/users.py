@@ -0,0 +1,233 @@
+from asyncio import ensure_future
+from typing import AsyncIterator, Dict, Iterable, List
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from usersvc.entities import (
+    AsyncRolesRepo,
+    AsyncUsersRepo,
+    DuplicatedUser,
+    Generations,
+    Role,
+    User,
+    generations
+)
+from usersvc.repos.mongo.adapters import (
+    roles_index,
+    user_asbson,
+    user_frombson,
+    user_update_asbson,
+    users_version
+)
+from utils.querystats import AsyncCountedCollection
+from utils.tracing import trace_methods
+
+from .ids import AsyncHiLoIdAllocator, AsyncIdAllocator
+
+
+@trace_methods('AsyncUsersRepoMongo')
+class AsyncUsersRepoMongo(AsyncUsersRepo):
+    def __init__(
+            self,
+            client,
+            roles_repo: AsyncRolesRepo,
+            ids: AsyncIdAllocator = None,
+            gens: Generations = generations,
+    ):
+        self.coll = AsyncCountedCollection(client.auth.users)
+        self.counters = AsyncCountedCollection(client.auth.counters)
+        self.roles_repo = roles_repo
+        self.ids = ids if ids else AsyncHiLoIdAllocator(client, 'users')
+        self.gens = gens
+
+    async def ensure_indexes(self):
+        await self.coll.create_index([('username', ASCENDING)], unique=True)
+        await self.coll.create_index([('email', ASCENDING)], unique=True)
+
+    async def _get_roles(self, roles_ids: Iterable[int]) -> Dict[int, Role]:
+        roles = await self.roles_repo.get_roles_by_ids(list(roles_ids))
+        return roles_index(roles)
+
+    async def _users_frombson(self, data: List[dict]) -> List[User]:
+        roles_ids = set()
+        for user in data:
+            roles_ids.update(user['roles'])
+
+        roles = await self._get_roles(roles_ids)
+        return [user_frombson(user, roles) for user in data]
+
+    async def _find_page(self, limit: int, after: int = None) -> List[dict]:
+        query = {} if after is None else {'_id': {'$gt': after}}
+        cursor = self.coll.find(query).sort('_id', ASCENDING).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def get_user_by_id(self, uid: int) -> User:
+        data = await self.coll.find_one({'_id': uid})
+        if data is None:
+            return None
+
+        roles = await self._get_roles(data['roles'])
+        return user_frombson(data, roles)
+
+    async def get_user_by_name(self, name: str) -> User:
+        data = await self.coll.find_one({'username': name})
+        if data is None:
+            return None
+
+        roles = await self._get_roles(data['roles'])
+        return user_frombson(data, roles)
+
+    async def get_users_by_ids(self, uids: List[int]) -> List[User]:
+        if not uids:
+            return []
+
+        cursor = self.coll.find({'_id': {'$in': list(uids)}})
+        data = await cursor.to_list(length=None)
+        return await self._users_frombson(data)
+
+    async def get_all_users(self) -> List[User]:
+        data = await self.coll.find().to_list(length=None)
+        return await self._users_frombson(data)
+
+    async def get_users_page(
+            self,
+            limit: int,
+            after: int = None,
+    ) -> List[User]:
+        data = await self._find_page(limit, after)
+        return await self._users_frombson(data)
+
+    async def iter_all_users(
+            self,
+            batch_size: int = 1000,
+    ) -> AsyncIterator[User]:
+        next_page = None
+        try:
+            data = await self._find_page(batch_size)
+            while data:
+                # fetch the next page while this one has its roles resolved
+                if len(data) == batch_size:
+                    next_page = ensure_future(
+                        self._find_page(batch_size, data[-1]['_id']),
+                    )
+
+                for user in await self._users_frombson(data):
+                    yield user
+
+                if next_page is None:
+                    return
+
+                data = await next_page
+                next_page = None
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def create_user(self, user: User) -> int:
+        insert_data = user_asbson(user)
+        insert_data['version'] = 1
+        insert_data['_id'] = await self.ids.next_id()
+        try:
+            data = await self.coll.insert_one(insert_data)
+        except DuplicateKeyError:
+            return None
+
+        self.gens.bump_user(data.inserted_id)
+        await self._bump_version()
+        return data.inserted_id
+
+    async def update_user(self, user: User) -> bool:
+        try:
+            data = await self.coll.update_one(
+                {
+                    '_id': user.id
+                },
+                {'$set': user_asbson(user), '$inc': {'version': 1}},
+            )
+        except DuplicateKeyError:
+            raise DuplicatedUser(user.id)
+
+        self.gens.bump_user(user.id)
+        if data.matched_count < 1:
+            return False
+
+        await self._bump_version()
+        return True
+
+    async def delete_user(self, user: User) -> bool:
+        data = await self.coll.delete_one({
+            '_id': user.id,
+        })
+        self.gens.bump_user(user.id)
+        if data.deleted_count < 1:
+            return False
+
+        await self._bump_version()
+        return True
+
+    async def create_and_get_user(self, user: User) -> User:
+        user_id = await self.create_user(user)
+        if user_id is None:
+            return None
+
+        return user.replace(id=user_id, version=1)
+
+    async def update_and_get_user(self, user: User) -> User:
+        try:
+            data = await self.coll.find_one_and_update(
+                {
+                    '_id': user.id
+                },
+                {'$set': user_update_asbson(user), '$inc': {'version': 1}},
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            raise DuplicatedUser(user.id)
+
+        self.gens.bump_user(user.id)
+        if data is None:
+            return None
+
+        await self._bump_version()
+        return user_frombson(data, roles_index(user.roles))
+
+    async def delete_and_get_user(self, uid: int) -> User:
+        data = await self.coll.find_one_and_delete({'_id': uid})
+        self.gens.bump_user(uid)
+        if data is None:
+            return None
+
+        await self._bump_version()
+        roles = await self._get_roles(data['roles'])
+        return user_frombson(data, roles)
+
+    async def update_user_password(self, uid: int, password: str) -> bool:
+        data = await self.coll.update_one(
+            {
+                '_id': uid
+            },
+            {'$set': {'password': password}},
+        )
+        return data.matched_count >= 1
+
+    async def get_users_version(self) -> str:
+        data = await self.counters.find(
+            {'_id': {'$in': ['users', 'roles']}},
+            {'version': True},
+        ).to_list(length=None)
+        versions = {
+            counter['_id']: counter.get('version', 0) for counter in data
+        }
+        # the users read next get their role names from roles_repo
+        self.roles_repo.sync_version(versions.get('roles', 0))
+        return users_version(versions)
+
+    async def _bump_version(self):
+        # after the write: a version read in between is only older than
+        # the users read with it
+        await self.counters.update_one(
+            {'_id': 'users'},
+            {'$inc': {'version': 1}},
+            upsert=True,
+        )
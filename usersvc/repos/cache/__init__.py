@@ -0,0 +1,7 @@
+from .roles import CachedRolesRepo
+from .users import CachedUsersRepo
+
+__all__ = [
+    'CachedRolesRepo',
+    'CachedUsersRepo',
+]
@@ -0,0 +1,124 @@
+from threading import Lock
+from time import monotonic
+from typing import List
+
+from usersvc.entities import Generations, Role, RolesRepo, generations
+
+
+class RolesTable:
+    def __init__(self, roles: List[Role], version: int, loaded_at: float):
+        self.roles = roles
+        self.by_id = {role.id: role for role in roles}
+        self.by_name = {role.name: role for role in roles}
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+class CachedRolesRepo(RolesRepo):
+    '''Roles table kept in memory, reloaded on TTL expiry or role writes
+
+    invalidate bumps the roles generation again once the table is gone:
+    a decision stamped with the bump of the inner repo could still have
+    been computed from the old table. Writes by other processes are only
+    seen on TTL expiry, or when the users repo reads a newer version.
+    '''
+
+    def __init__(
+            self,
+            repo: RolesRepo,
+            ttl: float = 60.0,
+            clock=monotonic,
+            gens: Generations = generations,
+    ):
+        self.repo = repo
+        self.ttl = ttl
+        self.clock = clock
+        self.gens = gens
+        self.version = 0
+        self.db_version = None
+        self.hits = 0
+        self.misses = 0
+        self._table = None
+        self._lock = Lock()
+
+    def get_role_by_id(self, uid: int) -> Role:
+        return self._get_table().by_id.get(uid)
+
+    def get_role_by_name(self, name: str) -> Role:
+        return self._get_table().by_name.get(name)
+
+    def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        by_id = self._get_table().by_id
+        return [by_id[uid] for uid in uids if uid in by_id]
+
+    def get_roles_by_names(self, names: List[str]) -> List[Role]:
+        by_name = self._get_table().by_name
+        return [by_name[name] for name in names if name in by_name]
+
+    def get_all_roles(self) -> List[Role]:
+        return list(self._get_table().roles)
+
+    def create_role(self, role: Role) -> int:
+        try:
+            return self.repo.create_role(role)
+        finally:
+            self.invalidate()
+
+    def update_role(self, role: Role) -> bool:
+        try:
+            return self.repo.update_role(role)
+        finally:
+            self.invalidate()
+
+    def delete_role(self, role: Role) -> bool:
+        try:
+            return self.repo.delete_role(role)
+        finally:
+            self.invalidate()
+
+    def sync_version(self, version: int):
+        with self._lock:
+            if version == self.db_version:
+                return
+
+            self.db_version = version
+
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._table = None
+
+        self.gens.bump_roles()
+
+    def stats(self) -> dict:
+        return {
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _is_fresh(self, table: RolesTable) -> bool:
+        if table is None or table.version != self.version:
+            return False
+
+        return self.clock() - table.loaded_at < self.ttl
+
+    def _get_table(self) -> RolesTable:
+        table = self._table
+        if self._is_fresh(table):
+            self.hits += 1
+            return table
+
+        with self._lock:
+            table = self._table
+            if self._is_fresh(table):
+                self.hits += 1
+                return table
+
+            self.misses += 1
+            roles = list(self.repo.get_all_roles())
+            table = RolesTable(roles, self.version, self.clock())
+            self._table = table
+            return table
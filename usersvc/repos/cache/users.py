@@ -0,0 +1,233 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Iterator, List
+
+from usersvc.entities import Generations, User, UsersRepo, generations
+
+
+class UserEntry:
+    def __init__(self, user: User, expires_at: float, roles_version: int):
+        self.user = user
+        self.expires_at = expires_at
+        self.roles_version = roles_version
+
+
+class CachedUsersRepo(UsersRepo):
+    '''Read-through LRU of users, keyed by id and by username
+
+    invalidate bumps the user generation again once the entry is gone,
+    see CachedRolesRepo.
+    '''
+
+    def __init__(
+            self,
+            repo: UsersRepo,
+            max_size: int = 10000,
+            ttl: float = 30.0,
+            roles_repo=None,
+            clock=monotonic,
+            gens: Generations = generations,
+    ):
+        self.repo = repo
+        self.max_size = max_size
+        self.ttl = ttl
+        self.roles_repo = roles_repo
+        self.clock = clock
+        self.gens = gens
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._names = {}
+        self._generation = 0
+        self._lock = Lock()
+
+    def get_user_by_id(self, uid: int) -> User:
+        user = self._get(uid)
+        if user is not None:
+            return user
+
+        stamp = self._stamp()
+        user = self.repo.get_user_by_id(uid)
+        self._put(user, stamp)
+        return user
+
+    def get_user_by_name(self, name: str) -> User:
+        user = self._get(self._names.get(name))
+        if user is not None:
+            return user
+
+        stamp = self._stamp()
+        user = self.repo.get_user_by_name(name)
+        self._put(user, stamp)
+        return user
+
+    def get_users_by_ids(self, uids: List[int]) -> List[User]:
+        users = []
+        missing = []
+        for uid in uids:
+            user = self._get(uid)
+            if user is None:
+                missing.append(uid)
+            else:
+                users.append(user)
+
+        if not missing:
+            return users
+
+        stamp = self._stamp()
+        for user in self.repo.get_users_by_ids(missing):
+            self._put(user, stamp)
+            users.append(user)
+
+        return users
+
+    def get_all_users(self) -> List[User]:
+        return self.repo.get_all_users()
+
+    def get_users_page(self, limit: int, after: int = None) -> List[User]:
+        return self.repo.get_users_page(limit, after)
+
+    def iter_all_users(self, batch_size: int = 1000) -> Iterator[User]:
+        return self.repo.iter_all_users(batch_size)
+
+    def create_user(self, user: User) -> int:
+        try:
+            return self.repo.create_user(user)
+        finally:
+            self.invalidate_name(user.username)
+
+    def update_user(self, user: User) -> bool:
+        try:
+            return self.repo.update_user(user)
+        finally:
+            self.invalidate(user.id)
+
+    def delete_user(self, user: User) -> bool:
+        try:
+            return self.repo.delete_user(user)
+        finally:
+            self.invalidate(user.id)
+
+    def create_and_get_user(self, user: User) -> User:
+        try:
+            return self.repo.create_and_get_user(user)
+        finally:
+            self.invalidate_name(user.username)
+
+    def update_and_get_user(self, user: User) -> User:
+        try:
+            return self.repo.update_and_get_user(user)
+        finally:
+            self.invalidate(user.id)
+
+    def delete_and_get_user(self, uid: int) -> User:
+        try:
+            return self.repo.delete_and_get_user(uid)
+        finally:
+            self.invalidate(uid)
+
+    def update_user_password(self, uid: int, password: str) -> bool:
+        try:
+            return self.repo.update_user_password(uid, password)
+        finally:
+            self.invalidate(uid)
+
+    def get_users_version(self) -> str:
+        return self.repo.get_users_version()
+
+    def invalidate(self, uid: int):
+        with self._lock:
+            self._generation += 1
+            self._remove(uid)
+
+        self.gens.bump_user(uid)
+
+    def invalidate_name(self, name: str):
+        '''Drops the entry cached under a username, and the loads running
+        when it was taken'''
+        with self._lock:
+            self._generation += 1
+            uid = self._names.get(name)
+            if uid is not None:
+                self._remove(uid)
+
+        if uid is not None:
+            self.gens.bump_user(uid)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._names.clear()
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
+
+    def _roles_version(self) -> int:
+        if self.roles_repo is None:
+            return 0
+
+        return self.roles_repo.version
+
+    def _stamp(self) -> tuple:
+        '''Taken before loading users, entries carry the roles version
+        the load started from, a role write during it expires them'''
+        return self._generation, self._roles_version()
+
+    def _get(self, uid: int) -> User:
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= self.clock() or \
+                    entry.roles_version != self._roles_version():
+                self._remove(uid)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(uid)
+            self.hits += 1
+            return entry.user
+
+    def _put(self, user: User, stamp: tuple):
+        if user is None:
+            return
+
+        generation, roles_version = stamp
+        with self._lock:
+            # a write landed while the user was loading, it may be stale
+            if generation != self._generation:
+                return
+
+            self._remove(user.id)
+            self._entries[user.id] = UserEntry(
+                user,
+                self.clock() + self.ttl,
+                roles_version,
+            )
+            self._names[user.username] = user.id
+            while len(self._entries) > self.max_size:
+                _, entry = self._entries.popitem(last=False)
+                self._remove_name(entry)
+                self.evictions += 1
+
+    def _remove(self, uid: int):
+        entry = self._entries.pop(uid, None)
+        if entry is not None:
+            self._remove_name(entry)
+
+    def _remove_name(self, entry: UserEntry):
+        if self._names.get(entry.user.username) == entry.user.id:
+            del self._names[entry.user.username]
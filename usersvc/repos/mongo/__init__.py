@@ -1,7 +1,11 @@
+from .ids import HiLoIdAllocator, IdAllocator, UlidIdAllocator
 from .roles import RolesRepoMongo
 from .users import UsersRepoMongo
 
 __all__ = [
+    'HiLoIdAllocator',
+    'IdAllocator',
     'RolesRepoMongo',
+    'UlidIdAllocator',
     'UsersRepoMongo',
 ]
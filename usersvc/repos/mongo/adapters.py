@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, Iterable
 
 from usersvc.entities import Role, User
 
@@ -17,10 +17,32 @@ def user_asbson(user: User) -> dict:
     return data
 
 
-def user_frombson(data: dict, roles: List[Role]) -> User:
+def user_update_asbson(user: User) -> dict:
+    data = user_asbson(user)
+    if user.username is None:
+        del data['username']
+
+    return data
+
+
+def users_version(versions: dict) -> str:
+    '''Version of the users collection from the users and roles counters,
+    users are read with the names of their roles'''
+    return '{}.{}'.format(
+        versions.get('users', 0),
+        versions.get('roles', 0),
+    )
+
+
+def roles_index(roles: Iterable[Role]) -> Dict[int, Role]:
+    return {role.id: role for role in roles}
+
+
+def user_frombson(data: dict, roles: Dict[int, Role]) -> User:
     user_roles = []
-    for role in roles:
-        if role.id in data['roles']:
+    for role_id in data['roles']:
+        role = roles.get(role_id)
+        if role is not None:
             user_roles.append(role)
 
     return User(
@@ -30,6 +52,7 @@ def user_frombson(data: dict, roles: List[Role]) -> User:
         fullname=data.get('fullname'),
         password=data.get('password'),
         roles=user_roles,
+        version=data.get('version', 0),
     )
 
 
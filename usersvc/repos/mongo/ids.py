@@ -0,0 +1,68 @@
+from abc import ABC
+from threading import Lock
+
+import ulid
+from pymongo import MongoClient, ReturnDocument
+
+from utils.querystats import CountedCollection
+
+# ids were drawn from randint(0, 100000) before the allocators existed
+LEGACY_MAX_ID = 100000
+
+
+class IdAllocator(ABC):
+    def next_id(self):
+        raise NotImplementedError
+
+    def parse_id(self, value):
+        '''Id from its text in urls and payloads, ValueError if invalid'''
+        return int(value)
+
+
+class HiLoIdAllocator(IdAllocator):
+    '''Hands out ids from blocks reserved with one counter update each'''
+
+    def __init__(
+            self,
+            client: MongoClient,
+            name: str,
+            block_size: int = 1000,
+            min_id: int = LEGACY_MAX_ID + 1,
+    ):
+        self.coll = CountedCollection(client.auth.counters)
+        self.name = name
+        self.block_size = block_size
+        self.min_id = min_id
+        self._next = 0
+        self._limit = 0
+        self._lock = Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self._next >= self._limit:
+                self._limit = self._reserve_block()
+                self._next = self._limit - self.block_size
+
+            uid = self._next
+            self._next += 1
+            return uid
+
+    def _reserve_block(self) -> int:
+        data = self.coll.find_one_and_update(
+            {'_id': self.name},
+            {'$inc': {'next': self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return self.min_id + data['next']
+
+
+class UlidIdAllocator(IdAllocator):
+    def next_id(self) -> str:
+        return ulid.new().str
+
+    def parse_id(self, value) -> str:
+        if not isinstance(value, str):
+            raise ValueError('ULIDs are strings')
+
+        return ulid.from_str(value).str
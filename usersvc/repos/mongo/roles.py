@@ -1,16 +1,30 @@
-from random import randint
 from typing import List
 
-from pymongo import MongoClient
+from pymongo import ASCENDING, MongoClient
 
-from usersvc.entities import Role, RolesRepo
+from usersvc.entities import Generations, Role, RolesRepo, generations
+from utils.querystats import CountedCollection
+from utils.tracing import trace_methods
 
 from .adapters import role_asbson, role_frombson
+from .ids import HiLoIdAllocator, IdAllocator
 
 
+@trace_methods('RolesRepoMongo')
 class RolesRepoMongo(RolesRepo):
-    def __init__(self, client: MongoClient):
-        self.coll = client.auth.roles
+    def __init__(
+            self,
+            client: MongoClient,
+            ids: IdAllocator = None,
+            gens: Generations = generations,
+    ):
+        self.coll = CountedCollection(client.auth.roles)
+        self.counters = CountedCollection(client.auth.counters)
+        self.ids = ids if ids else HiLoIdAllocator(client, 'roles')
+        self.gens = gens
+
+    def ensure_indexes(self):
+        self.coll.create_index([('name', ASCENDING)], unique=True)
 
     def get_role_by_id(self, uid: int) -> Role:
         data = self.coll.find_one({'_id': uid})
@@ -26,13 +40,27 @@ class RolesRepoMongo(RolesRepo):
 
         return role_frombson(data)
 
+    def get_roles_by_ids(self, uids: List[int]) -> List[Role]:
+        if not uids:
+            return []
+
+        data = self.coll.find({'_id': {'$in': list(uids)}})
+        return [role_frombson(role) for role in data]
+
+    def get_roles_by_names(self, names: List[str]) -> List[Role]:
+        if not names:
+            return []
+
+        data = self.coll.find({'name': {'$in': list(names)}})
+        return [role_frombson(role) for role in data]
+
     def get_all_roles(self) -> List[Role]:
         data = self.coll.find()
         return [role_frombson(role) for role in data]
 
     def create_role(self, role: Role) -> int:
         insert_data = role_asbson(role)
-        insert_data['_id'] = randint(0, 100000)
+        insert_data['_id'] = self.ids.next_id()
         data = self.coll.insert_one(insert_data)
         return data.inserted_id
 
@@ -43,10 +71,28 @@ class RolesRepoMongo(RolesRepo):
             },
             {'$set': role_asbson(role)},
         )
-        return data.matched_count >= 1
+        self.gens.bump_roles()
+        if data.matched_count < 1:
+            return False
+
+        self._bump_version()
+        return True
 
     def delete_role(self, role: Role) -> bool:
         data = self.coll.delete_one({
             '_id': role.id,
         })
-        return data.deleted_count >= 1
+        self.gens.bump_roles()
+        if data.deleted_count < 1:
+            return False
+
+        self._bump_version()
+        return True
+
+    def _bump_version(self):
+        # users are read with the names of their roles, see users_version
+        self.counters.update_one(
+            {'_id': 'roles'},
+            {'$inc': {'version': 1}},
+            upsert=True,
+        )
@@ -1,27 +1,59 @@
-from random import randint
-from typing import List
+from typing import Dict, Iterable, Iterator, List
 
-from pymongo import MongoClient
+from pymongo import ASCENDING, MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from usersvc.entities import Role, RolesRepo, User, UsersRepo
+from usersvc.entities import (
+    DuplicatedUser,
+    Generations,
+    Role,
+    RolesRepo,
+    User,
+    UsersRepo,
+    generations
+)
+from utils.querystats import CountedCollection
+from utils.tracing import trace_methods
 
-from .adapters import user_asbson, user_frombson
+from .adapters import (
+    roles_index,
+    user_asbson,
+    user_frombson,
+    user_update_asbson,
+    users_version
+)
+from .ids import HiLoIdAllocator, IdAllocator
 
 
+@trace_methods('UsersRepoMongo')
 class UsersRepoMongo(UsersRepo):
-    def __init__(self, client: MongoClient, roles_repo: RolesRepo):
-        self.coll = client.auth.users
+    def __init__(
+            self,
+            client: MongoClient,
+            roles_repo: RolesRepo,
+            ids: IdAllocator = None,
+            gens: Generations = generations,
+    ):
+        self.coll = CountedCollection(client.auth.users)
+        self.counters = CountedCollection(client.auth.counters)
         self.roles_repo = roles_repo
+        self.ids = ids if ids else HiLoIdAllocator(client, 'users')
+        self.gens = gens
 
-    def _get_roles(self) -> List[Role]:
-        return self.roles_repo.get_all_roles()
+    def ensure_indexes(self):
+        self.coll.create_index([('username', ASCENDING)], unique=True)
+        self.coll.create_index([('email', ASCENDING)], unique=True)
+
+    def _get_roles(self, roles_ids: Iterable[int]) -> Dict[int, Role]:
+        roles = self.roles_repo.get_roles_by_ids(list(roles_ids))
+        return roles_index(roles)
 
     def get_user_by_id(self, uid: int) -> User:
         data = self.coll.find_one({'_id': uid})
         if data is None:
             return None
 
-        roles = self._get_roles()
+        roles = self._get_roles(data['roles'])
         return user_frombson(data, roles)
 
     def get_user_by_name(self, name: str) -> User:
@@ -29,31 +61,147 @@ class UsersRepoMongo(UsersRepo):
         if data is None:
             return None
 
-        roles = self._get_roles()
+        roles = self._get_roles(data['roles'])
         return user_frombson(data, roles)
 
-    def get_all_users(self) -> List[User]:
-        data = self.coll.find()
-        roles = self._get_roles()
+    def _users_frombson(self, data: List[dict]) -> List[User]:
+        roles_ids = set()
+        for user in data:
+            roles_ids.update(user['roles'])
+
+        roles = self._get_roles(roles_ids)
         return [user_frombson(user, roles) for user in data]
 
+    def get_users_by_ids(self, uids: List[int]) -> List[User]:
+        if not uids:
+            return []
+
+        data = list(self.coll.find({'_id': {'$in': list(uids)}}))
+        return self._users_frombson(data)
+
+    def get_all_users(self) -> List[User]:
+        data = list(self.coll.find())
+        return self._users_frombson(data)
+
+    def get_users_page(self, limit: int, after: int = None) -> List[User]:
+        query = {} if after is None else {'_id': {'$gt': after}}
+        data = self.coll.find(query).sort('_id', ASCENDING).limit(limit)
+        return self._users_frombson(list(data))
+
+    def iter_all_users(self, batch_size: int = 1000) -> Iterator[User]:
+        after = None
+        while True:
+            users = self.get_users_page(batch_size, after)
+            yield from users
+            if len(users) < batch_size:
+                return
+
+            after = users[-1].id
+
     def create_user(self, user: User) -> int:
         insert_data = user_asbson(user)
-        insert_data['_id'] = randint(0, 100000)
-        data = self.coll.insert_one(insert_data)
+        insert_data['version'] = 1
+        insert_data['_id'] = self.ids.next_id()
+        try:
+            data = self.coll.insert_one(insert_data)
+        except DuplicateKeyError:
+            return None
+
+        self.gens.bump_user(data.inserted_id)
+        self._bump_version()
         return data.inserted_id
 
     def update_user(self, user: User) -> bool:
+        try:
+            data = self.coll.update_one(
+                {
+                    '_id': user.id
+                },
+                {'$set': user_asbson(user), '$inc': {'version': 1}},
+            )
+        except DuplicateKeyError:
+            raise DuplicatedUser(user.id)
+
+        self.gens.bump_user(user.id)
+        if data.matched_count < 1:
+            return False
+
+        self._bump_version()
+        return True
+
+    def delete_user(self, user: User) -> bool:
+        data = self.coll.delete_one({
+            '_id': user.id,
+        })
+        self.gens.bump_user(user.id)
+        if data.deleted_count < 1:
+            return False
+
+        self._bump_version()
+        return True
+
+    def create_and_get_user(self, user: User) -> User:
+        user_id = self.create_user(user)
+        if user_id is None:
+            return None
+
+        return user.replace(id=user_id, version=1)
+
+    def update_and_get_user(self, user: User) -> User:
+        try:
+            data = self.coll.find_one_and_update(
+                {
+                    '_id': user.id
+                },
+                {'$set': user_update_asbson(user), '$inc': {'version': 1}},
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            raise DuplicatedUser(user.id)
+
+        self.gens.bump_user(user.id)
+        if data is None:
+            return None
+
+        self._bump_version()
+        return user_frombson(data, roles_index(user.roles))
+
+    def delete_and_get_user(self, uid: int) -> User:
+        data = self.coll.find_one_and_delete({'_id': uid})
+        self.gens.bump_user(uid)
+        if data is None:
+            return None
+
+        self._bump_version()
+        roles = self._get_roles(data['roles'])
+        return user_frombson(data, roles)
+
+    def update_user_password(self, uid: int, password: str) -> bool:
         data = self.coll.update_one(
             {
-                '_id': user.id
+                '_id': uid
             },
-            {'$set': user_asbson(user)},
+            {'$set': {'password': password}},
         )
         return data.matched_count >= 1
 
-    def delete_user(self, user: User) -> bool:
-        data = self.coll.delete_one({
-            '_id': user.id,
-        })
-        return data.deleted_count >= 1
+    def get_users_version(self) -> str:
+        data = self.counters.find(
+            {'_id': {'$in': ['users', 'roles']}},
+            {'version': True},
+        )
+        versions = {
+            counter['_id']: counter.get('version', 0) for counter in data
+        }
+        # the users read next get their role names from roles_repo
+        self.roles_repo.sync_version(versions.get('roles', 0))
+        return users_version(versions)
+
+    def _bump_version(self):
+        # after the write: a version read in between is only older than
+        # the users read with it
+        self.counters.update_one(
+            {'_id': 'users'},
+            {'$inc': {'version': 1}},
+            upsert=True,
+        )
@@ -0,0 +1,124 @@
+from asyncio import wrap_future
+from os import urandom
+from time import time
+from typing import List
+
+from usersvc.entities import AsyncUsersRepo, Token, User
+from utils.token import TokenSigner
+from utils.tracing import trace_methods
+
+from .auth import (
+    TOKEN_TTL,
+    UserHasPermissionRequest,
+    UserLoginRequest,
+    UsersHavePermissionsRequest,
+    VerifyTokenRequest,
+    cached_decisions,
+    check_permissions,
+    create_user_token,
+    decision_stamps,
+    distinct_user_ids,
+    merge_decisions,
+    uncached_checks,
+    verify_user_token
+)
+from .decisions import PermissionDecisions
+from .password import (
+    DEFAULT_PARAMS,
+    SCRYPT,
+    PasswordHasher,
+    dummy_hash,
+    verify_password
+)
+
+
+@trace_methods('AsyncAuthUseCases')
+class AsyncAuthUseCases:
+    def __init__(
+            self,
+            repo: AsyncUsersRepo,
+            signer: TokenSigner = None,
+            token_ttl: int = TOKEN_TTL,
+            clock=time,
+            hasher: PasswordHasher = None,
+            decisions: PermissionDecisions = None,
+    ):
+        self.repo = repo
+        # a key of this process only, for tests; the app requires one
+        self.signer = signer if signer else TokenSigner(urandom(32))
+        self.token_ttl = token_ttl
+        self.clock = clock
+        self.hasher = hasher
+        self.decisions = decisions
+
+    async def user_login(self, req: UserLoginRequest) -> Token:
+        user = await self.repo.get_user_by_name(req.username)
+        if not user:
+            # as slow as a wrong password, names cannot be probed by timing
+            await self._check_dummy_password(req.password)
+            return None
+
+        if not await self._check_password(user, req.password):
+            return None
+
+        expires_at = int(self.clock()) + self.token_ttl
+        return create_user_token(user, self.signer, expires_at)
+
+    async def user_has_permission(
+            self,
+            req: UserHasPermissionRequest,
+    ) -> bool:
+        req = UsersHavePermissionsRequest(checks=[req])
+        return (await self.users_have_permissions(req))[0]
+
+    async def users_have_permissions(
+            self,
+            req: UsersHavePermissionsRequest,
+    ) -> List[bool]:
+        results = cached_decisions(req, self.decisions)
+        missing = uncached_checks(req, results)
+        if not missing.checks:
+            return results
+
+        uids = distinct_user_ids(missing)
+        stamps = decision_stamps(uids, self.decisions)
+        users = await self.repo.get_users_by_ids(uids)
+        allowed = check_permissions(
+            missing,
+            {user.id: user for user in users},
+        )
+        return merge_decisions(
+            results,
+            missing,
+            allowed,
+            self.decisions,
+            stamps,
+        )
+
+    def verify_token(self, req: VerifyTokenRequest) -> Token:
+        return verify_user_token(req, self.signer, self.clock())
+
+    async def _check_dummy_password(self, password: str):
+        if self.hasher is None:
+            encoded = dummy_hash(SCRYPT, DEFAULT_PARAMS[SCRYPT])
+            verify_password(password, encoded)
+        else:
+            await wrap_future(
+                self.hasher.submit_verify(password, self.hasher.dummy_hash()),
+            )
+
+    async def _check_password(self, user: User, password: str) -> bool:
+        if self.hasher is None:
+            return verify_password(password, user.password)
+
+        valid = await wrap_future(
+            self.hasher.submit_verify(password, user.password),
+        )
+        if not valid:
+            return False
+
+        if self.hasher.needs_rehash(user.password):
+            encoded = await wrap_future(self.hasher.submit_hash(password))
+            await self.repo.update_user_password(user.id, encoded)
+
+        return True
@@ -0,0 +1,113 @@
+from asyncio import wrap_future
+from typing import AsyncIterator, List
+
+from usersvc.entities import (
+    AsyncRolesRepo,
+    AsyncUsersRepo,
+    DuplicatedUser,
+    Role,
+    User
+)
+from utils.tracing import trace_methods
+
+from .password import PasswordHasher
+from .user import (
+    MAX_PAGE_SIZE,
+    CreateUserRequest,
+    DeleteUserRequest,
+    GetUserByIdRequest,
+    ListUsersRequest,
+    UpdateUserRequest,
+    UsersPage,
+    select_roles
+)
+
+
+@trace_methods('AsyncUserUseCases')
+class AsyncUserUseCases:
+    def __init__(
+            self,
+            repo: AsyncUsersRepo,
+            roles_repo: AsyncRolesRepo,
+            hasher: PasswordHasher = None,
+    ):
+        self.repo = repo
+        self.roles_repo = roles_repo
+        self.hasher = hasher
+
+    async def get_all_users(self) -> List[User]:
+        return await self.repo.get_all_users()
+
+    async def list_users(self, req: ListUsersRequest) -> UsersPage:
+        limit = min(max(req.limit, 1), MAX_PAGE_SIZE)
+        users = await self.repo.get_users_page(limit, req.after)
+        if len(users) < limit:
+            return UsersPage(users=users)
+
+        return UsersPage(users=users, next=users[-1].id)
+
+    def iter_all_users(self) -> AsyncIterator[User]:
+        return self.repo.iter_all_users()
+
+    async def get_user_by_id(self, req: GetUserByIdRequest) -> User:
+        return await self.repo.get_user_by_id(req.id)
+
+    async def get_users_version(self) -> str:
+        '''Changes with every write to users or roles, read it before
+        the users it describes'''
+        return await self.repo.get_users_version()
+
+    async def create_user(self, req: CreateUserRequest) -> User:
+        roles = await self._roles_names_to_roles(req.roles)
+        if isinstance(roles, str):  # is error message
+            return roles
+
+        user = User(
+            username=req.username,
+            fullname=req.fullname,
+            email=req.email,
+            password=await self._hash_password(req.password),
+            roles=roles,
+        )
+        user = await self.repo.create_and_get_user(user)
+        if user is None:
+            return 'duplicated data'
+
+        return user
+
+    async def update_user(self, req: UpdateUserRequest) -> User:
+        roles = await self._roles_names_to_roles(req.roles)
+        if isinstance(roles, str):  # is error message
+            if not await self.repo.get_user_by_id(req.id):
+                return None
+
+            return roles
+
+        user = User(
+            id=req.id,
+            username=None,
+            fullname=req.fullname,
+            email=req.email,
+            password=await self._hash_password(req.password),
+            roles=roles,
+        )
+        try:
+            return await self.repo.update_and_get_user(user)
+        except DuplicatedUser:
+            return 'duplicated data'
+
+    async def delete_user(self, req: DeleteUserRequest) -> User:
+        return await self.repo.delete_and_get_user(req.id)
+
+    async def _roles_names_to_roles(
+            self,
+            role_names: List[str],
+    ) -> List[Role]:
+        roles = await self.roles_repo.get_roles_by_names(role_names)
+        return select_roles(role_names, roles)
+
+    async def _hash_password(self, password: str) -> str:
+        if self.hasher is None or not password:
+            return password
+
+        return await wrap_future(self.hasher.submit_hash(password))
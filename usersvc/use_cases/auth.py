@@ -1,6 +1,27 @@
+from os import urandom
+from time import time
+from typing import Dict, List
+
 from dataclasses import dataclass
 
 from usersvc.entities import Token, User, UsersRepo
+from utils.token import TokenSigner
+from utils.tracing import trace_methods
+
+from .decisions import PermissionDecisions
+from .password import (
+    DEFAULT_PARAMS,
+    SCRYPT,
+    PasswordHasher,
+    dummy_hash,
+    verify_password
+)
+
+TOKEN_VERSION = 1
+TOKEN_TTL = 3600
+
+# checks in one UsersHavePermissionsRequest, the batch loads its users
+MAX_PERMISSION_CHECKS = 1000
 
 
 @dataclass
@@ -15,33 +36,230 @@ class UserHasPermissionRequest:
     permission: str
 
 
-def create_user_token(user: User) -> Token:
-    token = Token(
-        version=1,
-        token='insert_token_here',
-        permissions=user.permissions,
+@dataclass
+class UsersHavePermissionsRequest:
+    checks: List[UserHasPermissionRequest]
+
+
+def permission_name(value) -> str:
+    '''Validates a permission from a request payload'''
+    if not isinstance(value, str):
+        raise TypeError('permissions are strings')
+
+    return value
+
+
+@dataclass
+class VerifyTokenRequest:
+    token: str
+    permission: str = None
+
+
+def create_user_token(
+        user: User,
+        signer: TokenSigner,
+        expires_at: int,
+) -> Token:
+    permissions = sorted(user.permissions)
+    token = signer.sign({
+        'v': TOKEN_VERSION,
+        'sub': user.username,
+        'exp': expires_at,
+        'perms': permissions,
+    })
+    return Token(
+        version=TOKEN_VERSION,
+        token=token,
+        permissions=permissions,
         owner=user.username,
+        expires_at=expires_at,
     )
+
+
+def verify_user_token(
+        req: VerifyTokenRequest,
+        signer: TokenSigner,
+        now: float,
+) -> Token:
+    payload = signer.verify(req.token)
+    if not payload or payload.get('v') != TOKEN_VERSION:
+        return None
+
+    try:
+        token = Token(
+            version=payload['v'],
+            token=req.token,
+            permissions=payload['perms'],
+            owner=payload['sub'],
+            expires_at=payload['exp'],
+        )
+    except KeyError:
+        return None
+
+    if token.expires_at <= now:
+        return None
+
+    if req.permission is not None and req.permission not in token.permissions:
+        return None
+
     return token
 
 
+def distinct_user_ids(req: UsersHavePermissionsRequest) -> List[int]:
+    return list(dict.fromkeys(check.user_id for check in req.checks))
+
+
+def check_permissions(
+        req: UsersHavePermissionsRequest,
+        users: Dict[int, User],
+) -> List[bool]:
+    results = []
+    for check in req.checks:
+        user = users.get(check.user_id)
+        results.append(
+            user is not None and user.has_permission(check.permission),
+        )
+    return results
+
+
+def cached_decisions(
+        req: UsersHavePermissionsRequest,
+        decisions: PermissionDecisions,
+) -> List[bool]:
+    if decisions is None:
+        return [None] * len(req.checks)
+
+    return [
+        decisions.get(check.user_id, check.permission)
+        for check in req.checks
+    ]
+
+
+def uncached_checks(
+        req: UsersHavePermissionsRequest,
+        results: List[bool],
+) -> UsersHavePermissionsRequest:
+    return UsersHavePermissionsRequest(checks=[
+        check for check, allowed in zip(req.checks, results)
+        if allowed is None
+    ])
+
+
+def decision_stamps(
+        uids: List[int],
+        decisions: PermissionDecisions,
+) -> Dict[int, tuple]:
+    if decisions is None:
+        return {}
+
+    return {uid: decisions.stamp(uid) for uid in uids}
+
+
+def merge_decisions(
+        results: List[bool],
+        missing: UsersHavePermissionsRequest,
+        allowed: List[bool],
+        decisions: PermissionDecisions,
+        stamps: Dict[int, tuple],
+) -> List[bool]:
+    allowed = iter(zip(missing.checks, allowed))
+    for pos, result in enumerate(results):
+        if result is not None:
+            continue
+
+        check, results[pos] = next(allowed)
+        if decisions is not None:
+            decisions.put(
+                check.user_id,
+                check.permission,
+                stamps[check.user_id],
+                results[pos],
+            )
+
+    return results
+
+
+@trace_methods('AuthUseCases')
 class AuthUseCases:
-    def __init__(self, repo: UsersRepo):
+    def __init__(
+            self,
+            repo: UsersRepo,
+            signer: TokenSigner = None,
+            token_ttl: int = TOKEN_TTL,
+            clock=time,
+            hasher: PasswordHasher = None,
+            decisions: PermissionDecisions = None,
+    ):
         self.repo = repo
+        # a key of this process only, for tests; the app requires one
+        self.signer = signer if signer else TokenSigner(urandom(32))
+        self.token_ttl = token_ttl
+        self.clock = clock
+        self.hasher = hasher
+        self.decisions = decisions
 
     def user_login(self, req: UserLoginRequest) -> Token:
         user = self.repo.get_user_by_name(req.username)
         if not user:
+            # as slow as a wrong password, names cannot be probed by timing
+            self._check_dummy_password(req.password)
             return None
 
-        if user.password != req.password:
+        if not self._check_password(user, req.password):
             return None
 
-        return create_user_token(user)
+        expires_at = int(self.clock()) + self.token_ttl
+        return create_user_token(user, self.signer, expires_at)
 
     def user_has_permission(self, req: UserHasPermissionRequest) -> bool:
-        user = self.repo.get_user_by_id(req.user_id)
-        if not user:
+        req = UsersHavePermissionsRequest(checks=[req])
+        return self.users_have_permissions(req)[0]
+
+    def users_have_permissions(
+            self,
+            req: UsersHavePermissionsRequest,
+    ) -> List[bool]:
+        results = cached_decisions(req, self.decisions)
+        missing = uncached_checks(req, results)
+        if not missing.checks:
+            return results
+
+        uids = distinct_user_ids(missing)
+        stamps = decision_stamps(uids, self.decisions)
+        users = self.repo.get_users_by_ids(uids)
+        allowed = check_permissions(
+            missing,
+            {user.id: user for user in users},
+        )
+        return merge_decisions(
+            results,
+            missing,
+            allowed,
+            self.decisions,
+            stamps,
+        )
+
+    def verify_token(self, req: VerifyTokenRequest) -> Token:
+        return verify_user_token(req, self.signer, self.clock())
+
+    def _check_dummy_password(self, password: str):
+        if self.hasher is None:
+            encoded = dummy_hash(SCRYPT, DEFAULT_PARAMS[SCRYPT])
+            verify_password(password, encoded)
+        else:
+            self.hasher.verify(password, self.hasher.dummy_hash())
+
+    def _check_password(self, user: User, password: str) -> bool:
+        if self.hasher is None:
+            return verify_password(password, user.password)
+
+        if not self.hasher.verify(password, user.password):
             return False
 
-        return req.permission in user.permissions
+        if self.hasher.needs_rehash(user.password):
+            self.repo.update_user_password(
+                user.id,
+                self.hasher.hash(password),
+            )
+
+        return True
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from usersvc.entities import Generations, generations
+
+
+class PermissionDecisions:
+    '''LRU of (user_id, permission) decisions
+
+    Every decision carries the roles and user generations it was computed
+    with, so a role or user write invalidates it without a cache scan.
+    '''
+
+    def __init__(
+            self,
+            max_size: int = 100000,
+            ttl: float = 30.0,
+            gens: Generations = generations,
+            clock=monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.gens = gens
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def stamp(self, uid: int) -> tuple:
+        '''Generations to pass to put, taken before the user is loaded'''
+        return self.gens.stamp(uid)
+
+    def get(self, uid: int, permission: str) -> bool:
+        key = (uid, permission)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            allowed, stamp, expires_at = entry
+            if stamp != self.gens.stamp(uid) or expires_at <= self.clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return allowed
+
+    def put(self, uid: int, permission: str, stamp: tuple, allowed: bool):
+        key = (uid, permission)
+        with self._lock:
+            # a write landed while the user was loading, it may be stale
+            if stamp != self.gens.stamp(uid):
+                return
+
+            self._entries[key] = (allowed, stamp, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
@@ -0,0 +1,192 @@
+import hmac
+from base64 import b64decode, b64encode
+from concurrent.futures import Future, ProcessPoolExecutor
+from hashlib import pbkdf2_hmac, scrypt
+from os import urandom
+from threading import BoundedSemaphore
+
+PBKDF2 = 'pbkdf2_sha256'
+SCRYPT = 'scrypt'
+
+DEFAULT_PARAMS = {
+    PBKDF2: {'iterations': 600000},
+    SCRYPT: {'n': 2 ** 14, 'r': 8, 'p': 1},
+}
+SALT_SIZE = 16
+
+_dummy_hashes = {}
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _derive(algorithm: str, params: dict, password: str, salt: bytes):
+    if algorithm == PBKDF2:
+        return pbkdf2_hmac(
+            'sha256',
+            password.encode(),
+            salt,
+            params['iterations'],
+        )
+
+    return scrypt(
+        password.encode(),
+        salt=salt,
+        n=params['n'],
+        r=params['r'],
+        p=params['p'],
+        maxmem=256 * params['r'] * params['n'],
+    )
+
+
+def encode_params(algorithm: str, params: dict) -> str:
+    if algorithm == PBKDF2:
+        return str(params['iterations'])
+
+    return '{n},{r},{p}'.format(**params)
+
+
+def decode_params(algorithm: str, params: str) -> dict:
+    if algorithm == PBKDF2:
+        return {'iterations': int(params)}
+
+    n, r, p = params.split(',')
+    return {'n': int(n), 'r': int(r), 'p': int(p)}
+
+
+def parse_hash(encoded: str):
+    '''Splits <algorithm>$<params>$<salt>$<hash>, None if not a hash'''
+    parts = encoded.split('$') if encoded else []
+    if len(parts) != 4 or parts[0] not in DEFAULT_PARAMS:
+        return None
+
+    try:
+        return (
+            parts[0],
+            decode_params(parts[0], parts[1]),
+            b64decode(parts[2]),
+            b64decode(parts[3]),
+        )
+    except ValueError:
+        return None
+
+
+def hash_password(algorithm: str, params: dict, password: str) -> str:
+    salt = urandom(SALT_SIZE)
+    digest = _derive(algorithm, params, password, salt)
+    return '$'.join([
+        algorithm,
+        encode_params(algorithm, params),
+        b64encode(salt).decode(),
+        b64encode(digest).decode(),
+    ])
+
+
+def dummy_hash(algorithm: str, params: dict) -> str:
+    '''Hash of a random password, made once per algorithm and params
+
+    Logins for unknown users are verified against it, so they take as
+    long as a wrong password for a known one.
+    '''
+    key = (algorithm, encode_params(algorithm, params))
+    encoded = _dummy_hashes.get(key)
+    if encoded is None:
+        encoded = hash_password(algorithm, params, urandom(SALT_SIZE).hex())
+        _dummy_hashes[key] = encoded
+
+    return encoded
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    # accounts without a stored password never match, not even ''
+    if not encoded or not isinstance(password, str):
+        return False
+
+    parsed = parse_hash(encoded)
+    if parsed is None:
+        # legacy plaintext password
+        return hmac.compare_digest(encoded.encode(), password.encode())
+
+    algorithm, params, salt, digest = parsed
+    return hmac.compare_digest(
+        _derive(algorithm, params, password, salt),
+        digest,
+    )
+
+
+class PasswordHasher:
+    '''Hashes and verifies passwords on a bounded process pool
+
+    With workers=0 the work runs inline on the calling thread.
+    '''
+
+    def __init__(
+            self,
+            algorithm: str = SCRYPT,
+            params: dict = None,
+            workers: int = None,
+            max_pending: int = 64,
+    ):
+        self.algorithm = algorithm
+        self.params = params if params else DEFAULT_PARAMS[algorithm]
+        self.executor = None
+        if workers != 0:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+
+        self._pending = BoundedSemaphore(max_pending)
+
+    def hash(self, password: str) -> str:
+        return self.submit_hash(password).result()
+
+    def verify(self, password: str, encoded: str) -> bool:
+        return self.submit_verify(password, encoded).result()
+
+    def submit_hash(self, password: str) -> Future:
+        return self._submit(
+            hash_password,
+            self.algorithm,
+            self.params,
+            password,
+        )
+
+    def submit_verify(self, password: str, encoded: str) -> Future:
+        return self._submit(verify_password, password, encoded)
+
+    def dummy_hash(self) -> str:
+        return dummy_hash(self.algorithm, self.params)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        parsed = parse_hash(encoded)
+        if parsed is None:
+            return True
+
+        algorithm, params, _, _ = parsed
+        return algorithm != self.algorithm or params != self.params
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def _submit(self, func, *args) -> Future:
+        if not self._pending.acquire(blocking=False):
+            raise PasswordHasherBusy()
+
+        if self.executor is None:
+            future = Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+            finally:
+                self._pending.release()
+            return future
+
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._pending.release()
+            raise
+
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
@@ -1,8 +1,17 @@
-from typing import List
+from typing import Iterator, List
 
 from dataclasses import dataclass
 
-from usersvc.entities import Role, RolesRepo, User, UsersRepo
+from usersvc.entities import (
+    DuplicatedUser,
+    Role,
+    RolesRepo,
+    User,
+    UsersRepo
+)
+from utils.tracing import trace_methods
+
+from .password import PasswordHasher
 
 
 @dataclass
@@ -23,6 +32,18 @@ class UpdateUserRequest:
     roles: List[str]
 
 
+@dataclass
+class ListUsersRequest:
+    limit: int = 100
+    after: int = None
+
+
+@dataclass
+class UsersPage:
+    users: List[User]
+    next: int = None
+
+
 @dataclass
 class GetUserByIdRequest:
     id: int
@@ -33,17 +54,55 @@ class DeleteUserRequest:
     id: int
 
 
+MAX_PAGE_SIZE = 1000
+
+
+def select_roles(role_names: List[str], roles: List[Role]) -> List[Role]:
+    roles = {role.name: role for role in roles}
+    user_roles = []
+    for name in role_names:
+        role = roles.get(name)
+        if role is None:
+            return 'invalid role: ' + name
+
+        user_roles.append(role)
+    return user_roles
+
+
+@trace_methods('UserUseCases')
 class UserUseCases:
-    def __init__(self, repo: UsersRepo, roles_repo: RolesRepo):
+    def __init__(
+            self,
+            repo: UsersRepo,
+            roles_repo: RolesRepo,
+            hasher: PasswordHasher = None,
+    ):
         self.repo = repo
         self.roles_repo = roles_repo
+        self.hasher = hasher
 
     def get_all_users(self) -> List[User]:
         return self.repo.get_all_users()
 
+    def list_users(self, req: ListUsersRequest) -> UsersPage:
+        limit = min(max(req.limit, 1), MAX_PAGE_SIZE)
+        users = self.repo.get_users_page(limit, req.after)
+        if len(users) < limit:
+            return UsersPage(users=users)
+
+        return UsersPage(users=users, next=users[-1].id)
+
+    def iter_all_users(self) -> Iterator[User]:
+        return self.repo.iter_all_users()
+
     def get_user_by_id(self, req: GetUserByIdRequest) -> User:
         return self.repo.get_user_by_id(req.id)
 
+    def get_users_version(self) -> str:
+        '''Changes with every write to users or roles, read it before
+        the users it describes'''
+        return self.repo.get_users_version()
+
     def create_user(self, req: CreateUserRequest) -> User:
         roles = self._roles_names_to_roles(req.roles)
         if isinstance(roles, str):  # is error message
@@ -53,47 +112,46 @@ class UserUseCases:
             username=req.username,
             fullname=req.fullname,
             email=req.email,
-            password=req.password,
+            password=self._hash_password(req.password),
             roles=roles,
         )
-        user_id = self.repo.create_user(user)
-        return self.repo.get_user_by_id(user_id)
+        user = self.repo.create_and_get_user(user)
+        if user is None:
+            return 'duplicated data'
 
-    def update_user(self, req: UpdateUserRequest) -> User:
-        user = self.repo.get_user_by_id(req.id)
-        if not user:
-            return None
-
-        user.fullname = req.fullname
-        user.email = req.email
-        if req.password:
-            user.password = req.password
+        return user
 
+    def update_user(self, req: UpdateUserRequest) -> User:
         roles = self._roles_names_to_roles(req.roles)
         if isinstance(roles, str):  # is error message
+            if not self.repo.get_user_by_id(req.id):
+                return None
+
             return roles
 
-        user.roles = roles
-        self.repo.update_user(user)
-        user = self.repo.get_user_by_id(req.id)
-        return user
+        user = User(
+            id=req.id,
+            username=None,
+            fullname=req.fullname,
+            email=req.email,
+            password=self._hash_password(req.password),
+            roles=roles,
+        )
+        try:
+            return self.repo.update_and_get_user(user)
+        except DuplicatedUser:
+            return 'duplicated data'
 
     def delete_user(self, req: DeleteUserRequest) -> User:
-        user = self.repo.get_user_by_id(req.id)
-        if not user:
-            return None
-
-        self.repo.delete_user(user)
-        return user
+        return self.repo.delete_and_get_user(req.id)
 
     def _roles_names_to_roles(self, role_names: List[str]) -> List[Role]:
-        roles = self.roles_repo.get_all_roles()
-        roles = {role.name: role for role in roles}
-        user_roles = []
-        for name in role_names:
-            role = roles.get(name)
-            if role is None:
-                return 'invalid role: ' + name
-
-            user_roles.append(role)
-        return user_roles
+        roles = self.roles_repo.get_roles_by_names(role_names)
+        return select_roles(role_names, roles)
+
+    def _hash_password(self, password: str) -> str:
+        # empty passwords are left out of updates, keep them as they are
+        if self.hasher is None or not password:
+            return password
+
+        return self.hasher.hash(password)
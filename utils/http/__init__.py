@@ -1,10 +1,43 @@
-from .api import Api
+from .api import Api, check_sync_methods
+from .codecs import JSON, MSGPACK, Codec, Codecs, default_codecs
+from .compression import Compression
+from .etag import etag_matches, not_modified
+from .metrics import HttpMetrics, MetricsApi, StatsMetrics
+from .middleware import Middleware, Pipeline
+from .querystats import QueryMetrics
 from .request import Request
-from .response import Response, json_response
+from .response import (
+    ContentResponse,
+    ListStreamResponse,
+    Response,
+    json_response,
+    json_stream_response
+)
+from .tracing import RequestTracing, TracesApi
 
 __all__ = [
     'Api',
+    'Codec',
+    'Codecs',
+    'Compression',
+    'ContentResponse',
+    'HttpMetrics',
+    'JSON',
+    'ListStreamResponse',
+    'MSGPACK',
+    'MetricsApi',
+    'Middleware',
+    'Pipeline',
+    'QueryMetrics',
     'Request',
+    'RequestTracing',
     'Response',
+    'StatsMetrics',
+    'TracesApi',
+    'check_sync_methods',
+    'default_codecs',
+    'etag_matches',
     'json_response',
+    'json_stream_response',
+    'not_modified',
 ]
@@ -1,3 +1,6 @@
+from inspect import iscoroutinefunction
+
+
 class Api:
     def __init__(self, url):
         self.url = url
@@ -37,3 +40,15 @@ class Api:
             methods[method] = func
 
         return methods
+
+
+def check_sync_methods(methods: dict):
+    '''Raises TypeError for async handlers, for the WSGI backends'''
+    for method, func in methods.items():
+        if iscoroutinefunction(func):
+            raise TypeError(
+                '{} {} is async, serve it with the ASGI backend'.format(
+                    method,
+                    func.__qualname__,
+                ),
+            )
@@ -0,0 +1,254 @@
+import sys
+import traceback
+from asyncio import get_running_loop, run_coroutine_threadsafe
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial, wraps
+from http import HTTPStatus
+from inspect import iscoroutinefunction
+from typing import List
+
+from utils.http import Codecs, Request, Response, default_codecs
+from utils.http.middleware import Middleware, Pipeline
+from utils.http.request import PairsHeaders
+from utils.http.response import NO_BODY_STATUSES
+from utils.http.router import Router, api_routes
+
+_done = object()
+
+
+class ReceiveStream:
+    '''Sync file-like body over ASGI receive, for the offloaded handlers
+
+    read() blocks its thread until the event loop delivers the data.
+    '''
+
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self._buffer = bytearray()
+        self._eof = False
+
+    async def _read(self, size: int) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                self._eof = True
+                break
+
+            self._buffer += message.get('body', b'')
+            self._eof = not message.get('more_body', False)
+
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        return run_coroutine_threadsafe(self._read(size), self.loop).result()
+
+
+def has_body(headers: PairsHeaders) -> bool:
+    if 'chunked' in headers.get('Transfer-Encoding', ''):
+        return True
+
+    return headers.get('Content-Length', '0') not in ('', '0')
+
+
+async def receive_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+
+    return b''.join(chunks)
+
+
+async def scope_request(
+        scope: dict,
+        receive,
+        offloaded: bool,
+        codecs: Codecs = default_codecs,
+) -> Request:
+    '''Request for a handler, offloaded ones read the body on demand'''
+    headers = PairsHeaders(scope['headers'])
+    body = stream = None
+    if offloaded:
+        stream = ReceiveStream(receive, get_running_loop())
+    elif has_body(headers):
+        body = await receive_body(receive)
+
+    client = scope.get('client')
+    return Request(
+        path=scope['path'],
+        method=scope['method'],
+        body=body,
+        headers=headers,
+        query_string=scope.get('query_string', b'').decode('latin-1'),
+        remote_addr=client[0] if client else None,
+        stream=stream,
+        codecs=codecs,
+    )
+
+
+class AsgiApp:
+    '''utils.http Apis served as an ASGI app
+
+    async def handlers run on the event loop, the sync ones are offloaded
+    to a thread pool so they do not block it. Serve it with any ASGI
+    server, e.g. uvicorn.
+    '''
+
+    def __init__(
+            self,
+            max_workers: int = None,
+            codecs: Codecs = default_codecs,
+            middleware: List[Middleware] = None,
+    ):
+        self.router = Router()
+        self.max_workers = max_workers
+        self.codecs = codecs
+        self.pipeline = Pipeline(codecs, middleware)
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='asgi',
+            )
+
+        return self._executor
+
+    def add_api(self, api_obj):
+        methods = {
+            method: func if iscoroutinefunction(func) else self.offload(func)
+            for method, func in api_obj.api.get_methods(api_obj).items()
+        }
+        self.router.add(api_obj.api.url, api_routes(api_obj.api.url, methods))
+        return self
+
+    def configure(self):
+        self.router.compile()
+        return self
+
+    def offload(self, func):
+        '''Wraps a sync handler to run on the thread pool, in a copy of
+        the context so it sees the contextvars of the request'''
+        @wraps(func)
+        async def handler(*args, **kwargs):
+            return await get_running_loop().run_in_executor(
+                self.executor,
+                partial(copy_context().run, func, *args, **kwargs),
+            )
+
+        handler.offloaded = True
+        return handler
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def __call__(self, scope, receive, send):
+        '''ASGI interface'''
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        if scope['type'] != 'http':
+            raise NotImplementedError(scope['type'])
+
+        methods, params = self.router.match(scope['path'])
+        if methods is None:
+            resp = Response(status=HTTPStatus.NOT_FOUND)
+            return await self._respond(send, resp)
+
+        route = methods.get(scope['method'])
+        if route is None:
+            resp = Response(
+                status=HTTPStatus.METHOD_NOT_ALLOWED,
+                headers={'Allow': ', '.join(sorted(methods))},
+            )
+            return await self._respond(send, resp)
+
+        try:
+            req = await scope_request(
+                scope,
+                receive,
+                getattr(route.func, 'offloaded', False),
+                self.codecs,
+            )
+            req.route = route.url
+            resp = await self.pipeline.adispatch(req, route.func, params)
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            resp = Response(status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        await self._respond(send, resp)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _respond(self, send, resp: Response):
+        headers = [
+            (name.lower().encode('latin-1'), str(value).encode('latin-1'))
+            for name, value in resp.headers.items()
+        ]
+        if resp.stream is None and resp.status not in NO_BODY_STATUSES:
+            headers.append((b'content-length', str(len(resp.body)).encode()))
+
+        await send({
+            'type': 'http.response.start',
+            'status': int(resp.status),
+            'headers': headers,
+        })
+        if resp.stream is None:
+            await send({'type': 'http.response.body', 'body': resp.body})
+            return
+
+        async for chunk in self._iter_stream(resp.stream):
+            await send({
+                'type': 'http.response.body',
+                'body': chunk,
+                'more_body': True,
+            })
+
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _iter_stream(self, stream):
+        if hasattr(stream, '__aiter__'):
+            async for chunk in stream:
+                yield chunk
+            return
+
+        # sync streams may block on I/O between chunks
+        loop = get_running_loop()
+        stream = iter(stream)
+        while True:
+            chunk = await loop.run_in_executor(
+                self.executor,
+                next,
+                stream,
+                _done,
+            )
+            if chunk is _done:
+                return
+
+            yield chunk
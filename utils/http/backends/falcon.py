@@ -1,12 +1,21 @@
 from functools import wraps
-from wsgiref.simple_server import make_server
+from typing import List
 
 from falcon import API as FalconApi
 from falcon import Request as FalconRequest
 from falcon import Response as FalconResponse
 from falcon import status_codes
 
-from utils.http import Request, Response
+from utils.http import (
+    Codecs,
+    Request,
+    Response,
+    check_sync_methods,
+    default_codecs
+)
+from utils.http.middleware import Middleware, Pipeline
+from utils.http.request import EnvironHeaders
+from utils.http.server import serve, serve_dev
 
 STATUS_MAPPING = {}
 for attr in dir(status_codes):
@@ -23,17 +32,26 @@ for attr in dir(status_codes):
 
 
 class FalconApp:
-    def __init__(self, *args, **kwargs):
+    def __init__(
+            self,
+            *args,
+            codecs: Codecs = default_codecs,
+            middleware: List[Middleware] = None,
+            **kwargs,
+    ):
         self.falcon = FalconApi(*args, **kwargs)
+        self.pipeline = Pipeline(codecs, middleware)
         self.urls = {}
 
     def add_api(self, api_obj):
-        self.urls[api_obj.api.url] = api_obj.api.get_methods(api_obj)
+        methods = api_obj.api.get_methods(api_obj)
+        check_sync_methods(methods)
+        self.urls[api_obj.api.url] = methods
         return self
 
     def configure(self):
         for url, methods in self.urls.items():
-            api = ApiMethods(methods)
+            api = ApiMethods(url, methods, self.pipeline)
             self.falcon.add_route(url, api)
 
         return self
@@ -42,13 +60,20 @@ class FalconApp:
         '''WSGI interface'''
         return self.falcon(*args, **kwargs)
 
-    def run(self, host='', port=3000):
+    def run(self, host='', port=3000, production=False, **options):
+        '''Serves the app, options are passed to utils.http.server.serve
+
+        Without production the single threaded wsgiref server is used.
+        '''
         print('Starting server at http://{}:{}/'.format(
             host if host else '0.0.0.0',
             port,
         ))
-        with make_server(host, port, self.falcon) as httpd:
-            httpd.serve_forever()
+        if not production:
+            serve_dev(self.falcon, host, port)
+            return
+
+        serve(self.falcon, host, port, **options)
 
     def http_options(self, url: str, method):
         return self._create_method(url, 'OPTIONS', method)
@@ -63,7 +88,9 @@ class FalconApp:
 
 
 class ApiMethods:
-    def __init__(self, methods: dict):
+    def __init__(self, url: str, methods: dict, pipeline: Pipeline = None):
+        self.url = url
+        self.pipeline = pipeline if pipeline else Pipeline()
         for method, func in methods.items():
             self.set_method(method, func)
 
@@ -73,13 +100,22 @@ class ApiMethods:
             wrapper_req = Request(
                 path=req.path,
                 method=req.method,
-                body=req.bounded_stream.read(),
-                headers=req.headers,
+                headers=EnvironHeaders(req.env),
                 query=req.params,
                 remote_addr=req.remote_addr,
+                stream=req.bounded_stream,
+                codecs=self.pipeline.codecs,
+            )
+            wrapper_req.route = self.url
+            wrapper_resp: Response = self.pipeline.dispatch(
+                wrapper_req,
+                func,
+                kwargs,
             )
-            wrapper_resp: Response = func(wrapper_req, *args, **kwargs)
-            resp.data = wrapper_resp.body
+            if wrapper_resp.stream is not None:
+                resp.stream = wrapper_resp.stream
+            else:
+                resp.data = wrapper_resp.body
             resp.status = STATUS_MAPPING[wrapper_resp.status]
             for header, value in wrapper_resp.headers.items():
                 resp.set_header(header, value)
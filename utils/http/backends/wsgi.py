@@ -0,0 +1,124 @@
+import sys
+import traceback
+from http import HTTPStatus
+from typing import List
+
+from utils.http import (
+    Codecs,
+    Request,
+    Response,
+    check_sync_methods,
+    default_codecs
+)
+from utils.http.middleware import Middleware, Pipeline
+from utils.http.request import EnvironHeaders
+from utils.http.response import NO_BODY_STATUSES
+from utils.http.router import Router, api_routes
+from utils.http.server import serve, serve_dev
+
+STATUS_LINES = {
+    status.value: '{} {}'.format(status.value, status.phrase)
+    for status in HTTPStatus
+}
+
+
+def environ_content_length(environ: dict) -> int:
+    '''Body size, None for chunked bodies that are read until EOF'''
+    if 'chunked' in environ.get('HTTP_TRANSFER_ENCODING', ''):
+        return None
+
+    try:
+        return max(int(environ.get('CONTENT_LENGTH') or 0), 0)
+    except ValueError:
+        return 0
+
+
+def environ_request(environ: dict, codecs: Codecs = default_codecs) -> Request:
+    return Request(
+        path=environ.get('PATH_INFO') or '/',
+        method=environ['REQUEST_METHOD'],
+        headers=EnvironHeaders(environ),
+        query_string=environ.get('QUERY_STRING'),
+        remote_addr=environ.get('REMOTE_ADDR'),
+        stream=environ['wsgi.input'],
+        content_length=environ_content_length(environ),
+        codecs=codecs,
+    )
+
+
+class WsgiApp:
+    '''utils.http Apis served as a plain WSGI app, without a framework'''
+
+    def __init__(
+            self,
+            codecs: Codecs = default_codecs,
+            middleware: List[Middleware] = None,
+    ):
+        self.router = Router()
+        self.codecs = codecs
+        self.pipeline = Pipeline(codecs, middleware)
+
+    def add_api(self, api_obj):
+        methods = api_obj.api.get_methods(api_obj)
+        check_sync_methods(methods)
+        self.router.add(api_obj.api.url, api_routes(api_obj.api.url, methods))
+        return self
+
+    def configure(self):
+        self.router.compile()
+        return self
+
+    def __call__(self, environ, start_response):
+        '''WSGI interface'''
+        methods, params = self.router.match(environ.get('PATH_INFO') or '/')
+        if methods is None:
+            return self._respond(
+                start_response,
+                Response(status=HTTPStatus.NOT_FOUND),
+            )
+
+        route = methods.get(environ['REQUEST_METHOD'])
+        if route is None:
+            return self._respond(start_response, Response(
+                status=HTTPStatus.METHOD_NOT_ALLOWED,
+                headers={'Allow': ', '.join(sorted(methods))},
+            ))
+
+        try:
+            req = environ_request(environ, self.codecs)
+            req.route = route.url
+            resp = self.pipeline.dispatch(req, route.func, params)
+            # encodes the body before any header is sent
+            return self._respond(start_response, resp)
+        except Exception:
+            traceback.print_exc(file=environ.get('wsgi.errors', sys.stderr))
+            return self._respond(
+                start_response,
+                Response(status=HTTPStatus.INTERNAL_SERVER_ERROR),
+            )
+
+    def run(self, host='', port=3000, production=False, **options):
+        '''Serves the app, options are passed to utils.http.server.serve
+
+        Without production the single threaded wsgiref server is used.
+        '''
+        print('Starting server at http://{}:{}/'.format(
+            host if host else '0.0.0.0',
+            port,
+        ))
+        if not production:
+            serve_dev(self, host, port)
+            return
+
+        serve(self, host, port, **options)
+
+    def _respond(self, start_response, resp: Response):
+        headers = list(resp.headers.items())
+        if resp.stream is not None:
+            start_response(STATUS_LINES[resp.status], headers)
+            return resp.stream
+
+        if resp.status not in NO_BODY_STATUSES:
+            headers.append(('Content-Length', str(len(resp.body))))
+        start_response(STATUS_LINES[resp.status], headers)
+        return [resp.body]
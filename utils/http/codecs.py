@@ -0,0 +1,279 @@
+from typing import AsyncIterable, Iterable, List, Tuple
+
+import msgpack
+from ujson import dumps, loads
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class Codec:
+    '''Encodes response content and decodes request bodies of one type
+
+    Lists are streamed as {key: [items]}, by default encoded at once,
+    codecs whose format can be written incrementally override it.
+    '''
+    content_type = None
+
+    def dumps(self, value) -> bytes:
+        raise NotImplementedError()
+
+    def loads(self, data: bytes):
+        '''Raises ValueError for invalid data'''
+        raise NotImplementedError()
+
+    def dumps_list(self, key: str, items: Iterable) -> Iterable[bytes]:
+        yield self.dumps({key: list(items)})
+
+    async def adumps_list(
+            self,
+            key: str,
+            items: AsyncIterable,
+    ) -> AsyncIterable[bytes]:
+        yield self.dumps({key: [item async for item in items]})
+
+
+class JsonCodec(Codec):
+    content_type = 'application/json'
+
+    def dumps(self, value) -> bytes:
+        return dumps(value).encode()
+
+    def loads(self, data: bytes):
+        return loads(data)
+
+    def dumps_list(self, key: str, items: Iterable) -> Iterable[bytes]:
+        chunks = _JsonListChunks(key)
+        for item in items:
+            data = chunks.add(item)
+            if data is not None:
+                yield data
+
+        yield chunks.close()
+
+    async def adumps_list(
+            self,
+            key: str,
+            items: AsyncIterable,
+    ) -> AsyncIterable[bytes]:
+        chunks = _JsonListChunks(key)
+        async for item in items:
+            data = chunks.add(item)
+            if data is not None:
+                yield data
+
+        yield chunks.close()
+
+
+class MsgpackCodec(Codec):
+    '''msgpack needs the length of an array up front, so lists are one
+    {key: [items]} map sent once all items are read; items are packed
+    as they come and only their bytes are kept'''
+    content_type = 'application/msgpack'
+
+    def dumps(self, value) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes):
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except (msgpack.UnpackException, TypeError) as e:
+            raise ValueError(str(e)) from e
+
+    def dumps_list(self, key: str, items: Iterable) -> Iterable[bytes]:
+        chunks = _MsgpackListChunks(key)
+        for item in items:
+            chunks.add(item)
+
+        yield from chunks.close()
+
+    async def adumps_list(
+            self,
+            key: str,
+            items: AsyncIterable,
+    ) -> AsyncIterable[bytes]:
+        chunks = _MsgpackListChunks(key)
+        async for item in items:
+            chunks.add(item)
+
+        for data in chunks.close():
+            yield data
+
+
+JSON = JsonCodec()
+MSGPACK = MsgpackCodec()
+
+
+class Codecs:
+    '''Codecs by content type, picked from the Accept and Content-Type
+    headers
+
+    Clients accepting none of the types get the default codec, as do
+    request bodies of unknown types.
+    '''
+    MAX_CACHED_ACCEPTS = 256
+
+    def __init__(self):
+        self.default = None
+        self.types = {}
+        self._accepts = {}
+
+    def register(self, codec: Codec, *aliases: str, default=False):
+        for content_type in (codec.content_type,) + aliases:
+            self.types[content_type] = codec
+
+        if default or self.default is None:
+            self.default = codec
+
+        self._accepts = {}
+        return self
+
+    def for_content_type(self, content_type: str) -> Codec:
+        if not content_type:
+            return self.default
+
+        media_type = content_type.split(';', 1)[0].strip().lower()
+        return self.types.get(media_type, self.default)
+
+    def for_accept(self, accept: str) -> Codec:
+        if not accept:
+            return self.default
+
+        codec = self._accepts.get(accept)
+        if codec is None:
+            codec = self._match_accept(accept)
+            # clients choose the header, keep the cache bounded
+            if len(self._accepts) < self.MAX_CACHED_ACCEPTS:
+                self._accepts[accept] = codec
+
+        return codec
+
+    def negotiate(self, req, resp):
+        '''Encodes resp with the codec req accepts, if it has content'''
+        if resp.codec is not None:
+            resp.encode_with(self.for_accept(req.headers.get('Accept')))
+
+        return resp
+
+    def _match_accept(self, accept: str) -> Codec:
+        for media_type in parse_accept(accept):
+            if media_type == '*/*':
+                return self.default
+
+            if media_type.endswith('/*'):
+                prefix = media_type[:-1]
+                if self.default.content_type.startswith(prefix):
+                    return self.default
+
+                for content_type, codec in self.types.items():
+                    if content_type.startswith(prefix):
+                        return codec
+                continue
+
+            codec = self.types.get(media_type)
+            if codec is not None:
+                return codec
+
+        return self.default
+
+
+def accept_ranges(accept: str) -> List[Tuple[str, float]]:
+    '''Media types of an Accept header with their quality, in order'''
+    ranges: List[Tuple[str, float]] = []
+    for part in accept.split(','):
+        media_type, *params = part.split(';')
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() != 'q':
+                continue
+
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+
+        ranges.append((media_type, quality))
+
+    return ranges
+
+
+def by_preference(ranges: List[Tuple[str, float]]) -> List[str]:
+    '''Accepted media types, by decreasing quality then header order'''
+    ordered = sorted(
+        (-quality, pos, media_type)
+        for pos, (media_type, quality) in enumerate(ranges)
+        if quality > 0
+    )
+    return [media_type for _, _, media_type in ordered]
+
+
+def parse_accept(accept: str) -> List[str]:
+    '''Media types of an Accept header, by decreasing preference'''
+    return by_preference(accept_ranges(accept))
+
+
+default_codecs = Codecs() \
+    .register(JSON, default=True) \
+    .register(MSGPACK, 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+class _JsonListChunks:
+    def __init__(self, key: str):
+        self.chunk = ['{', dumps(key), ':[']
+        self.size = 0
+        self.separator = ''
+
+    def add(self, item) -> bytes:
+        data = dumps(item)
+        self.chunk.append(self.separator)
+        self.chunk.append(data)
+        self.separator = ','
+        self.size += len(data)
+        if self.size < STREAM_CHUNK_SIZE:
+            return None
+
+        return self.flush()
+
+    def flush(self) -> bytes:
+        data = ''.join(self.chunk).encode()
+        self.chunk = []
+        self.size = 0
+        return data
+
+    def close(self) -> bytes:
+        self.chunk.append(']}')
+        return self.flush()
+
+
+class _MsgpackListChunks:
+    def __init__(self, key: str):
+        self.packer = msgpack.Packer(use_bin_type=True)
+        self.key = key
+        self.items = []
+
+    def add(self, item):
+        self.items.append(self.packer.pack(item))
+
+    def close(self) -> Iterable[bytes]:
+        packer = self.packer
+        chunk = [
+            packer.pack_map_header(1),
+            packer.pack(self.key),
+            packer.pack_array_header(len(self.items)),
+        ]
+        size = 0
+        for data in self.items:
+            chunk.append(data)
+            size += len(data)
+            if size >= STREAM_CHUNK_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+
+        self.items = []
+        if chunk:
+            yield b''.join(chunk)
@@ -0,0 +1,129 @@
+import zlib
+from typing import AsyncIterable, Iterable
+
+from .codecs import accept_ranges, by_preference
+from .middleware import Middleware
+from .response import NO_BODY_STATUSES, Response
+
+# window bits selecting the container of each Content-Encoding
+ENCODINGS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+_unset = object()
+
+
+class Compression(Middleware):
+    '''Compresses responses with the encoding picked from Accept-Encoding
+
+    Bodies smaller than min_size are sent as they are. Streams are always
+    compressed, their size is unknown when the headers are sent, and
+    every chunk is flushed so clients do not wait on the compressor.
+    '''
+    MAX_CACHED_ACCEPTS = 256
+
+    def __init__(self, min_size=1024, level=6):
+        self.min_size = min_size
+        self.level = level
+        self._accepts = {}
+
+    def encoding(self, accept_encoding: str) -> str:
+        '''Preferred encoding the client accepts, None for identity'''
+        if not accept_encoding:
+            return None
+
+        encoding = self._accepts.get(accept_encoding, _unset)
+        if encoding is _unset:
+            encoding = self._match(accept_encoding)
+            # clients choose the header, keep the cache bounded
+            if len(self._accepts) < self.MAX_CACHED_ACCEPTS:
+                self._accepts[accept_encoding] = encoding
+
+        return encoding
+
+    def after(self, req, resp: Response) -> Response:
+        return self.compress(req, resp)
+
+    def compress(self, req, resp: Response) -> Response:
+        if resp.status in NO_BODY_STATUSES:
+            return resp
+
+        if 'Content-Encoding' in resp.headers:
+            return resp
+
+        if resp.stream is None and len(resp.body) < self.min_size:
+            return resp
+
+        encoding = self.encoding(req.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return resp
+
+        headers = dict(resp.headers)
+        headers['Content-Encoding'] = encoding
+        vary = headers.get('Vary')
+        headers['Vary'] = vary + ', Accept-Encoding' if vary \
+            else 'Accept-Encoding'
+
+        wbits = ENCODINGS[encoding]
+        if resp.stream is None:
+            return Response(
+                zlib.compress(resp.body, self.level, wbits),
+                status=resp.status,
+                headers=headers,
+            )
+
+        if hasattr(resp.stream, '__aiter__'):
+            stream = self._compress_astream(resp.stream, wbits)
+        else:
+            stream = self._compress_stream(resp.stream, wbits)
+
+        return Response(status=resp.status, headers=headers, stream=stream)
+
+    def _match(self, accept_encoding: str) -> str:
+        ranges = accept_ranges(accept_encoding)
+        refused = {name for name, quality in ranges if quality <= 0}
+        for name in by_preference(ranges):
+            if name == 'identity':
+                return None
+            if name == '*':
+                # any encoding the client did not refuse by name
+                for encoding in ENCODINGS:
+                    if encoding not in refused:
+                        return encoding
+                return None
+            if name in ENCODINGS:
+                return name
+
+        return None
+
+    def _compressor(self, wbits: int):
+        return zlib.compressobj(self.level, zlib.DEFLATED, wbits)
+
+    def _compress_stream(
+            self,
+            stream: Iterable[bytes],
+            wbits: int,
+    ) -> Iterable[bytes]:
+        compressor = self._compressor(wbits)
+        for chunk in stream:
+            data = compressor.compress(chunk) \
+                + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+    async def _compress_astream(
+            self,
+            stream: AsyncIterable[bytes],
+            wbits: int,
+    ) -> AsyncIterable[bytes]:
+        compressor = self._compressor(wbits)
+        async for chunk in stream:
+            data = compressor.compress(chunk) \
+                + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+
+        yield compressor.flush()
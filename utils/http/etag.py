@@ -0,0 +1,28 @@
+from .response import Response
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    '''Weak comparison of an If-None-Match header against an ETag'''
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+
+    return False
+
+
+def not_modified(req, etag: str) -> Response:
+    '''304 response when req already has the etag, None otherwise'''
+    if not etag_matches(req.headers.get('If-None-Match'), etag):
+        return None
+
+    return Response(status=304, headers={'ETag': etag})
@@ -0,0 +1,272 @@
+from bisect import bisect_left
+from threading import Lock, get_native_id
+from time import perf_counter
+from typing import List, Tuple
+
+from .api import Api
+from .middleware import Middleware
+from .request import Request
+from .response import Response
+
+# upper bounds in seconds, doubling from 0.5 ms to about 16 s
+LATENCY_BUCKETS = tuple(0.0005 * 2 ** exp for exp in range(16))
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class ShardedCounters:
+    '''Fixed size array of counters with one shard per OS thread
+
+    Each thread only adds to its own shard, so increments take no lock
+    and none is lost; reads sum the shards. gevent does not patch
+    get_native_id, greenlets share the shard of their thread and do not
+    switch in the middle of an add.
+    '''
+
+    def __init__(self, size: int):
+        self.size = size
+        self._shards = {}
+        self._lock = Lock()
+
+    def shard(self) -> list:
+        tid = get_native_id()
+        shard = self._shards.get(tid)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(tid, [0] * self.size)
+
+        return shard
+
+    def add(self, index: int, value=1):
+        self.shard()[index] += value
+
+    def totals(self) -> list:
+        totals = [0] * self.size
+        for shard in list(self._shards.values()):
+            for index, value in enumerate(shard):
+                totals[index] += value
+
+        return totals
+
+
+class Counter:
+    def __init__(self):
+        self._counters = ShardedCounters(1)
+
+    def inc(self, value=1):
+        self._counters.add(0, value)
+
+    @property
+    def value(self):
+        return self._counters.totals()[0]
+
+
+class Gauge(Counter):
+    def dec(self, value=1):
+        self._counters.add(0, -value)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # one counter per bucket, then +Inf and the sum of the values
+        self._counters = ShardedCounters(len(buckets) + 2)
+
+    def observe(self, value: float):
+        shard = self._counters.shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        '''Cumulative bucket counts ending with +Inf, sum and count'''
+        totals = self._counters.totals()
+        cumulative = []
+        count = 0
+        for value in totals[:-1]:
+            count += value
+            cumulative.append(count)
+
+        return cumulative, totals[-1], count
+
+
+class RouteMetrics(Middleware):
+    '''Middleware keeping metrics by route and method, created on first
+    use'''
+
+    def __init__(self):
+        self._lock = Lock()
+
+    def render(self) -> str:
+        '''Prometheus text exposition format'''
+        raise NotImplementedError
+
+    def _items(self, metrics: dict) -> list:
+        with self._lock:
+            return sorted(metrics.items())
+
+    def _metric(self, metrics: dict, key: tuple, factory):
+        metric = metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = metrics.get(key)
+                if metric is None:
+                    metric = metrics[key] = factory()
+
+        return metric
+
+
+class HttpMetrics(RouteMetrics):
+    '''Latency histograms, in-flight gauges and response counters by
+    route and method
+
+    Latency is measured until the handler returns, streamed bodies are
+    still being sent then.
+    '''
+
+    def __init__(self, buckets: Tuple[float] = LATENCY_BUCKETS,
+                 clock=perf_counter):
+        super().__init__()
+        self.buckets = buckets
+        self.clock = clock
+        self.latency = {}
+        self.in_flight = {}
+        self.responses = {}
+
+    def before(self, req: Request) -> Response:
+        self._metric(self.in_flight, (req.route, req.method), Gauge).inc()
+        req.context['metrics.start'] = self.clock()
+        return None
+
+    def after(self, req: Request, resp: Response) -> Response:
+        self._done(req, int(resp.status))
+        return resp
+
+    def error(self, req: Request, exc: Exception) -> Response:
+        self._done(req, 500)
+        return None
+
+    def render(self) -> str:
+        '''Prometheus text exposition format'''
+        lines = histogram_lines(
+            'http_request_duration_seconds',
+            'Time spent in handlers',
+            self.buckets,
+            self._items(self.latency),
+        )
+        lines.append('# HELP http_requests_in_flight Requests in handlers')
+        lines.append('# TYPE http_requests_in_flight gauge')
+        for key, gauge in self._items(self.in_flight):
+            lines.append('http_requests_in_flight{{{}}} {}'.format(
+                route_labels(*key),
+                gauge.value,
+            ))
+
+        lines.append('# HELP http_responses_total Responses by status')
+        lines.append('# TYPE http_responses_total counter')
+        for key, counter in self._items(self.responses):
+            route, method, status = key
+            lines.append('http_responses_total{{{},status="{}"}} {}'.format(
+                route_labels(route, method),
+                status,
+                counter.value,
+            ))
+
+        return '\n'.join(lines) + '\n'
+
+    def _done(self, req: Request, status: int):
+        elapsed = self.clock() - req.context.pop('metrics.start')
+        key = (req.route, req.method)
+        self._metric(self.latency, key, self._histogram).observe(elapsed)
+        self._metric(self.in_flight, key, Gauge).dec()
+        self._metric(self.responses, key + (status,), Counter).inc()
+
+    def _histogram(self) -> Histogram:
+        return Histogram(self.buckets)
+
+
+class StatsMetrics:
+    '''Exposition of a stats() dict, like the ones of the caches
+
+    Running totals are counters, every other number is a gauge.
+    '''
+
+    def __init__(self, prefix: str, stats,
+                 counters: Tuple[str] = ('hits', 'misses', 'evictions')):
+        self.prefix = prefix
+        self.stats = stats
+        self.counters = counters
+
+    def render(self) -> str:
+        lines = []
+        for key, value in sorted(self.stats().items()):
+            if isinstance(value, bool) or \
+                    not isinstance(value, (int, float)):
+                continue
+
+            if key in self.counters:
+                name = '{}_{}_total'.format(self.prefix, key)
+                kind = 'counter'
+            else:
+                name = '{}_{}'.format(self.prefix, key)
+                kind = 'gauge'
+
+            lines.append('# TYPE {} {}'.format(name, kind))
+            lines.append('{} {}'.format(name, value))
+
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsApi:
+    '''Renders every metrics object given, middleware or StatsMetrics'''
+
+    api = Api('/metrics')
+
+    def __init__(self, *metrics):
+        self.metrics = metrics
+
+    @api.get
+    def get_metrics(self, _):
+        return Response(
+            ''.join(metrics.render() for metrics in self.metrics),
+            content_type=PROMETHEUS_CONTENT_TYPE,
+        )
+
+
+def histogram_lines(name: str, description: str, buckets: Tuple[float],
+                    items: List[tuple]) -> List[str]:
+    '''Exposition of histograms keyed by (route, method)'''
+    lines = [
+        '# HELP {} {}'.format(name, description),
+        '# TYPE {} histogram'.format(name),
+    ]
+    bounds = [repr(bound) for bound in buckets] + ['+Inf']
+    for key, histogram in items:
+        labels = route_labels(*key)
+        cumulative, total, count = histogram.snapshot()
+        for bound, value in zip(bounds, cumulative):
+            lines.append('{}_bucket{{{},le="{}"}} {}'.format(
+                name,
+                labels,
+                bound,
+                value,
+            ))
+        lines.append('{}_sum{{{}}} {}'.format(
+            name,
+            labels,
+            repr(float(total)),
+        ))
+        lines.append('{}_count{{{}}} {}'.format(name, labels, count))
+
+    return lines
+
+
+def label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def route_labels(route: str, method: str) -> str:
+    return 'route="{}",method="{}"'.format(
+        label_value(route),
+        label_value(method),
+    )
@@ -0,0 +1,91 @@
+from typing import List
+
+from .codecs import Codecs, default_codecs
+from .request import Request
+from .response import Response
+
+
+class Middleware:
+    '''Hooks run by the backends around every handler, all optional
+
+    before may return a Response to skip the handler. For every
+    middleware whose before ran, exactly one of after or error runs:
+    after with the response, error with the exception of the handler,
+    where returning a Response answers with it instead of a 500.
+    '''
+
+    def before(self, req: Request) -> Response:
+        return None
+
+    def after(self, req: Request, resp: Response) -> Response:
+        return resp
+
+    def error(self, req: Request, exc: Exception) -> Response:
+        return None
+
+
+class Pipeline:
+    '''Runs a handler between the middleware, outermost first
+
+    Responses are encoded with the codec the client accepts before the
+    after hooks, which see them as they are sent.
+    '''
+
+    def __init__(
+            self,
+            codecs: Codecs = default_codecs,
+            middleware: List[Middleware] = None,
+    ):
+        self.codecs = codecs
+        self.middleware = list(middleware) if middleware else []
+
+    def dispatch(self, req: Request, func, params: dict) -> Response:
+        entered = 0
+        try:
+            resp = None
+            for middleware in self.middleware:
+                resp = middleware.before(req)
+                entered += 1
+                if resp is not None:
+                    break
+            else:
+                resp = func(req, **params)
+        except Exception as e:
+            return self._error(req, e, entered)
+
+        return self._after(req, resp, entered)
+
+    async def adispatch(self, req: Request, func, params: dict) -> Response:
+        entered = 0
+        try:
+            resp = None
+            for middleware in self.middleware:
+                resp = middleware.before(req)
+                entered += 1
+                if resp is not None:
+                    break
+            else:
+                resp = await func(req, **params)
+        except Exception as e:
+            return self._error(req, e, entered)
+
+        return self._after(req, resp, entered)
+
+    def _after(self, req: Request, resp: Response, entered: int) -> Response:
+        resp = self.codecs.negotiate(req, resp)
+        for middleware in reversed(self.middleware[:entered]):
+            resp = middleware.after(req, resp)
+
+        return resp
+
+    def _error(self, req: Request, exc: Exception, entered: int) -> Response:
+        handled = None
+        for middleware in reversed(self.middleware[:entered]):
+            resp = middleware.error(req, exc)
+            if handled is None:
+                handled = resp
+
+        if handled is None:
+            raise exc
+
+        return self.codecs.negotiate(req, handled)
@@ -0,0 +1,148 @@
+from functools import partial
+from typing import AsyncIterable, Iterable
+
+from utils.querystats import QueryStats
+from utils.tracing import Tracer, tracer
+
+from .metrics import Histogram, RouteMetrics, histogram_lines
+from .request import Request
+from .response import Response
+
+# operations and documents per request, doubling from 1
+OPS_BUCKETS = tuple(2 ** exp for exp in range(8))
+DOCS_BUCKETS = tuple(2 ** exp for exp in range(16))
+
+# BSON bytes per request, doubling from 1 KiB to 32 MiB
+BYTES_BUCKETS = tuple(1024 * 2 ** exp for exp in range(16))
+
+
+class QueryMetrics(RouteMetrics):
+    '''Counts the MongoDB operations of every handler, with the documents
+    they returned and, with measure_bytes, their BSON size
+
+    The totals of the handler are set on the current span, the request
+    span when RequestTracing runs before. Streamed bodies keep counting
+    while they are sent, the histograms by route and method get the
+    totals once the stream ends. Measuring bytes encodes every document
+    again, it is meant for tests and investigations.
+    '''
+
+    def __init__(self, tracer: Tracer = tracer, measure_bytes=False):
+        super().__init__()
+        self.tracer = tracer
+        self.measure_bytes = measure_bytes
+        self.ops = {}
+        self.docs = {}
+        self.bytes = {}
+
+    def before(self, req: Request) -> Response:
+        req.context['querystats'] = QueryStats(self.measure_bytes).start()
+        return None
+
+    def after(self, req: Request, resp: Response) -> Response:
+        stats = self._stop(req)
+        if resp.stream is None:
+            self._observe(req, stats)
+        elif hasattr(resp.stream, '__aiter__'):
+            resp.stream = self._count_astream(req, stats, resp.stream)
+        else:
+            resp.stream = self._count_stream(req, stats, resp.stream)
+
+        return resp
+
+    def error(self, req: Request, exc: Exception) -> Response:
+        self._observe(req, self._stop(req))
+        return None
+
+    def render(self) -> str:
+        lines = histogram_lines(
+            'mongo_operations_per_request',
+            'MongoDB operations made by handlers',
+            OPS_BUCKETS,
+            self._items(self.ops),
+        )
+        lines += histogram_lines(
+            'mongo_documents_per_request',
+            'Documents returned by MongoDB to handlers',
+            DOCS_BUCKETS,
+            self._items(self.docs),
+        )
+        if self.measure_bytes:
+            lines += histogram_lines(
+                'mongo_bytes_per_request',
+                'BSON bytes returned by MongoDB to handlers',
+                BYTES_BUCKETS,
+                self._items(self.bytes),
+            )
+        return '\n'.join(lines) + '\n'
+
+    def _stop(self, req: Request) -> QueryStats:
+        stats = req.context.pop('querystats')
+        stats.stop()
+
+        span = self.tracer.current()
+        if span is not None:
+            span.set('db.ops', stats.ops)
+            span.set('db.docs', stats.docs)
+            if self.measure_bytes:
+                span.set('db.bytes', stats.bytes)
+
+        return stats
+
+    def _count_stream(
+            self,
+            req: Request,
+            stats: QueryStats,
+            stream: Iterable[bytes],
+    ) -> Iterable[bytes]:
+        # current only while a chunk is made, the server sends it
+        # from its own context
+        chunks = iter(stream)
+        try:
+            while True:
+                stats.resume()
+                try:
+                    chunk = next(chunks, None)
+                finally:
+                    stats.stop()
+
+                if chunk is None:
+                    return
+
+                yield chunk
+        finally:
+            self._observe(req, stats)
+
+    async def _count_astream(
+            self,
+            req: Request,
+            stats: QueryStats,
+            stream: AsyncIterable[bytes],
+    ) -> AsyncIterable[bytes]:
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                stats.resume()
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    stats.stop()
+
+                yield chunk
+        finally:
+            self._observe(req, stats)
+
+    def _observe(self, req: Request, stats: QueryStats):
+        key = (req.route, req.method)
+        observed = [
+            (self.ops, OPS_BUCKETS, stats.ops),
+            (self.docs, DOCS_BUCKETS, stats.docs),
+        ]
+        if self.measure_bytes:
+            observed.append((self.bytes, BYTES_BUCKETS, stats.bytes))
+
+        for metrics, buckets, value in observed:
+            factory = partial(Histogram, buckets)
+            self._metric(metrics, key, factory).observe(value)
@@ -1,4 +1,9 @@
-from ujson import loads
+from collections.abc import Mapping
+from io import BytesIO
+from typing import BinaryIO, Iterator
+from urllib.parse import parse_qsl
+
+from .codecs import Codecs, default_codecs
 
 REMOTE_ADDR_HEADERS = [
     'Forwarded',
@@ -6,36 +11,216 @@ REMOTE_ADDR_HEADERS = [
     'X-Real-IP',
 ]
 
+BODY_CHUNK_SIZE = 64 * 1024
+
+_unset = object()
+
+
+def parse_query(query_string: str) -> dict:
+    if not query_string:
+        return {}
+
+    return dict(parse_qsl(query_string, keep_blank_values=True))
+
+
+class EnvironHeaders(Mapping):
+    '''Case insensitive view of the headers in a WSGI environ'''
+
+    CGI_HEADERS = {
+        'CONTENT_TYPE': 'Content-Type',
+        'CONTENT_LENGTH': 'Content-Length',
+    }
+
+    def __init__(self, environ: dict):
+        self.environ = environ
+
+    def _key(self, name: str) -> str:
+        key = name.upper().replace('-', '_')
+        if key in self.CGI_HEADERS:
+            return key
+
+        return 'HTTP_' + key
+
+    def __getitem__(self, name: str) -> str:
+        return self.environ[self._key(name)]
+
+    def get(self, name: str, default=None) -> str:
+        return self.environ.get(self._key(name), default)
+
+    def __contains__(self, name) -> bool:
+        return self._key(name) in self.environ
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.environ:
+            if key.startswith('HTTP_'):
+                yield key[5:].replace('_', '-').title()
+            elif key in self.CGI_HEADERS:
+                yield self.CGI_HEADERS[key]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class PairsHeaders(Mapping):
+    '''Case insensitive view of (name, value) byte pairs, as ASGI sends'''
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self._headers = None
+
+    @property
+    def headers(self) -> dict:
+        if self._headers is None:
+            self._headers = {
+                name.decode('latin-1').lower(): value.decode('latin-1')
+                for name, value in self.pairs
+            }
+
+        return self._headers
+
+    def __getitem__(self, name: str) -> str:
+        return self.headers[name.lower()]
+
+    def get(self, name: str, default=None) -> str:
+        return self.headers.get(name.lower(), default)
+
+    def __contains__(self, name) -> bool:
+        return name.lower() in self.headers
+
+    def __iter__(self) -> Iterator[str]:
+        return (name.title() for name in self.headers)
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
 
 class Request:
+    '''HTTP request handed to the Api handlers
+
+    Everything past path and method is parsed on first access. The body
+    can be given as bytes, or as a stream read on first access to body,
+    or consumed in chunks through iter_body for large uploads.
+    '''
+
     def __init__(
             self,
             path,
             method,
-            body,
-            headers,
-            query,
+            body=None,
+            headers=None,
+            query=None,
             remote_addr=None,
+            stream: BinaryIO = None,
+            content_length: int = None,
+            query_string: str = None,
+            codecs: Codecs = default_codecs,
     ):
         self.path = path
         self.method = method
-        self.body = body
-        self.headers = headers
-        self.query = query
-        self.content_type = headers.get('Content-Type', 'text/plain')
-        self.authorization = headers.get('Authorization', '')
+        self.headers = headers if headers is not None else {}
+        self._body = body
+        self._stream = stream
+        self._content_length = content_length
+        self._query = query
+        self._query_string = query_string
+        self._peer_addr = remote_addr
+        self._remote_addr = None
+        self.codecs = codecs
+        # url template of the Api handling it, set by the backends
+        self.route = None
+        self._context = None
+        self._json = _unset
+
+    @property
+    def context(self) -> dict:
+        '''Per request state of the middleware'''
+        if self._context is None:
+            self._context = {}
+
+        return self._context
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            if self._stream is None:
+                self._body = b''
+            elif self._content_length is None:
+                self._body = self._stream.read()
+            else:
+                self._body = self._stream.read(self._content_length)
+            self._stream = None
+
+        return self._body
+
+    @property
+    def stream(self) -> BinaryIO:
+        '''File-like body, unread unless body was accessed before'''
+        if self._stream is None:
+            return BytesIO(self.body)
+
+        return self._stream
+
+    def iter_body(self, chunk_size: int = BODY_CHUNK_SIZE) -> Iterator[bytes]:
+        if self._stream is None:
+            yield self.body
+            return
+
+        stream = self._stream
+        self._stream = None
+        remaining = self._content_length
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(
+                chunk_size,
+                remaining,
+            )
+            chunk = stream.read(size)
+            if not chunk:
+                return
 
-        self.host = headers.get('Host', '')
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    @property
+    def query(self) -> dict:
+        if self._query is None:
+            self._query = parse_query(self._query_string)
+
+        return self._query
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('Content-Type', 'text/plain')
+
+    @property
+    def authorization(self) -> str:
+        return self.headers.get('Authorization', '')
+
+    @property
+    def host(self) -> str:
+        return self.headers.get('Host', '')
+
+    @property
+    def port(self) -> int:
         port = self.host.split(':')
-        self.port = int(port[1]) if len(port) >= 2 else 80
-        self.remote_addr = remote_addr if remote_addr else ''
-        for header in REMOTE_ADDR_HEADERS:
-            self.remote_addr = self.headers.get(header, self.remote_addr)
+        return int(port[1]) if len(port) >= 2 else 80
+
+    @property
+    def remote_addr(self) -> str:
+        if self._remote_addr is None:
+            remote_addr = self._peer_addr if self._peer_addr else ''
+            for header in REMOTE_ADDR_HEADERS:
+                remote_addr = self.headers.get(header, remote_addr)
+            self._remote_addr = remote_addr
 
-        self._json = None
+        return self._remote_addr
 
     @property
     def json(self):
-        if self._json is None:
-            self._json = loads(self.body)
+        '''Body decoded by the codec of its Content-Type, JSON by default'''
+        if self._json is _unset:
+            codec = self.codecs.for_content_type(
+                self.headers.get('Content-Type'),
+            )
+            self._json = codec.loads(self.body)
         return self._json
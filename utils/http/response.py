@@ -1,33 +1,93 @@
-from ujson import dumps
+from typing import AsyncIterable, Iterable, Union
+
+from .codecs import JSON, Codec
+
+# statuses sent without a body, nor headers describing one
+NO_BODY_STATUSES = {204, 304}
 
 
 class Response:
+    codec = None
+
     def __init__(
             self,
             body=None,
             status=200,
             headers=None,
             content_type=None,
+            stream: Iterable[bytes] = None,
     ):
         content_type = content_type if content_type else 'text/plain'
         if isinstance(body, str):
             body = body.encode()
 
-        self.body = body if body else b''
+        self._body = body if body else b''
+        self.stream = stream
         self.status = status
         self.headers = headers if headers else {}
-        self.headers['Content-Type'] = self.headers.get(
-            'Content-Type',
-            content_type,
-        )
-
-
-def json_response(body, *args, content_type='application/json',
-                  **kwargs) -> Response:
-    body = dumps(body)
-    return Response(
-        body,
-        *args,
-        content_type=content_type,
-        **kwargs,
-    )
+        if status not in NO_BODY_STATUSES:
+            self.headers.setdefault('Content-Type', content_type)
+
+    @property
+    def body(self) -> bytes:
+        return self._body
+
+
+class ContentResponse(Response):
+    '''Response of a value encoded by a codec, on first access to body
+
+    The backends switch the codec to the one the client accepts.
+    '''
+
+    def __init__(self, content, status=200, headers=None, codec=JSON):
+        super().__init__(status=status, headers=headers)
+        self.content = content
+        self.encode_with(codec)
+
+    def encode_with(self, codec: Codec):
+        self.codec = codec
+        self._body = None
+        self.headers['Content-Type'] = codec.content_type
+        self.headers['Vary'] = 'Accept'
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = self.codec.dumps(self.content)
+
+        return self._body
+
+
+class ListStreamResponse(Response):
+    '''Streams {key: [items]} encoded by a codec
+
+    Async iterables of items need the ASGI backend.
+    '''
+
+    def __init__(self, key: str, items: Union[Iterable, AsyncIterable],
+                 status=200, headers=None, codec=JSON):
+        super().__init__(status=status, headers=headers)
+        self.key = key
+        self.items = items
+        self.encode_with(codec)
+
+    def encode_with(self, codec: Codec):
+        self.codec = codec
+        self.headers['Content-Type'] = codec.content_type
+        self.headers['Vary'] = 'Accept'
+        # generators, nothing is read until the backend sends them
+        if hasattr(self.items, '__aiter__'):
+            self.stream = codec.adumps_list(self.key, self.items)
+        else:
+            self.stream = codec.dumps_list(self.key, self.items)
+
+
+def json_response(body, *args, **kwargs) -> Response:
+    '''JSON unless the client accepts another registered codec'''
+    return ContentResponse(body, *args, **kwargs)
+
+
+def json_stream_response(key: str, items: Union[Iterable, AsyncIterable],
+                         *args, **kwargs) -> Response:
+    '''Streams {key: [items]}, async iterables need the ASGI backend'''
+    return ListStreamResponse(key, items, *args, **kwargs)
@@ -0,0 +1,79 @@
+import re
+from typing import Dict, Tuple
+
+PARAM_RE = re.compile(r'{([A-Za-z_][A-Za-z0-9_]*)}')
+
+
+def compile_template(template: str):
+    '''Regex matching an Api url template, {name} matches one segment'''
+    pattern = []
+    pos = 0
+    for match in PARAM_RE.finditer(template):
+        pattern.append(re.escape(template[pos:match.start()]))
+        pattern.append('(?P<{}>[^/]+)'.format(match.group(1)))
+        pos = match.end()
+
+    pattern.append(re.escape(template[pos:]))
+    return re.compile(''.join(pattern) + '$')
+
+
+class Route:
+    '''Handler of one method of an Api url'''
+    __slots__ = ('url', 'func')
+
+    def __init__(self, url: str, func):
+        self.url = url
+        self.func = func
+
+
+def api_routes(url: str, methods: dict) -> Dict[str, Route]:
+    return {method: Route(url, func) for method, func in methods.items()}
+
+
+class Router:
+    '''Maps request paths to the handler methods of an Api url
+
+    Templates without parameters are looked up in a dict, the others are
+    compiled once and only tried against paths with as many segments.
+    The methods are opaque to it, the backends map them to Routes.
+    '''
+
+    def __init__(self):
+        self.routes = {}
+        self._static = {}
+        self._dynamic = {}
+
+    def add(self, template: str, methods: dict):
+        self.routes[template] = methods
+        return self
+
+    def compile(self):
+        self._static = {}
+        self._dynamic = {}
+        for template, methods in self.routes.items():
+            if not PARAM_RE.search(template):
+                self._static[template.rstrip('/') or '/'] = methods
+                continue
+
+            segments = template.count('/')
+            self._dynamic.setdefault(segments, []).append(
+                (compile_template(template).match, methods),
+            )
+
+        return self
+
+    def match(self, path: str) -> Tuple[dict, Dict[str, str]]:
+        '''Returns (methods, params), methods is None when no url matches'''
+        if len(path) > 1 and path[-1] == '/':
+            path = path[:-1]
+
+        methods = self._static.get(path)
+        if methods is not None:
+            return methods, {}
+
+        for match, methods in self._dynamic.get(path.count('/'), ()):
+            result = match(path)
+            if result is not None:
+                return methods, result.groupdict()
+
+        return None, None
@@ -0,0 +1,212 @@
+import os
+import signal
+import socket
+import sys
+import time
+from wsgiref.simple_server import make_server
+
+import gevent
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+__all__ = [
+    'serve',
+    'serve_dev',
+]
+
+
+def serve_dev(app, host='', port=3000):
+    '''Single threaded wsgiref server, for development only'''
+    with make_server(host, port, app) as httpd:
+        httpd.serve_forever()
+
+
+def serve(
+        app,
+        host='',
+        port=3000,
+        workers=1,
+        pool_size=1000,
+        backlog=2048,
+        graceful_timeout=10.0,
+        access_log=False,
+        factory=False,
+):
+    '''Serves app with gevent, pre-forking when workers > 1
+
+    Blocking calls in the app only yield to other requests when the
+    process is monkey patched, call gevent.monkey.patch_all() before
+    importing anything else. With factory, app is called in every worker
+    to build the WSGI app there, after the fork, so database clients and
+    process pools are not shared between processes.
+    '''
+    server = PreforkServer(
+        app,
+        host=host,
+        port=port,
+        workers=workers,
+        pool_size=pool_size,
+        backlog=backlog,
+        graceful_timeout=graceful_timeout,
+        access_log=access_log,
+        factory=factory,
+    )
+    if workers > 1:
+        server.run()
+    else:
+        server.run_worker()
+
+
+def listen_socket(host: str, port: int, backlog: int) -> socket.socket:
+    '''Listening socket that other workers can bind with SO_REUSEPORT'''
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    # inherited by accepted sockets, pywsgi writes headers and body apart
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class PreforkServer:
+    '''Master process keeping a set of gevent workers on one port
+
+    Every worker binds its own SO_REUSEPORT socket, so the kernel spreads
+    connections across them. SIGHUP starts a new set of workers and then
+    drains the old ones; SIGTERM and SIGINT drain all workers and exit.
+    Workers that die are replaced.
+    '''
+
+    def __init__(
+            self,
+            app,
+            host='',
+            port=3000,
+            workers=2,
+            pool_size=1000,
+            backlog=2048,
+            graceful_timeout=10.0,
+            access_log=False,
+            factory=False,
+    ):
+        self.app = app
+        self.factory = factory
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.pool_size = pool_size
+        self.backlog = backlog
+        self.graceful_timeout = graceful_timeout
+        self.access_log = access_log
+        self.pids = set()
+        self.old_pids = set()
+        self._running = False
+        self._restart = False
+
+    def run(self):
+        # fail here and not in every worker if the port is taken
+        listen_socket(self.host, self.port, self.backlog).close()
+
+        self._running = True
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+
+        self._spawn_workers()
+        while self._running:
+            if self._restart:
+                self._restart = False
+                self.old_pids |= self.pids
+                self.pids = set()
+                self._spawn_workers()
+                self._kill(self.old_pids, signal.SIGTERM)
+
+            self._reap()
+            self._spawn_workers()
+            time.sleep(0.1)
+
+        self._stop_workers()
+
+    def run_worker(self):
+        app = self.app() if self.factory else self.app
+        sock = listen_socket(self.host, self.port, self.backlog)
+        server = WSGIServer(
+            sock,
+            app,
+            spawn=Pool(self.pool_size),
+            log='default' if self.access_log else None,
+        )
+
+        def stop():
+            server.stop(timeout=self.graceful_timeout)
+
+        gevent.signal_handler(signal.SIGTERM, stop)
+        gevent.signal_handler(signal.SIGINT, stop)
+        server.serve_forever()
+
+    def _spawn_workers(self):
+        while self._running and len(self.pids) < self.workers:
+            pid = os.fork()
+            if pid == 0:
+                self._worker_main()
+
+            self.pids.add(pid)
+
+    def _worker_main(self):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gevent.reinit()
+        status = 0
+        try:
+            self.run_worker()
+        except BaseException:
+            status = 1
+            sys.excepthook(*sys.exc_info())
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+
+            if pid == 0:
+                return
+
+            self.pids.discard(pid)
+            self.old_pids.discard(pid)
+
+    def _stop_workers(self):
+        self.old_pids |= self.pids
+        self.pids = set()
+        self._kill(self.old_pids, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout + 1
+        while self.old_pids and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+
+        self._kill(self.old_pids, signal.SIGKILL)
+        for pid in self.old_pids:
+            os.waitpid(pid, 0)
+        self.old_pids = set()
+
+    def _kill(self, pids, sig):
+        for pid in list(pids):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pids.discard(pid)
+
+    def _handle_stop(self, *_):
+        self._running = False
+
+    def _handle_restart(self, *_):
+        self._restart = True
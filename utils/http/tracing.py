@@ -0,0 +1,83 @@
+from utils.tracing import RingBufferExporter, Tracer, new_trace_id, tracer
+
+from .api import Api
+from .middleware import Middleware
+from .request import Request
+from .response import Response, json_response
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# longer request ids from clients are replaced
+MAX_REQUEST_ID_LENGTH = 128
+
+
+class RequestTracing(Middleware):
+    '''Runs every handler in a span, the root of its trace
+
+    The trace id is the request id the client sent, or a new one, and is
+    sent back in the response headers.
+    '''
+
+    def __init__(self, tracer: Tracer = tracer, header=REQUEST_ID_HEADER):
+        self.tracer = tracer
+        self.header = header
+
+    def before(self, req: Request) -> Response:
+        request_id = req.headers.get(self.header)
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            request_id = new_trace_id()
+
+        span = self.tracer.span(
+            'http {} {}'.format(req.method, req.route),
+            trace_id=request_id,
+            method=req.method,
+            route=req.route,
+            path=req.path,
+        )
+        req.context['tracing.request_id'] = request_id
+        req.context['tracing.span'] = span.start()
+        return None
+
+    def after(self, req: Request, resp: Response) -> Response:
+        span = req.context.pop('tracing.span')
+        span.set('status', int(resp.status))
+        span.finish()
+        resp.headers[self.header] = req.context['tracing.request_id']
+        return resp
+
+    def error(self, req: Request, exc: Exception) -> Response:
+        span = req.context.pop('tracing.span')
+        span.set('status', 500)
+        span.finish(exc)
+        return None
+
+
+class TracesApi:
+    '''Slowest recent traces kept by a RingBufferExporter
+
+    GET /debug/traces?min_duration=0.5 lists the traces whose root span
+    lasted at least that many seconds. The buffer is per process, with
+    pre-forked workers each one only sees its own traces.
+    '''
+    api = Api('/debug/traces')
+
+    def __init__(self, exporter: RingBufferExporter):
+        self.exporter = exporter
+
+    @api.get
+    def list_traces(self, req: Request):
+        try:
+            min_duration = float(req.query.get('min_duration', 0))
+        except ValueError:
+            return Response('Invalid min_duration', status=400)
+
+        traces = self.exporter.slow_traces(min_duration)
+        return json_response({
+            'traces': [
+                {
+                    'trace_id': trace_id,
+                    'spans': [span.asdict() for span in spans],
+                }
+                for trace_id, spans in traces.items()
+            ],
+        })
@@ -0,0 +1,264 @@
+from contextvars import ContextVar
+from typing import Iterable
+
+from bson import encode
+
+__all__ = [
+    'AsyncCountedCollection',
+    'CountedCollection',
+    'QueryStats',
+    'count_queries',
+    'current_stats',
+]
+
+_current = ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    '''Operations sent to MongoDB, with the documents and BSON bytes
+    they returned, while the stats are current
+
+    Counts of nested stats are added to the enclosing ones too, so a
+    test can set a budget on one call inside a counted request. Bytes
+    cost a BSON encoding of every document, they are only measured when
+    these stats or enclosing ones ask for them.
+    '''
+    __slots__ = (
+        'ops',
+        'docs',
+        'bytes',
+        'measure_bytes',
+        'parent',
+        '_sizes',
+        '_token',
+    )
+
+    def __init__(self, measure_bytes=True):
+        self.ops = 0
+        self.docs = 0
+        self.bytes = 0
+        self.measure_bytes = measure_bytes
+        self.parent = None
+        self._sizes = measure_bytes
+        self._token = None
+
+    def start(self):
+        '''Makes the stats the current ones'''
+        self.parent = _current.get()
+        self._sizes = self.measure_bytes or \
+            (self.parent is not None and self.parent._sizes)
+        return self.resume()
+
+    def resume(self):
+        '''Makes started stats current again, in another context or after
+        stop, adding to the same enclosing stats'''
+        self._token = _current.set(self)
+        return self
+
+    def stop(self):
+        _current.reset(self._token)
+        self._token = None
+
+    def asdict(self) -> dict:
+        return {
+            'ops': self.ops,
+            'docs': self.docs,
+            'bytes': self.bytes,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def count_queries(measure_bytes=True) -> QueryStats:
+    '''Stats to use as a context manager, or with start and stop'''
+    return QueryStats(measure_bytes)
+
+
+def current_stats() -> QueryStats:
+    return _current.get()
+
+
+def record(ops: int, docs: Iterable[dict] = ()):
+    stats = _current.get()
+    if stats is None:
+        return
+
+    count = 0
+    size = 0
+    if stats._sizes:
+        for doc in docs:
+            count += 1
+            size += len(encode(doc))
+    else:
+        for _ in docs:
+            count += 1
+
+    while stats is not None:
+        stats.ops += ops
+        stats.docs += count
+        stats.bytes += size
+        stats = stats.parent
+
+
+def _one_doc(doc: dict) -> tuple:
+    return () if doc is None else (doc,)
+
+
+class CountedCursor:
+    '''Cursor recording the documents it returns'''
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self.cursor = self.cursor.limit(*args, **kwargs)
+        return self
+
+    def skip(self, *args, **kwargs):
+        self.cursor = self.cursor.skip(*args, **kwargs)
+        return self
+
+    def batch_size(self, *args, **kwargs):
+        self.cursor = self.cursor.batch_size(*args, **kwargs)
+        return self
+
+    def __iter__(self):
+        for doc in self.cursor:
+            record(0, (doc,))
+            yield doc
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+class CountedCollection:
+    '''pymongo collection recording every operation in the current
+    QueryStats
+
+    A find is one operation, the getMore round trips of cursors larger
+    than a batch are not counted. Methods not listed here, like index
+    management, are passed through uncounted.
+    '''
+
+    def __init__(self, coll):
+        self.coll = coll
+
+    def find(self, *args, **kwargs) -> CountedCursor:
+        record(1)
+        return CountedCursor(self.coll.find(*args, **kwargs))
+
+    def find_one(self, *args, **kwargs) -> dict:
+        record(1)
+        doc = self.coll.find_one(*args, **kwargs)
+        record(0, _one_doc(doc))
+        return doc
+
+    def find_one_and_update(self, *args, **kwargs) -> dict:
+        record(1)
+        doc = self.coll.find_one_and_update(*args, **kwargs)
+        record(0, _one_doc(doc))
+        return doc
+
+    def find_one_and_delete(self, *args, **kwargs) -> dict:
+        record(1)
+        doc = self.coll.find_one_and_delete(*args, **kwargs)
+        record(0, _one_doc(doc))
+        return doc
+
+    def insert_one(self, *args, **kwargs):
+        record(1)
+        return self.coll.insert_one(*args, **kwargs)
+
+    def update_one(self, *args, **kwargs):
+        record(1)
+        return self.coll.update_one(*args, **kwargs)
+
+    def update_many(self, *args, **kwargs):
+        record(1)
+        return self.coll.update_many(*args, **kwargs)
+
+    def delete_one(self, *args, **kwargs):
+        record(1)
+        return self.coll.delete_one(*args, **kwargs)
+
+    def count_documents(self, *args, **kwargs) -> int:
+        record(1)
+        return self.coll.count_documents(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.coll, name)
+
+
+class AsyncCountedCursor(CountedCursor):
+    '''Motor cursor recording the documents it returns'''
+
+    async def to_list(self, length: int = None) -> list:
+        docs = await self.cursor.to_list(length=length)
+        record(0, docs)
+        return docs
+
+    async def __aiter__(self):
+        async for doc in self.cursor:
+            record(0, (doc,))
+            yield doc
+
+
+class AsyncCountedCollection:
+    '''Motor collection recording every operation in the current
+    QueryStats, see CountedCollection'''
+
+    def __init__(self, coll):
+        self.coll = coll
+
+    def find(self, *args, **kwargs) -> AsyncCountedCursor:
+        record(1)
+        return AsyncCountedCursor(self.coll.find(*args, **kwargs))
+
+    async def find_one(self, *args, **kwargs) -> dict:
+        record(1)
+        doc = await self.coll.find_one(*args, **kwargs)
+        record(0, _one_doc(doc))
+        return doc
+
+    async def find_one_and_update(self, *args, **kwargs) -> dict:
+        record(1)
+        doc = await self.coll.find_one_and_update(*args, **kwargs)
+        record(0, _one_doc(doc))
+        return doc
+
+    async def find_one_and_delete(self, *args, **kwargs) -> dict:
+        record(1)
+        doc = await self.coll.find_one_and_delete(*args, **kwargs)
+        record(0, _one_doc(doc))
+        return doc
+
+    async def insert_one(self, *args, **kwargs):
+        record(1)
+        return await self.coll.insert_one(*args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        record(1)
+        return await self.coll.update_one(*args, **kwargs)
+
+    async def update_many(self, *args, **kwargs):
+        record(1)
+        return await self.coll.update_many(*args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        record(1)
+        return await self.coll.delete_one(*args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs) -> int:
+        record(1)
+        return await self.coll.count_documents(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.coll, name)
@@ -1,6 +1,7 @@
-from dataclasses import dataclass, field, replace
+from dataclasses import dataclass, field, fields, replace
 
 __all__ = [
+    'Struct',
     'field',
     'replace',
 ]
@@ -14,7 +15,61 @@ cls_replace.__name__ = 'replace'
 cls_replace.__qualname__ = 'replace'
 
 
-def Struct(*args, frozen=True, **kwargs):
+def slots_replace(self, **changes):
+    cls = type(self)
+    new = cls.__new__(cls)
+    for name in cls.__slots__:
+        value = changes.pop(name) if name in changes else getattr(self, name)
+        object.__setattr__(new, name, value)
+
+    if changes:
+        raise TypeError('{} has no fields: {}'.format(
+            cls.__name__,
+            ', '.join(changes),
+        ))
+
+    post_init = getattr(new, '__post_init__', None)
+    if post_init is not None:
+        post_init()
+
+    return new
+
+
+slots_replace.__name__ = 'replace'
+slots_replace.__qualname__ = 'replace'
+
+
+def slots_getstate(self):
+    return [getattr(self, name) for name in self.__slots__]
+
+
+def slots_setstate(self, state):
+    for name, value in zip(self.__slots__, state):
+        object.__setattr__(self, name, value)
+
+
+def add_slots(cls):
+    names = tuple(item.name for item in fields(cls))
+    namespace = dict(cls.__dict__)
+    for name in names:
+        namespace.pop(name, None)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+
+    namespace['__slots__'] = names
+    namespace['replace'] = slots_replace
+    namespace['__getstate__'] = slots_getstate
+    namespace['__setstate__'] = slots_setstate
+
+    qualname = getattr(cls, '__qualname__', None)
+    cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    if qualname is not None:
+        cls.__qualname__ = qualname
+
+    return cls
+
+
+def Struct(*args, frozen=True, slots=False, **kwargs):
     def metaclass(name, bases, namespace):
         if namespace is None:
             namespace = {}
@@ -22,7 +77,11 @@ def Struct(*args, frozen=True, **kwargs):
         namespace['replace'] = cls_replace
 
         cls = type(name, bases, namespace)
-        return dataclass(cls, **kwargs)
+        cls = dataclass(cls, frozen=frozen, **kwargs)
+        if slots:
+            cls = add_slots(cls)
+
+        return cls
 
     if len(args) == 3:
         return metaclass(*args)
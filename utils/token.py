@@ -0,0 +1,54 @@
+import hmac
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from hashlib import sha256
+from typing import Iterable
+
+from ujson import dumps, loads
+
+
+def b64encode(data: bytes) -> str:
+    return urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def b64decode(data: str) -> bytes:
+    return urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class TokenSigner:
+    '''Signs JSON payloads as base64url <payload>.<hmac> tokens'''
+
+    def __init__(self, key: bytes, old_keys: Iterable[bytes] = (),
+                 digest=sha256):
+        self.key = key
+        self.keys = [key, *old_keys]
+        self.digest = digest
+
+    def sign(self, payload: dict) -> str:
+        body = b64encode(dumps(payload).encode())
+        return body + '.' + b64encode(self._signature(self.key, body))
+
+    def verify(self, token: str) -> dict:
+        body, _, signature = token.rpartition('.')
+        if not body:
+            return None
+
+        try:
+            signature = b64decode(signature)
+        except ValueError:
+            return None
+
+        for key in self.keys:
+            if hmac.compare_digest(self._signature(key, body), signature):
+                break
+        else:
+            return None
+
+        try:
+            payload = loads(b64decode(body))
+        except ValueError:
+            return None
+
+        return payload if isinstance(payload, dict) else None
+
+    def _signature(self, key: bytes, body: str) -> bytes:
+        return hmac.new(key, body.encode(), self.digest).digest()
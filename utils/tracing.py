@@ -0,0 +1,259 @@
+import json
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from inspect import (
+    isasyncgenfunction,
+    iscoroutinefunction,
+    isfunction,
+    isgeneratorfunction
+)
+from itertools import count
+from random import getrandbits
+from threading import Lock
+from time import perf_counter, time
+from typing import Dict, List
+
+__all__ = [
+    'JsonLinesExporter',
+    'RingBufferExporter',
+    'Span',
+    'Tracer',
+    'new_trace_id',
+    'trace_methods',
+    'traced',
+    'tracer',
+]
+
+_current = ContextVar('current_span', default=None)
+
+# span ids only have to be unique within a trace, recorded by one process
+_span_ids = count(1)
+
+
+def new_trace_id() -> str:
+    # random reseeds in forked workers, and is cheaper than uuid4
+    return '{:032x}'.format(getrandbits(128))
+
+
+class Span:
+    __slots__ = (
+        'tracer',
+        'name',
+        'trace_id',
+        'span_id',
+        'parent_id',
+        'start_time',
+        'duration',
+        'attrs',
+        'error',
+        '_started',
+        '_token',
+    )
+
+    def __init__(self, tracer, name: str, trace_id: str = None, **attrs):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = None
+        self.parent_id = None
+        self.start_time = None
+        self.duration = None
+        self.attrs = attrs
+        self.error = None
+        self._started = None
+        self._token = None
+
+    def set(self, name: str, value):
+        self.attrs[name] = value
+
+    def start(self):
+        '''Starts the span and makes it the current one'''
+        parent = _current.get()
+        if parent is not None:
+            self.parent_id = parent.span_id
+            if self.trace_id is None:
+                self.trace_id = parent.trace_id
+        if self.trace_id is None:
+            self.trace_id = new_trace_id()
+
+        self.span_id = next(_span_ids)
+        self.start_time = time()
+        self._started = self.tracer.clock()
+        self._token = _current.set(self)
+        return self
+
+    def finish(self, error: BaseException = None):
+        self.duration = self.tracer.clock() - self._started
+        if error is not None:
+            self.error = '{}: {}'.format(type(error).__name__, error)
+
+        _current.reset(self._token)
+        self._token = None
+        self.tracer.export(self)
+
+    def asdict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration': self.duration,
+            'attrs': self.attrs,
+            'error': self.error,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc)
+
+
+class NoopSpan:
+    '''Span of a tracer without exporter, records nothing'''
+    trace_id = None
+
+    def set(self, name: str, value):
+        pass
+
+    def start(self):
+        return self
+
+    def finish(self, error: BaseException = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_noop = NoopSpan()
+
+
+class Tracer:
+    '''Records spans, propagated through contextvars
+
+    Spans started while another one is current become its children and
+    share its trace id. Nothing is recorded without an exporter.
+    '''
+
+    def __init__(self, exporter=None, clock=perf_counter):
+        self.exporter = exporter
+        self.clock = clock
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, trace_id: str = None, **attrs):
+        '''Span to use as a context manager, or with start and finish'''
+        if self.exporter is None:
+            return _noop
+
+        return Span(self, name, trace_id, **attrs)
+
+    def current(self) -> Span:
+        return _current.get()
+
+    def export(self, span: Span):
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.export(span)
+
+
+tracer = Tracer()
+
+
+def traced(name: str):
+    '''Records calls to the decorated function or coroutine as spans of
+    the module tracer'''
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(prefix: str):
+    '''Class decorator tracing the public methods defined in the class
+
+    Generators are left alone, their span would end before they run.
+    '''
+    def decorator(cls):
+        for name, func in list(vars(cls).items()):
+            if name.startswith('_') or not isfunction(func):
+                continue
+            if isgeneratorfunction(func) or isasyncgenfunction(func):
+                continue
+
+            setattr(cls, name, traced('{}.{}'.format(prefix, name))(func))
+
+        return cls
+
+    return decorator
+
+
+class RingBufferExporter:
+    '''Keeps the last size spans in memory'''
+
+    def __init__(self, size: int = 10000):
+        self._spans = deque(maxlen=size)
+
+    def export(self, span: Span):
+        self._spans.append(span)
+
+    def spans(self, trace_id: str = None) -> List[Span]:
+        spans = list(self._spans)
+        if trace_id is None:
+            return spans
+
+        return [span for span in spans if span.trace_id == trace_id]
+
+    def slow_traces(self, min_duration: float = 0.0) -> Dict[str, List[Span]]:
+        '''Spans by trace id, of the traces whose root lasted at least
+        min_duration seconds'''
+        spans = list(self._spans)
+        slow = {
+            span.trace_id for span in spans
+            if span.parent_id is None and span.duration >= min_duration
+        }
+        traces = {}
+        for span in spans:
+            if span.trace_id in slow:
+                traces.setdefault(span.trace_id, []).append(span)
+
+        return traces
+
+
+class JsonLinesExporter:
+    '''Appends every span to a file as one JSON object per line'''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', buffering=1)
+        self._lock = Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.asdict(), default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            self._file.close()